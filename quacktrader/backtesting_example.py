@@ -1,16 +1,29 @@
 from backtesting import Backtest, Strategy
 from backtesting.lib import crossover
 from finta import TA
+import numpy as np
+import pandas as pd
 import yfinance
 
+from quacktrader.indicator_cache import cached
+from quacktrader.strategy.vectorized import threshold_signals, warmup
+from quacktrader.weatherman.backfill import crossovers
+
 
 class SmaCross(Strategy):
     n1 = 10
     n2 = 20
 
     def init(self):
-        self.sma1 = self.I(TA.SMA, self.data.df, self.n1)
-        self.sma2 = self.I(TA.SMA, self.data.df, self.n2)
+        self.sma1 = self.I(cached(TA.SMA), self.data.df, self.n1)
+        self.sma2 = self.I(cached(TA.SMA), self.data.df, self.n2)
+
+    @classmethod
+    def signals(cls, ohlc: pd.DataFrame, n1: int = None, n2: int = None) -> np.ndarray:
+        """The orders `next` places, for every bar at once"""
+        sma1 = cached(TA.SMA)(ohlc, cls.n1 if n1 is None else n1)
+        sma2 = cached(TA.SMA)(ohlc, cls.n2 if n2 is None else n2)
+        return threshold_signals(crossovers(sma1, sma2), crossovers(sma2, sma1), warmup(sma1, sma2))
 
     def next(self):
         if crossover(self.sma1, self.sma2):
@@ -19,12 +32,13 @@ class SmaCross(Strategy):
             self.sell()
 
 
-goog = yfinance.Ticker('goog')
-ohlc = goog.history(interval='1d', start='2004-08-19', end='2013-03-01')
-bt = Backtest(ohlc, SmaCross,
-              cash=10000, commission=.002,
-              exclusive_orders=True)
+if __name__ == "__main__":
+    goog = yfinance.Ticker('goog')
+    ohlc = goog.history(interval='1d', start='2004-08-19', end='2013-03-01')
+    bt = Backtest(ohlc, SmaCross,
+                  cash=10000, commission=.002,
+                  exclusive_orders=True)
 
-output = bt.run()
-print(output)
-bt.plot()
\ No newline at end of file
+    output = bt.run()
+    print(output)
+    bt.plot()
\ No newline at end of file
@@ -0,0 +1,51 @@
+import sys
+import time
+from typing import Callable, Dict
+import pandas as pd
+
+from quacktrader import buy_unit_puts, sell_puts, sell_vertical_put_spread
+from quacktrader.moneymanager.account_state import AccountState
+from quacktrader.replay import ReplayClient, synthetic_client
+from quacktrader.timing import StageTimer
+
+SCANNERS: Dict[str, Callable] = {
+    'sell_puts': sell_puts.scan,
+    'buy_unit_puts': buy_unit_puts.scan,
+    'sell_vertical_put_spread': sell_vertical_put_spread.scan,
+}
+STAGES = ['fetch', 'parse', 'filter', 'rank']
+INDEX_PRICES = {'$SPX.X': 4000.0, '$NDX.X': 12000.0, '$RUT.X': 1800.0, '$DJX.X': 340.0, '$OEX.X': 1900.0}
+
+
+def benchmark(scan: Callable, client: ReplayClient, repeat: int = 5, **kwargs) -> pd.DataFrame:
+    """
+    Run `scan` against `client` `repeat` times, one row of seconds per run: each stage and the
+    end-to-end time. Every run starts with a cold account state, like a fresh scanner process.
+    """
+    runs = []
+    for _ in range(repeat):
+        timer = StageTimer()
+        start = time.perf_counter()
+        scan(client, account_state=AccountState(client), timer=timer, **kwargs)
+        runs.append({**{stage: timer.timings.get(stage, 0.0) for stage in STAGES}, 'total': time.perf_counter() - start})
+    return pd.DataFrame(runs, columns=[*STAGES, 'total'])
+
+
+def benchmark_scanners(client: ReplayClient, repeat: int = 5, symbols=None, **kwargs) -> pd.DataFrame:
+    """Median and best seconds per stage of every scanner, one row per scanner and statistic"""
+    rows = {}
+    for name, scan in SCANNERS.items():
+        runs = benchmark(scan, client, repeat, symbols=symbols, **kwargs)
+        rows[(name, 'median')] = runs.median()
+        rows[(name, 'min')] = runs.min()
+    return pd.DataFrame(rows).T
+
+
+if __name__ == "__main__":
+    # replay recordings from a directory if one is given, otherwise index-sized synthetic chains
+    if len(sys.argv) > 1:
+        client, symbols = ReplayClient(sys.argv[1], latency=.2, jitter=.1), None
+    else:
+        client, symbols = synthetic_client(INDEX_PRICES, strikes=400, latency=.2, jitter=.1, seed=0), list(INDEX_PRICES)
+    pd.set_option('display.float_format', '{:.3f}'.format)
+    print(benchmark_scanners(client, repeat=3, symbols=symbols))
@@ -0,0 +1,204 @@
+from datetime import date
+import os
+from typing import Iterable, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs
+import pyarrow.parquet as pq
+
+from quacktrader.constants import CHAIN_ARCHIVE_PATH
+
+# partition keys, encoded in the directory names rather than stored in the files
+PARTITIONING = pa.schema([('underlying', pa.string()), ('quote_date', pa.date32())])
+
+SCHEMA = pa.schema([
+    ('symbol', pa.dictionary(pa.int32(), pa.string())),
+    ('put_call', pa.dictionary(pa.int8(), pa.string())),
+    ('expiry', pa.date32()),
+    ('dte', pa.int16()),
+    ('strike', pa.float64()),
+    ('bid', pa.float64()),
+    ('ask', pa.float64()),
+    ('last', pa.float64()),
+    ('mark', pa.float64()),
+    ('delta', pa.float32()),
+    ('gamma', pa.float32()),
+    ('theta', pa.float32()),
+    ('vega', pa.float32()),
+    ('rho', pa.float32()),
+    ('volatility', pa.float32()),
+    ('volume', pa.int64()),
+    ('open_interest', pa.int64()),
+    ('in_the_money', pa.bool_()),
+    ('underlying_price', pa.float64()),
+    ('quote_time', pa.timestamp('ms')),
+])
+
+# chain entry fields by column, for what `normalize_chain` copies over as is
+FIELDS = {
+    'symbol': 'symbol', 'put_call': 'putCall', 'strike': 'strikePrice', 'bid': 'bid', 'ask': 'ask',
+    'last': 'last', 'mark': 'mark', 'delta': 'delta', 'gamma': 'gamma', 'theta': 'theta', 'vega': 'vega',
+    'rho': 'rho', 'volatility': 'volatility', 'volume': 'totalVolume', 'open_interest': 'openInterest',
+    'in_the_money': 'inTheMoney', 'quote_time': 'quoteTimeInLong',
+}
+# TDA sends -999 (or 'NaN') when it has no value for a greek or the volatility
+MISSING = -999
+# quote dates are trading sessions, so they are taken in the exchange's time
+EXCHANGE_TIMEZONE = 'America/New_York'
+GREEKS = ('delta', 'gamma', 'theta', 'vega', 'rho', 'volatility')
+
+Range = Tuple[Optional[object], Optional[object]]
+
+
+def normalize_chain(chain: dict, quote_date: date = None) -> pd.DataFrame:
+    """
+    One row per contract of a `get_option_chain` response (SINGLE strategy), puts and calls alike,
+    in the archive's columns plus 'underlying' and 'quote_date'. The quote date defaults to the
+    session of the latest quote in the chain, so a weekend scan files Friday's quotes under Friday,
+    and to today when no contract has a quote time.
+    """
+    rows = []
+    for exp_date_map in (chain.get('putExpDateMap', {}), chain.get('callExpDateMap', {})):
+        for expiry, strikes in exp_date_map.items():
+            # keys look like '2023-01-20:17', the expiration date and days until it
+            expiry, dte = expiry.split(':')
+            for contracts in strikes.values():
+                for contract in contracts:
+                    row = {column: contract.get(field) for column, field in FIELDS.items()}
+                    row['expiry'], row['dte'] = expiry, int(dte)
+                    rows.append(row)
+
+    frame = pd.DataFrame(rows, columns=[*FIELDS, 'expiry', 'dte'])
+    for greek in GREEKS:
+        frame[greek] = pd.to_numeric(frame[greek], errors='coerce').mask(lambda values: values <= MISSING)
+    frame['volatility'] /= 100
+    frame['expiry'] = pd.to_datetime(frame['expiry']).dt.date
+    frame['quote_time'] = pd.to_datetime(frame['quote_time'], unit='ms')
+    frame['underlying_price'] = chain.get('underlyingPrice', np.nan)
+    frame['underlying'] = chain['symbol']
+    if quote_date is None:
+        latest = frame['quote_time'].max()
+        quote_date = latest.tz_localize('UTC').tz_convert(EXCHANGE_TIMEZONE).date() \
+            if pd.notna(latest) and latest.value > 0 else date.today()
+    frame['quote_date'] = quote_date
+    return frame
+
+
+def _bounds(field: str, bounds: Optional[Range]) -> Optional[pc.Expression]:
+    if bounds is None:
+        return None
+    low, high = bounds
+    expressions = []
+    if low is not None:
+        expressions.append(pc.field(field) >= low)
+    if high is not None:
+        expressions.append(pc.field(field) <= high)
+    return _all(expressions)
+
+
+def _all(expressions: Iterable[Optional[pc.Expression]]) -> Optional[pc.Expression]:
+    combined = None
+    for expression in expressions:
+        if expression is not None:
+            combined = expression if combined is None else combined & expression
+    return combined
+
+
+class ChainArchive:
+    """
+    Normalized option chain snapshots in Parquet files, one directory per underlying and quote
+    date (`underlying=$SPX.X/quote_date=2023-01-03/`), symbols dictionary-encoded and zstd
+    compressed. A snapshot's rows are sorted by expiry and strike so the row groups' statistics
+    let a read skip what its filters rule out.
+
+    Reads memory-map the files and push the filters down: underlying and quote dates prune whole
+    directories, expiry, strike, delta and DTE skip row groups, and only the remaining rows are
+    materialized.
+    """
+
+    def __init__(self, root: str = CHAIN_ARCHIVE_PATH, row_group_size: int = 16_384):
+        self.root = root
+        self.row_group_size = row_group_size
+        self._filesystem = pyarrow.fs.LocalFileSystem(use_mmap=True)
+
+    def write_chain(self, chain: dict, quote_date: date = None) -> int:
+        """Snapshot a `get_option_chain` response; returns the number of contracts written"""
+        return self.write(normalize_chain(chain, quote_date))
+
+    def write(self, frame: pd.DataFrame) -> int:
+        """
+        Snapshot rows that already have the archive's columns (e.g. imported end-of-day data);
+        every (underlying, quote_date) pair gets its own file, replacing an earlier snapshot of
+        the same quote time.
+        """
+        written = 0
+        for (underlying, quote_date), rows in frame.groupby(['underlying', 'quote_date'], sort=False):
+            quote_date = pd.Timestamp(quote_date).date()
+            directory = os.path.join(self.root, f'underlying={underlying}', f'quote_date={quote_date.isoformat()}')
+            os.makedirs(directory, exist_ok=True)
+            quote_time = pd.Timestamp(rows['quote_time'].max()) if 'quote_time' in rows else pd.NaT
+            name = 'eod' if pd.isna(quote_time) else quote_time.strftime('%H%M%S')
+            table = self._table(rows.sort_values(['expiry', 'strike'], kind='stable'))
+            pq.write_table(table, os.path.join(directory, f'{name}.parquet'), row_group_size=self.row_group_size,
+                           compression='zstd', use_dictionary=['symbol', 'put_call'])
+            written += len(rows)
+        return written
+
+    @staticmethod
+    def _table(rows: pd.DataFrame) -> pa.Table:
+        # columns the data doesn't have, like the greeks of some end-of-day sources, are stored as nulls
+        present = pa.schema([field for field in SCHEMA if field.name in rows])
+        rows = rows[present.names].assign(expiry=pd.to_datetime(rows['expiry']).dt.date)
+        table = pa.Table.from_pandas(rows, schema=present, preserve_index=False)
+        return pa.Table.from_arrays([table[field.name] if field.name in present.names else pa.nulls(len(rows), field.type)
+                                     for field in SCHEMA], schema=SCHEMA)
+
+    def dataset(self) -> ds.Dataset:
+        return ds.dataset(self.root, schema=pa.unify_schemas([SCHEMA, PARTITIONING]), format='parquet',
+                          filesystem=self._filesystem, partitioning=ds.partitioning(PARTITIONING, flavor='hive'))
+
+    def read(self, underlying: Union[str, Iterable[str]] = None, quote_dates: Range = None, expiry: Range = None,
+             strike: Range = None, delta: Range = None, dte: Range = None, put_call: str = None,
+             symbols: Iterable[str] = None, columns: Iterable[str] = None, latest_only: bool = False) -> pd.DataFrame:
+        """
+        Archived contracts matching every given filter. Ranges are inclusive `(low, high)` pairs,
+        either end may be None; dates are `datetime.date`.
+
+        Every snapshot of a quote date is returned, so a contract scanned several times a day
+        appears once per scan; `latest_only` keeps only its last quote of each day.
+        """
+        columns = list(columns) if columns else None
+        if not os.path.isdir(self.root):
+            return pd.DataFrame(columns=columns or SCHEMA.names + PARTITIONING.names)
+        if isinstance(underlying, str):
+            underlying = [underlying]
+        expression = _all([
+            pc.field('underlying').isin(list(underlying)) if underlying is not None else None,
+            _bounds('quote_date', quote_dates),
+            _bounds('expiry', expiry),
+            _bounds('strike', strike),
+            _bounds('delta', delta),
+            _bounds('dte', dte),
+            pc.field('put_call') == put_call if put_call is not None else None,
+            pc.field('symbol').isin(list(symbols)) if symbols is not None else None,
+        ])
+        read_columns = columns
+        if latest_only and columns:
+            read_columns = list(dict.fromkeys(columns + ['symbol', 'quote_date', 'quote_time']))
+        frame = self.dataset().to_table(columns=read_columns, filter=expression).to_pandas()
+        if latest_only:
+            # end-of-day snapshots have no quote time and sort last, after the day's intraday ones
+            frame = frame.sort_values('quote_time', kind='stable').drop_duplicates(['quote_date', 'symbol'], keep='last')
+            frame = frame.sort_index(ignore_index=True)[columns or frame.columns]
+        return frame
+
+    def quote_dates(self, underlying: str) -> pd.DatetimeIndex:
+        """The quote dates archived for `underlying`, in order"""
+        directory = os.path.join(self.root, f'underlying={underlying}')
+        if not os.path.isdir(directory):
+            return pd.DatetimeIndex([])
+        return pd.DatetimeIndex(sorted(name.split('=', 1)[1] for name in os.listdir(directory)
+                                       if name.startswith('quote_date=')))
@@ -3,4 +3,12 @@ import os
 
 TDA_TOKEN_PATH = os.getenv('TDA_TOKEN_PATH', '/tmp/tda-access-token.json')
 TDA_API_KEY = os.getenv('TDA_API_KEY') # make sure to include the postfix '@AMER.OAUTHAP'
-TDA_REDIRECT_URI = os.getenv('TDA_REDIRECT_URI')
\ No newline at end of file
+TDA_REDIRECT_URI = os.getenv('TDA_REDIRECT_URI')
+INDICATOR_CACHE_PATH = os.getenv('INDICATOR_CACHE_PATH') # optional on-disk tier for quacktrader.indicator_cache
+ACCOUNT_STATE_TTL = float(os.getenv('ACCOUNT_STATE_TTL', 30)) # seconds an accounts response is reused by quacktrader.moneymanager.account_state
+QUACKTRADER_HOME = os.getenv('QUACKTRADER_HOME', os.path.join(os.path.expanduser('~'), '.quacktrader')) # state that has to survive a reboot
+EQUITY_LEDGER_PATH = os.getenv('EQUITY_LEDGER_PATH', os.path.join(QUACKTRADER_HOME, 'equity-ledger.sqlite'))
+CHAIN_ARCHIVE_PATH = os.getenv('CHAIN_ARCHIVE_PATH', os.path.join(QUACKTRADER_HOME, 'chains')) # partitioned parquet store of quacktrader.chain_archive
+TDA_MAX_CONNECTIONS = int(os.getenv('TDA_MAX_CONNECTIONS', 20)) # connection pool of the shared client in quacktrader.tda_session
+TDA_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('TDA_MAX_KEEPALIVE_CONNECTIONS', 10))
+TDA_KEEPALIVE_EXPIRY = float(os.getenv('TDA_KEEPALIVE_EXPIRY', 30)) # seconds an idle connection is kept open
@@ -1,15 +1,11 @@
 import os
-from constants import TDA_API_KEY, TDA_REDIRECT_URI, TDA_TOKEN_PATH
-from tda import auth, client
+from quacktrader.tda_session import get_client
+from tda import client
 import json
 
 
 
-try:
-    c = auth.client_from_token_file(TDA_TOKEN_PATH, TDA_API_KEY)
-except FileNotFoundError:
-    # go through the oauth2 workflow manually, but with a little help
-    c = auth.client_from_manual_flow(TDA_API_KEY, TDA_REDIRECT_URI, TDA_TOKEN_PATH)
+c = get_client()
 
 r = c.get_price_history('AAPL',
         period_type=client.Client.PriceHistory.PeriodType.YEAR,
@@ -4,8 +4,7 @@ import itertools
 from operator import getitem
 import operator
 from typing import List
-from constants import TDA_API_KEY, TDA_REDIRECT_URI, TDA_TOKEN_PATH
-from tda import auth
+from quacktrader.tda_session import get_client
 from tda.client import Client
 import json
 import httpx
@@ -16,11 +15,7 @@ def select_symbols() -> List[str]:
     return ['SPY']
 
 
-try:
-    tda_client = auth.client_from_token_file(TDA_TOKEN_PATH, TDA_API_KEY)
-except FileNotFoundError:
-    # go through the oauth2 workflow manually, but with a little help
-    tda_client = auth.client_from_manual_flow(TDA_API_KEY, TDA_REDIRECT_URI, TDA_TOKEN_PATH)
+tda_client = get_client()
 
 symbols: List[str] = select_symbols()
 from_date = datetime.date.today() + datetime.timedelta(days=21)
@@ -0,0 +1,159 @@
+from collections import OrderedDict
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+from typing import Callable, Dict, Hashable, Optional, Tuple
+import weakref
+import pandas as pd
+
+from quacktrader.constants import INDICATOR_CACHE_PATH
+from quacktrader.ohlc import fingerprint
+
+
+def _nbytes(value) -> int:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True))
+    return getattr(value, 'nbytes', 0)
+
+
+# fingerprints of the frames seen so far, by identity: hashing a long frame costs about as much
+# as the indicators themselves, so each frame is hashed once, on its first lookup
+_fingerprints: Dict[int, Tuple[weakref.ref, str]] = {}
+
+
+def _fingerprint(ohlc: pd.DataFrame) -> str:
+    entry = _fingerprints.get(id(ohlc))
+    if entry is not None and entry[0]() is ohlc:
+        return entry[1]
+    digest = fingerprint(ohlc)
+    _fingerprints[id(ohlc)] = (weakref.ref(ohlc), digest)
+    weakref.finalize(ohlc, _fingerprints.pop, id(ohlc), None)
+    return digest
+
+
+def _parameters(indicator: Callable, ohlc: pd.DataFrame, args: tuple, kwargs: dict) -> tuple:
+    """The call's arguments after `ohlc` by name, defaults filled in, so equivalent calls share a key"""
+    try:
+        bound = inspect.signature(indicator).bind(ohlc, *args, **kwargs)
+    except (TypeError, ValueError):
+        return args, tuple(sorted(kwargs.items()))
+    bound.apply_defaults()
+    _, *parameters = bound.arguments.items()
+    return tuple((name, tuple(sorted(value.items())) if isinstance(value, dict) else value)
+                 for name, value in parameters)
+
+
+def _name(indicator: Callable) -> str:
+    owner = getattr(indicator, '__self__', None)
+    if owner is not None:
+        return f"{getattr(owner, '__name__', type(owner).__name__)}.{indicator.__name__}"
+    return f"{indicator.__module__}.{indicator.__qualname__}"
+
+
+class IndicatorCache:
+    """
+    Memoize indicator series by (data fingerprint, indicator, parameters).
+    A frame is fingerprinted once, when first seen, so it must not be modified
+    in place after that.
+
+    Entries are evicted least recently used first once there are more than
+    `max_entries` of them or they hold more than `max_bytes`. With a `directory`
+    every computed series is also pickled to disk, where other processes and
+    later runs can find it.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 256 * 2**20, directory: str = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, Tuple[object, int]]' = OrderedDict()
+        self._bytes = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_compute(self, indicator: Callable, ohlc: pd.DataFrame, *args, **kwargs):
+        """Return `indicator(ohlc, *args, **kwargs)`, computing it only if no tier has it yet"""
+        key = (_fingerprint(ohlc), _name(indicator), _parameters(indicator, ohlc, args, kwargs))
+        value = self._get(key)
+        if value is None:
+            self.misses += 1
+            value = indicator(ohlc, *args, **kwargs)
+            self._put(key, value)
+            self._write(key, value)
+        else:
+            self.hits += 1
+        # callers own what they get back, the cached series must stay untouched
+        return value.copy() if hasattr(value, 'copy') else value
+
+    def clear(self):
+        """Empty the memory tier; the disk tier is left alone"""
+        self._entries.clear()
+        self._bytes = 0
+
+    def _get(self, key: Hashable) -> Optional[object]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry[0]
+        value = self._read(key)
+        if value is not None:
+            self._put(key, value)
+        return value
+
+    def _put(self, key: Hashable, value: object):
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+
+    def _path(self, key: Hashable) -> str:
+        return os.path.join(self.directory, hashlib.sha1(repr(key).encode()).hexdigest() + '.pkl')
+
+    def _read(self, key: Hashable) -> Optional[object]:
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key), 'rb') as file:
+                return pickle.load(file)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def _write(self, key: Hashable, value: object):
+        if self.directory is None:
+            return
+        # write then rename, so a reader in another process never sees half a file
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(descriptor, 'wb') as file:
+            pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, self._path(key))
+
+
+default_cache = IndicatorCache(directory=INDICATOR_CACHE_PATH)
+
+
+def cached(indicator: Callable, cache: IndicatorCache = None) -> Callable:
+    """
+    Wrap an indicator such as `TA.SMA` so its calls go through `cache`
+    (the process-wide `default_cache` unless given). The wrapper keeps the
+    indicator's name, so `Strategy.I` labels it the same way.
+
+        >>> self.sma1 = self.I(cached(TA.SMA), self.data.df, self.n1)
+    """
+    @functools.wraps(indicator)
+    def wrapper(ohlc: pd.DataFrame, *args, **kwargs):
+        return (cache if cache is not None else default_cache).get_or_compute(indicator, ohlc, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,83 @@
+from concurrent.futures import Future
+from dataclasses import dataclass
+import threading
+import time
+from typing import Callable, List
+from tda.client import Client
+
+from quacktrader.constants import ACCOUNT_STATE_TTL
+
+
+@dataclass(frozen=True)
+class AccountSnapshot:
+    """The accounts response (with positions) and when it was fetched"""
+    accounts: List[dict]
+    fetched_at: float
+
+    @property
+    def securities_account(self) -> dict:
+        return self.accounts[0]['securitiesAccount']
+
+    @property
+    def balances(self) -> dict:
+        return self.securities_account['currentBalances']
+
+    @property
+    def positions(self) -> List[dict]:
+        return self.securities_account.get('positions', [])
+
+
+class AccountState:
+    """
+    Balances and positions shared by the money managers and scanners, so they don't each call
+    `get_accounts`. A snapshot is reused until it is `ttl` seconds old, and callers that need a
+    fresh one at the same time wait on a single in-flight request instead of issuing their own.
+    """
+
+    def __init__(self, tda_client: Client, ttl: float = ACCOUNT_STATE_TTL, clock: Callable[[], float] = time.monotonic):
+        self.tda_client = tda_client
+        self.ttl = ttl
+        self.clock = clock
+        self.requests = 0
+        self._snapshot: AccountSnapshot = None
+        self._in_flight: Future = None
+        self._lock = threading.Lock()
+
+    def get(self, max_age: float = None) -> AccountSnapshot:
+        """The latest snapshot, fetched again if it is older than `max_age` (the ttl by default)"""
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and self.clock() - snapshot.fetched_at < max_age:
+                return snapshot
+            if self._in_flight is not None:
+                in_flight, leader = self._in_flight, False
+            else:
+                in_flight = self._in_flight = Future()
+                leader = True
+
+        if not leader:
+            return in_flight.result()
+        try:
+            snapshot = self._fetch()
+        except BaseException as error:
+            with self._lock:
+                self._in_flight = None
+            in_flight.set_exception(error)
+            raise
+        with self._lock:
+            self._snapshot = snapshot
+            self._in_flight = None
+        in_flight.set_result(snapshot)
+        return snapshot
+
+    def invalidate(self):
+        """Forget the snapshot, e.g. after placing an order"""
+        with self._lock:
+            self._snapshot = None
+
+    def _fetch(self) -> AccountSnapshot:
+        self.requests += 1
+        response = self.tda_client.get_accounts(fields=Client.Account.Fields.POSITIONS)
+        assert response.status_code == 200, response.raise_for_status()
+        return AccountSnapshot(response.json(), self.clock())
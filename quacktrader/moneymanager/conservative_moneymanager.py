@@ -1,15 +1,11 @@
-from quacktrader.constants import TDA_API_KEY, TDA_REDIRECT_URI, TDA_TOKEN_PATH
-from tda import auth, client
+from tda import client
 import json
 from tda.client import Client
 
+from quacktrader.moneymanager.account_state import AccountState
+from quacktrader.moneymanager.ledger import EquityLedger
 from quacktrader.moneymanager.moneymanager import MoneyManager
-
-try:
-    tda_client = auth.client_from_token_file(TDA_TOKEN_PATH, TDA_API_KEY)
-except FileNotFoundError:
-    # go through the oauth2 workflow manually, but with a little help
-    tda_client = auth.client_from_manual_flow(TDA_API_KEY, TDA_REDIRECT_URI, TDA_TOKEN_PATH)
+from quacktrader.tda_session import get_account_state
 
 class ConservativeMoneyManger(MoneyManager):
     """
@@ -18,22 +14,25 @@ class ConservativeMoneyManger(MoneyManager):
     2. If in any single month the account loses more than 6%, stop trading for the rest of the month.
     """
 
+    max_monthly_loss = .06
+
+    def __init__(self, account_state: AccountState = None, ledger: EquityLedger = None):
+        self.account_state = account_state or get_account_state()
+        self.ledger = ledger or EquityLedger()
+        self._recorded = None
+
     def get_risk_capital(self) -> int:
         """Only allow cash-secured positions for now"""
-        accounts_response = tda_client.get_accounts(fields=Client.Account.Fields.POSITIONS)
-        assert accounts_response.status_code == 200, accounts_response.raise_for_status()
-        # print(json.dumps(accounts_response.json(), indent=4))
-
-        accounts_data = accounts_response.json()
-        positions = accounts_data[0]['securitiesAccount']['positions']
-        current_day_profit_loss_percentage = sum(position['currentDayProfitLossPercentage'] for position in positions)
-        if (current_day_profit_loss_percentage > 6):
-            # There isn't an easy way to look at the whole month, need to keep a ledger
+        account = self.account_state.get()
+        total_capital = account.balances['liquidationValue']
+        if account is not self._recorded:
+            self.ledger.record(total_capital)
+            self._recorded = account
+        if self.ledger.month_to_date() <= -self.max_monthly_loss:
             return 0
 
         # buying power should account for orders, but check back later
-        balance = accounts_data[0]['securitiesAccount']['currentBalances']['buyingPowerNonMarginableTrade']
-        total_capital = accounts_data[0]['securitiesAccount']['currentBalances']['liquidationValue']
+        balance = account.balances['buyingPowerNonMarginableTrade']
         return min(balance, total_capital * .02)
 
 if __name__ == "__main__":
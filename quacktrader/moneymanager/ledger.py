@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+import math
+import os
+import sqlite3
+import threading
+from typing import Optional, Tuple
+
+from quacktrader.constants import EQUITY_LEDGER_PATH
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    timestamp REAL PRIMARY KEY,
+    equity REAL NOT NULL,
+    kind TEXT NOT NULL,
+    peak REAL NOT NULL,
+    max_drawdown REAL NOT NULL
+)
+"""
+
+
+class EquityLedger:
+    """
+    Append-only SQLite ledger of account equity snapshots, keyed by time. Every row also carries
+    the running peak and the worst drawdown so far, so the questions the money managers ask are
+    a lookup on the timestamp index (O(log n)) rather than a rescan of the history:
+
+    * month-to-date P&L compares the latest equity with the equity as the month began
+    * drawdown compares it with the running peak
+    * rolling losses compare it with the snapshot at the start of the window
+
+    Snapshots are total equity, so deposits and withdrawals show up as P&L: a withdrawal counts
+    toward `month_to_date` losses and `drawdown` like a losing trade would, and a deposit offsets
+    them.
+    """
+
+    def __init__(self, path: str = EQUITY_LEDGER_PATH):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._connection:
+            self._connection.execute(SCHEMA)
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(self, equity: float, timestamp: datetime = None, kind: str = 'intraday'):
+        """
+        Append a snapshot, 'intraday' or 'daily'. A given `timestamp` must be newer than the last
+        snapshot. Without one the snapshot is taken now, once other writers are locked out, and
+        just after the last snapshot if the clock is behind it (another process, a clock step).
+        """
+        with self._lock, self._connection:
+            # take the write lock before reading, so another process can't append in between
+            self._connection.execute("BEGIN IMMEDIATE")
+            last = self._connection.execute(
+                "SELECT timestamp, peak, max_drawdown FROM snapshots ORDER BY timestamp DESC LIMIT 1").fetchone()
+            if timestamp is None:
+                at = datetime.now().timestamp()
+                if last is not None:
+                    at = max(at, math.nextafter(last[0], math.inf))
+            else:
+                at = timestamp.timestamp()
+                if last is not None and at <= last[0]:
+                    raise ValueError("the ledger is append-only, snapshots must be newer than the last one")
+            peak = max(equity, last[1]) if last else equity
+            max_drawdown = min(equity / peak - 1, last[2]) if last else 0.0
+            self._connection.execute(
+                "INSERT INTO snapshots VALUES (?, ?, ?, ?, ?)", (at, equity, kind, peak, max_drawdown))
+
+    def _query(self, sql: str, *parameters) -> Optional[tuple]:
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchone()
+
+    def latest(self) -> Optional[Tuple[datetime, float]]:
+        row = self._query("SELECT timestamp, equity FROM snapshots ORDER BY timestamp DESC LIMIT 1")
+        return (datetime.fromtimestamp(row[0]), row[1]) if row else None
+
+    def equity_at(self, timestamp: datetime) -> Optional[float]:
+        """Equity as of `timestamp`: the last snapshot at or before it"""
+        row = self._query("SELECT equity FROM snapshots WHERE timestamp <= ? ORDER BY timestamp DESC LIMIT 1",
+                          timestamp.timestamp())
+        return row[0] if row else None
+
+    def change_since(self, start: datetime) -> float:
+        """
+        Fractional change in equity from `start` to the latest snapshot. The baseline is the equity
+        as of `start`, or the first snapshot if the ledger begins later.
+        """
+        latest = self.latest()
+        if latest is None:
+            return 0.0
+        baseline = self.equity_at(start)
+        if baseline is None:
+            baseline = self._query("SELECT equity FROM snapshots ORDER BY timestamp LIMIT 1")[0]
+        return latest[1] / baseline - 1
+
+    def month_to_date(self, now: datetime = None) -> float:
+        """Fractional P&L since the start of the month"""
+        now = now or datetime.now()
+        return self.change_since(now.replace(day=1, hour=0, minute=0, second=0, microsecond=0))
+
+    def rolling_loss(self, window: timedelta) -> float:
+        """Fractional change in equity over the last `window` up to the latest snapshot"""
+        latest = self.latest()
+        return self.change_since(latest[0] - window) if latest else 0.0
+
+    def drawdown(self) -> float:
+        """How far the latest equity is below its running peak, as a negative fraction"""
+        row = self._query("SELECT equity, peak FROM snapshots ORDER BY timestamp DESC LIMIT 1")
+        return row[0] / row[1] - 1 if row else 0.0
+
+    def max_drawdown(self) -> float:
+        """The worst peak-to-trough drawdown in the ledger, as a negative fraction"""
+        row = self._query("SELECT max_drawdown FROM snapshots ORDER BY timestamp DESC LIMIT 1")
+        return row[0] if row else 0.0
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+
+def month_start_contributions(index: pd.DatetimeIndex, amount: float) -> np.ndarray:
+    """`amount` on every bar that falls on the first of a month, nothing on the others"""
+    return np.where(index.is_month_start, amount, 0)
+
+
+def compound_balance(returns, contributions=0, initial=0, leverage=1, fee=0):
+    """
+    Balance of an account that earns `returns` levered by `leverage` and less a per-period `fee`,
+    and receives `contributions` at the end of each period:
+
+        balance[t] = balance[t - 1] * (1 + leverage * returns[t] - fee) + contributions[t]
+
+    Instead of walking the rows, this is computed in closed form from the cumulative growth G:
+
+        balance[t] = G[t] * (initial + sum(contributions[s] / G[s] for s <= t))
+
+    Time runs along the first axis. 2-D returns (many return series) and 2-D contributions
+    (many contribution plans) are evaluated in one call, broadcasting against each other.
+    A NaN return counts as a period without growth, only the contribution is added. A period
+    that loses everything or more (a growth factor of zero or less) has no logarithm, so then
+    the rows are walked one at a time and the balance goes to zero or below, as it would.
+    """
+    index = returns.index if isinstance(returns, (pd.Series, pd.DataFrame)) else None
+    columns = returns.columns if isinstance(returns, pd.DataFrame) else None
+    returns = np.asarray(returns, dtype=float)
+    contributions = np.asarray(contributions, dtype=float)
+    if returns.ndim == 1 and contributions.ndim == 2:
+        returns = returns[:, np.newaxis]
+    elif returns.ndim == 2 and contributions.ndim == 1:
+        contributions = contributions[:, np.newaxis]
+
+    growth = np.where(np.isnan(returns), 1, 1 + leverage * returns - fee)
+    if (growth > 0).all():
+        log_growth = np.cumsum(np.log(growth), axis=0)
+        discounted = np.cumsum(contributions * np.exp(-log_growth), axis=0)
+        balance = np.exp(log_growth) * (initial + discounted)
+    else:
+        balance = _walk(growth, contributions, initial)
+
+    if index is not None and balance.ndim == 1:
+        return pd.Series(balance, index=index)
+    if index is not None and balance.ndim == 2 and columns is not None and balance.shape[1] == len(columns):
+        return pd.DataFrame(balance, index=index, columns=columns)
+    return balance
+
+
+def _walk(growth: np.ndarray, contributions: np.ndarray, initial: float) -> np.ndarray:
+    """`compound_balance` row by row, for growth factors the closed form can't take the log of"""
+    growth, contributions = np.broadcast_arrays(growth, contributions)
+    balance = np.empty(growth.shape)
+    total = initial
+    for period in range(len(growth)):
+        total = total * growth[period] + contributions[period]
+        balance[period] = total
+    return balance
@@ -1,52 +1,80 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from pandas.core.base import PandasObject
 
+# simulations per chunk are sized so one chunk of paths stays around this many values
+CHUNK_VALUES = 2 ** 22
+
+
+class __make_object__:
+    """Monte Carlo simulation results"""
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def shuffles(rng: np.random.Generator, n: int, sims: int) -> np.ndarray:
+    """A `sims × n` matrix of indices, each row an independent permutation of `range(n)`"""
+    return rng.permuted(np.tile(np.arange(n), (sims, 1)), axis=1)
+
+
 def montecarlo(series, sims=100, bust=-1, goal=0):
+    return montecarlo_chunked(series, sims=sims, bust=bust, goal=goal, keep_paths=True)
+
 
+def montecarlo_chunked(series, sims=100, bust=-1, goal=0, chunk_size=None, keep_paths=False, seed=None, resample=shuffles):
+    """
+    Reshuffle the order of `series` `sims` times (the first simulation keeps the original order)
+    and summarize the cumulative results.
+
+    Simulations run in chunks of `chunk_size` reshuffles, drawn as index matrices from `resample`,
+    and each chunk is reduced to its final totals and lowest points before the next one is drawn,
+    so memory doesn't grow with `sims × len(series)`. Only `keep_paths=True` keeps every path,
+    which `data` and `plot` need.
+    """
     if not isinstance(series, pd.Series):
         raise ValueError("Data must be a Pandas Series")
 
-    class __make_object__:
-        """Monte Carlo simulation results"""
-        def __init__(self, **kwargs):
-            self.__dict__.update(kwargs)
-
-    def plot(title="Monte Carlo Simulation Results", figsize=None):
-        fig, ax = plt.subplots(figsize=figsize)
-        ax.plot(cumsum, lw=1, alpha=.8)
-        ax.plot(cumsum["original"], lw=3, color="r", alpha=.8, label="Original")
-        ax.axhline(0, color="black")
-        ax.legend()
-        ax.set_title(title, fontweight="bold")
-        plt.ylabel("Results")
-        plt.xlabel("Occurrences")
-        plt.show()
-        plt.close()
-
-    results = [series.values]
-    for i in range(1, sims):
-        results.append(series.sample(frac=1).values)
-
-    df = pd.DataFrame(results).T
-    df.rename(columns={0:'original'}, inplace=True)
-
-    cumsum = df.cumsum()
-    total = cumsum[-1:].T
-    dd = cumsum.min()[cumsum.min() < 0]
-    nobust = cumsum[cumsum.min()[cumsum.min() > -abs(bust)].index][-1:]
-
-    return __make_object__(**{
-        "data": df,
+    values = series.to_numpy(dtype=float)
+    n = len(values)
+    rng = np.random.default_rng(seed)
+    chunk_size = chunk_size or max(1, CHUNK_VALUES // max(n, 1))
+
+    totals = np.empty(sims)
+    lows = np.empty(sims)
+    paths = np.empty((n, sims)) if keep_paths else None
+    for start in range(0, sims, chunk_size):
+        stop = min(start + chunk_size, sims)
+        indices = resample(rng, n, stop - start)
+        if start == 0:
+            indices[0] = np.arange(n)
+        results = values[indices]
+        cumsum = np.cumsum(results, axis=1)
+        totals[start:stop] = cumsum[:, -1]
+        lows[start:stop] = cumsum.min(axis=1)
+        if keep_paths:
+            paths[:, start:stop] = results.T
+
+    return summarize(totals, lows, bust=bust, goal=goal, paths=paths)
+
+
+def summarize(totals, lows, bust=-1, goal=0, paths=None):
+    """Monte Carlo statistics from each simulation's final total and lowest cumulative result"""
+    sims = len(totals)
+    totals = pd.Series(totals)
+    dd = pd.Series(lows[lows < 0])
+    nobust = totals[lows > -abs(bust)]
+
+    results = {
         "stats": {
-            "min": total.min().values[0],
-            "max": total.max().values[0],
-            "mean": total.mean().values[0],
-            "median": total.median().values[0],
-            "std": total.std().values[0],
+            "min": totals.min(),
+            "max": totals.max(),
+            "mean": totals.mean(),
+            "median": totals.median(),
+            "std": totals.std(),
             "maxdd": dd.min(),
             "bust": len(dd[dd <= -abs(bust)]) / sims,
-            "goal": (nobust >= abs(goal)).sum().sum() / sims,
+            "goal": (nobust >= abs(goal)).sum() / sims,
         },
         "maxdd": {
             "min": dd.min(),
@@ -55,7 +83,28 @@ def montecarlo(series, sims=100, bust=-1, goal=0):
             "median": dd.median(),
             "std": dd.std()
         },
-        "plot": plot
-    })
+    }
+
+    if paths is not None:
+        df = pd.DataFrame(paths)
+        df.rename(columns={0: 'original'}, inplace=True)
+        cumsum = df.cumsum()
+
+        def plot(title="Monte Carlo Simulation Results", figsize=None):
+            fig, ax = plt.subplots(figsize=figsize)
+            ax.plot(cumsum, lw=1, alpha=.8)
+            ax.plot(cumsum["original"], lw=3, color="r", alpha=.8, label="Original")
+            ax.axhline(0, color="black")
+            ax.legend()
+            ax.set_title(title, fontweight="bold")
+            plt.ylabel("Results")
+            plt.xlabel("Occurrences")
+            plt.show()
+            plt.close()
+
+        results["data"] = df
+        results["plot"] = plot
+
+    return __make_object__(**results)
 
-PandasObject.montecarlo = montecarlo
\ No newline at end of file
+PandasObject.montecarlo = montecarlo
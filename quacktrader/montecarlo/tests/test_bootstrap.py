@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+from montecarlo.bootstrap import MovingBlock, Stationary, bootstrap
+
+
+def _returns():
+    return pd.Series(np.random.default_rng(0).normal(0.001, 0.01, 300))
+
+
+def test_moving_blocks_are_consecutive_runs():
+    indices = MovingBlock(5)(np.random.default_rng(0), 23, 4)
+    assert indices.shape == (4, 23)
+    assert ((indices >= 0) & (indices < 23)).all()
+    blocks = indices[:, :20].reshape(4, 4, 5)
+    assert (np.diff(blocks, axis=2) == 1).all()
+
+
+def test_stationary_blocks_wrap_around():
+    indices = Stationary(10)(np.random.default_rng(0), 50, 200)
+    assert ((indices >= 0) & (indices < 50)).all()
+    steps = np.diff(indices, axis=1) % 50
+    # roughly one in ten positions starts a new block, the rest continue the previous one
+    assert (steps == 1).mean() == pytest.approx(0.9, abs=0.02)
+
+
+@pytest.mark.parametrize('method', ['block', 'stationary'])
+def test_seeded_runs_do_not_depend_on_worker_count(method):
+    single = bootstrap(_returns(), sims=2000, method=method, block_size=10, seed=42, chunk_size=300)
+    parallel = bootstrap(_returns(), sims=2000, method=method, block_size=10, seed=42, chunk_size=300, workers=3)
+    assert single.stats == parallel.stats
+    assert single.maxdd == parallel.maxdd
+    other = bootstrap(_returns(), sims=2000, method=method, block_size=10, seed=43, chunk_size=300)
+    assert other.stats != single.stats
@@ -0,0 +1,46 @@
+from math import isnan
+import numpy as np
+import pandas as pd
+import pytest
+from montecarlo.compounding import compound_balance, month_start_contributions
+
+
+def _loop(returns, contributions, total, leverage=1, fee=0):
+    balances = []
+    for percent_return, contribution in zip(returns, contributions):
+        if isnan(percent_return):
+            total += contribution
+        else:
+            total = total * (1 + leverage * percent_return - fee) + contribution
+        balances.append(total)
+    return np.array(balances)
+
+
+def test_matches_row_by_row_compounding():
+    index = pd.bdate_range('2020-01-01', periods=500)
+    returns = pd.Series(np.random.default_rng(0).normal(0.0005, 0.01, 500), index=index)
+    returns.iloc[[0, 17]] = np.nan
+    contributions = month_start_contributions(index, 1000)
+    balance = compound_balance(returns, contributions, initial=300000, leverage=2, fee=0.0001)
+    assert isinstance(balance, pd.Series)
+    np.testing.assert_allclose(balance, _loop(returns, contributions, 300000, leverage=2, fee=0.0001))
+
+
+def test_many_series_and_plans_in_one_call():
+    returns = np.random.default_rng(1).normal(0.0005, 0.01, (250, 3))
+    plans = np.stack([np.full(250, 10.), np.zeros(250), np.arange(250.)], axis=1)
+    balance = compound_balance(returns, plans, initial=100)
+    for column in range(3):
+        np.testing.assert_allclose(balance[:, column], _loop(returns[:, column], plans[:, column], 100))
+
+    one_series = compound_balance(returns[:, 0], plans, initial=100)
+    np.testing.assert_allclose(one_series[:, 2], _loop(returns[:, 0], plans[:, 2], 100))
+
+
+def test_wiped_out_account_compounds_like_the_loop():
+    np.testing.assert_allclose(compound_balance([0.1, -0.4, 0.1], initial=100, leverage=3), [130, -26, -33.8])
+    returns = np.array([[0.01, 0.01], [-0.5, 0.02], [0.2, np.nan]])
+    plans = np.array([10., 0, 5])
+    balance = compound_balance(returns, plans, initial=100, leverage=2)
+    for column in range(2):
+        np.testing.assert_allclose(balance[:, column], _loop(returns[:, column], plans, 100, leverage=2))
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+from montecarlo.montecarlo import montecarlo, montecarlo_chunked
+
+
+def _trades():
+    return pd.Series(np.random.default_rng(0).normal(0.1, 1, 50))
+
+
+def _reference_stats(df, sims, bust, goal):
+    """The statistics as montecarlo() used to compute them from the full paths"""
+    cumsum = df.cumsum()
+    total = cumsum[-1:].T
+    dd = cumsum.min()[cumsum.min() < 0]
+    nobust = cumsum[cumsum.min()[cumsum.min() > -abs(bust)].index][-1:]
+    return {
+        "min": total.min().values[0],
+        "max": total.max().values[0],
+        "mean": total.mean().values[0],
+        "median": total.median().values[0],
+        "std": total.std().values[0],
+        "maxdd": dd.min(),
+        "bust": len(dd[dd <= -abs(bust)]) / sims,
+        "goal": (nobust >= abs(goal)).sum().sum() / sims,
+    }
+
+
+def test_chunked_stats_match_full_paths():
+    mc = montecarlo_chunked(_trades(), sims=1000, bust=-3, goal=4, chunk_size=64, keep_paths=True, seed=1)
+    expected = _reference_stats(mc.data, 1000, -3, 4)
+    assert mc.stats == pytest.approx(expected)
+    np.testing.assert_array_equal(mc.data['original'], _trades())
+
+
+def test_chunk_size_and_path_retention_do_not_change_results():
+    full = montecarlo_chunked(_trades(), sims=500, bust=-3, goal=4, chunk_size=500, keep_paths=True, seed=2)
+    lean = montecarlo_chunked(_trades(), sims=500, bust=-3, goal=4, chunk_size=500, seed=2)
+    assert lean.stats == full.stats
+    assert not hasattr(lean, 'data')
+
+
+def test_pandas_accessor_keeps_paths():
+    mc = _trades().montecarlo(sims=20)
+    assert mc.data.shape == (50, 20)
+    assert callable(mc.plot)
@@ -0,0 +1,84 @@
+from dataclasses import dataclass
+import hashlib
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+
+def fingerprint(ohlc: pd.DataFrame) -> str:
+    """A content hash of an OHLC frame (values, index and column names) for use in cache keys"""
+    digest = hashlib.sha1(pd.util.hash_pandas_object(ohlc, index=True).to_numpy().tobytes())
+    digest.update(repr(list(ohlc.columns)).encode())
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class SharedOHLCHandle:
+    """Everything a worker process needs to map a `SharedOHLC` frame; cheap to pickle"""
+    name: str
+    shape: Tuple[int, int]
+    columns: Tuple[str, ...]
+    tz: Optional[str]
+    fingerprint: str
+
+    def attach(self) -> pd.DataFrame:
+        """Map the shared frame into this process, once per process"""
+        frame = _attached.get(self.name)
+        if frame is None:
+            memory = shared_memory.SharedMemory(name=self.name)
+            rows, columns = self.shape
+            index = np.ndarray((rows,), dtype='datetime64[ns]', buffer=memory.buf)
+            values = np.ndarray((rows, columns), dtype=np.float64, buffer=memory.buf, offset=index.nbytes)
+            index = pd.DatetimeIndex(index)
+            if self.tz is not None:
+                index = index.tz_localize('UTC').tz_convert(self.tz)
+            frame = pd.DataFrame(values, index=index, columns=list(self.columns), copy=False)
+            # keep the mapping open for as long as the frame may be used
+            _attached[self.name] = frame
+            _memory[self.name] = memory
+        return frame
+
+
+_attached: Dict[str, pd.DataFrame] = {}
+_memory: Dict[str, shared_memory.SharedMemory] = {}
+
+
+class SharedOHLC:
+    """
+    An OHLC frame copied once into shared memory, so that a process pool can
+    map it by name instead of pickling the whole frame into every task.
+    """
+
+    def __init__(self, ohlc: pd.DataFrame):
+        index = ohlc.index
+        tz = str(index.tz) if getattr(index, 'tz', None) is not None else None
+        if tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        index = np.asarray(index, dtype='datetime64[ns]')
+        values = ohlc.to_numpy(dtype=np.float64)
+
+        self._memory = shared_memory.SharedMemory(create=True, size=max(1, index.nbytes + values.nbytes))
+        np.ndarray(index.shape, dtype=index.dtype, buffer=self._memory.buf)[:] = index
+        np.ndarray(values.shape, dtype=values.dtype, buffer=self._memory.buf, offset=index.nbytes)[:] = values
+        self.handle = SharedOHLCHandle(
+            name=self._memory.name,
+            shape=values.shape,
+            columns=tuple(ohlc.columns),
+            tz=tz,
+            fingerprint=fingerprint(ohlc))
+
+    def close(self):
+        """Release the shared block; workers must be done with it"""
+        _attached.pop(self.handle.name, None)
+        attached = _memory.pop(self.handle.name, None)
+        if attached is not None:
+            attached.close()
+        self._memory.close()
+        self._memory.unlink()
+
+    def __enter__(self) -> 'SharedOHLC':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -17,36 +17,44 @@ def import_stock_data(tickers, start = '2010-1-1', end = datetime.today().strfti
             data[t] = wb.DataReader(t, data_source='yahoo', start = start)['Adj Close']
     return(data)
 
+# Beta, CAPM return and Sharpe ratio of every ticker in a price panel against its market column.
+# Log returns and each ticker's covariance with the market are computed once, as column reductions,
+# over the bars where both the ticker and the market have returns.
+def universe_capm(data, market, riskfree = 0.025, riskpremium = 'market'):
+    log_returns = np.log(data / data.shift(1)).iloc[1:]
+    market_returns = log_returns[market].to_numpy()
+    returns = log_returns.drop(columns=market)
+    values = returns.to_numpy()
+
+    valid = ~np.isnan(values) & ~np.isnan(market_returns)[:, np.newaxis]
+    count = valid.sum(axis=0)
+    paired_market = np.where(valid, market_returns[:, np.newaxis], 0)
+    paired_stock = np.where(valid, values, 0)
+    market_dev = np.where(valid, paired_market - paired_market.sum(axis=0) / count, 0)
+    stock_dev = np.where(valid, paired_stock - paired_stock.sum(axis=0) / count, 0)
+    beta = (stock_dev * market_dev).sum(axis=0) / (market_dev ** 2).sum(axis=0)
+
+    if riskpremium == 'market':
+        riskpremium = (np.nanmean(market_returns)*252) - riskfree
+    capm = riskfree + beta*riskpremium
+    volatility = returns.std().to_numpy()*250**0.5
+    return pd.DataFrame({'Beta': beta, 'Return': capm, 'Sharpe': (capm-riskfree)/volatility}, index=returns.columns)
+
 # Compute beta function   
 def compute_beta(data, stock, market):
-    log_returns = np.log(data / data.shift(1))
-    cov = log_returns.cov()*250
-    cov_w_market = cov.loc[stock,market]
-    market_var = log_returns[market].var()*250
-    return cov_w_market/market_var
+    return universe_capm(data[[stock, market]], market).at[stock, 'Beta']
 
 #Compute risk adjusted return function
 def compute_capm(data, stock, market, riskfree = 0.025, riskpremium = 'market'):
-    log_returns = np.log(data / data.shift(1))
-    if riskpremium == 'market':
-        riskpremium = (log_returns[market].mean()*252) - riskfree
-    beta = compute_beta(data, stock, market)
-    return (riskfree + (beta*riskpremium))
+    return universe_capm(data[[stock, market]], market, riskfree, riskpremium).at[stock, 'Return']
    
 #Compute Sharpe Ratio
 def compute_sharpe(data, stock, market, riskfree = 0.025, riskpremium='market'):
-    log_returns = np.log(data / data.shift(1))
-    ret = compute_capm(data, stock, market, riskfree, riskpremium)
-    return ((ret-riskfree)/(log_returns[stock].std()*250**0.5))
+    return universe_capm(data[[stock, market]], market, riskfree, riskpremium).at[stock, 'Sharpe']
     
 # All in one function
 def stock_CAPM(stock_ticker, market_ticker, start_date = '2010-1-1', riskfree = 0.025, riskpremium = 'set'):
     data = import_stock_data([stock_ticker,market_ticker], start = start_date)
-    beta = compute_beta(data, stock_ticker, market_ticker)
-    capm = compute_capm(data, stock_ticker, market_ticker)
-    sharpe = compute_sharpe(data, stock_ticker, market_ticker)
-    #listcapm = [beta,capm,sharpe]
-    capmdata = pd.DataFrame([beta,capm,sharpe], columns=[stock_ticker], index=['Beta','Return','Sharpe'])
-    return capmdata.T
+    return universe_capm(data, market_ticker, riskfree)
     
 # stock_CAPM("AAPL","^GSPC")
\ No newline at end of file
@@ -0,0 +1,141 @@
+from typing import Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+
+TRADING_DAYS = 252
+
+Bounds = Union[Tuple[float, float], Sequence[Tuple[float, float]]]
+
+
+def moments(prices: pd.DataFrame, periods: int = TRADING_DAYS) -> Tuple[pd.Series, pd.DataFrame]:
+    """Annualized mean and covariance of the log returns of every column of `prices`, computed once"""
+    log_returns = np.log(prices / prices.shift(1)).dropna(how='all')
+    return log_returns.mean() * periods, log_returns.cov() * periods
+
+
+def performance(weights, mean, cov, riskfree: float = 0) -> Tuple[float, float, float]:
+    """Return, volatility and Sharpe ratio of the portfolio holding `weights`"""
+    weights = np.asarray(weights, dtype=float)
+    ret = weights @ np.asarray(mean)
+    volatility = np.sqrt(weights @ np.asarray(cov) @ weights)
+    return ret, volatility, (ret - riskfree) / volatility
+
+
+def random_portfolios(mean: pd.Series, cov: pd.DataFrame, n: int = 1000, riskfree: float = 0,
+                      seed=None) -> pd.DataFrame:
+    """
+    A cloud of `n` random long-only portfolios, uniformly distributed over the weight simplex.
+    All of them are evaluated together: returns are one matrix-vector product and variances
+    one matrix product with the covariance.
+    """
+    rng = np.random.default_rng(seed)
+    weights = rng.dirichlet(np.ones(len(mean)), size=n)
+    returns = weights @ mean.to_numpy()
+    volatilities = np.sqrt(np.einsum('ij,ij->i', weights @ cov.to_numpy(), weights))
+    portfolios = pd.DataFrame({'Return': returns, 'Volatility': volatilities,
+                               'Sharpe': (returns - riskfree) / volatilities})
+    return portfolios.join(pd.DataFrame(weights, columns=mean.index))
+
+
+def _limits(bounds: Bounds, assets: int) -> Tuple[np.ndarray, np.ndarray]:
+    if np.ndim(bounds) == 1:
+        bounds = [bounds] * assets
+    lower = np.array([low if low is not None else -np.inf for low, _ in bounds], dtype=float)
+    upper = np.array([high if high is not None else np.inf for _, high in bounds], dtype=float)
+    if lower.sum() > 1 or upper.sum() < 1:
+        raise ValueError("no fully invested portfolio fits within the bounds")
+    return lower, upper
+
+
+def _minimize(objective, start: np.ndarray, bounds, constraints: list) -> np.ndarray:
+    result = minimize(objective, start, jac=True, method='SLSQP', bounds=bounds, constraints=constraints,
+                      options={'maxiter': 1000, 'ftol': 1e-12})
+    if not result.success:
+        raise ValueError(f"optimization failed: {result.message}")
+    return result.x
+
+
+def _solve(objective, mean: pd.Series, bounds: Bounds, constraints: list) -> pd.Series:
+    lower, upper = _limits(bounds, len(mean))
+    start = np.clip(np.full(len(mean), 1 / len(mean)), lower, upper)
+    invested = {'type': 'eq', 'fun': lambda w: w.sum() - 1, 'jac': lambda w: np.ones_like(w)}
+    weights = _minimize(objective, start, list(zip(lower, upper)), [invested, *constraints])
+    return pd.Series(weights, index=mean.index)
+
+
+def _variance(cov: np.ndarray):
+    def objective(weights):
+        gradient = cov @ weights
+        return weights @ gradient, 2 * gradient
+    return objective
+
+
+def min_variance(mean: pd.Series, cov: pd.DataFrame, bounds: Bounds = (0, 1)) -> pd.Series:
+    """Weights of the fully invested portfolio with the lowest variance; `bounds` apply to every asset, or one pair per asset"""
+    return _solve(_variance(cov.to_numpy()), mean, bounds, [])
+
+
+def target_return(mean: pd.Series, cov: pd.DataFrame, target: float, bounds: Bounds = (0, 1)) -> pd.Series:
+    """Weights of the lowest variance portfolio that returns `target`"""
+    mu = mean.to_numpy()
+    constraint = {'type': 'eq', 'fun': lambda w: w @ mu - target, 'jac': lambda w: mu}
+    return _solve(_variance(cov.to_numpy()), mean, bounds, [constraint])
+
+
+def max_sharpe(mean: pd.Series, cov: pd.DataFrame, riskfree: float = 0, bounds: Bounds = (0, 1)) -> pd.Series:
+    """
+    Weights of the tangency portfolio, the one with the highest Sharpe ratio. Rather than the
+    ratio itself, this minimizes the variance of scaled weights y = k * weights with an excess
+    return of 1, which is convex and scales like `min_variance`; the bounds scale with k.
+    """
+    assets = len(mean)
+    lower, upper = _limits(bounds, assets)
+    excess = mean.to_numpy() - riskfree
+    if not (excess > 0).any():
+        raise ValueError("no asset returns more than the risk free rate")
+    sigma = cov.to_numpy()
+
+    def objective(x):
+        gradient = sigma @ x[:-1]
+        return x[:-1] @ gradient, np.append(2 * gradient, 0)
+
+    constraints = [
+        {'type': 'eq', 'fun': lambda x: x[:-1] @ excess - 1, 'jac': lambda x: np.append(excess, 0)},
+        {'type': 'eq', 'fun': lambda x: x[:-1].sum() - x[-1], 'jac': lambda x: np.append(np.ones(assets), -1)},
+    ]
+    # a lower bound of zero is a plain bound on y, the rest scale with k; upper bounds of one or more
+    # are implied for long-only portfolios
+    scaled_lower = np.flatnonzero(np.isfinite(lower) & (lower != 0))
+    scaled_upper = np.flatnonzero(np.isfinite(upper) & ~((upper >= 1) & (lower >= 0).all()))
+    if len(scaled_lower):
+        rows = np.zeros((len(scaled_lower), assets + 1))
+        rows[np.arange(len(scaled_lower)), scaled_lower] = 1
+        rows[:, -1] = -lower[scaled_lower]
+        constraints.append({'type': 'ineq', 'fun': lambda x: rows @ x, 'jac': lambda x: rows})
+    if len(scaled_upper):
+        caps = np.zeros((len(scaled_upper), assets + 1))
+        caps[np.arange(len(scaled_upper)), scaled_upper] = -1
+        caps[:, -1] = upper[scaled_upper]
+        constraints.append({'type': 'ineq', 'fun': lambda x: caps @ x, 'jac': lambda x: caps})
+
+    start = np.clip(np.full(assets, 1 / assets), lower, upper)
+    start = np.append(start, 1) / max(start @ excess, 1e-8)
+    limits = [(0, None) if low == 0 else (None, None) for low in lower] + [(0, None)]
+    x = _minimize(objective, start, limits, constraints)
+    return pd.Series(x[:-1] / x[-1], index=mean.index)
+
+
+def efficient_frontier(mean: pd.Series, cov: pd.DataFrame, points: int = 50, riskfree: float = 0,
+                       bounds: Bounds = (0, 1)) -> pd.DataFrame:
+    """
+    `points` portfolios along the efficient frontier, from the minimum variance portfolio to the
+    highest return the bounds allow, with their return, volatility, Sharpe ratio and weights.
+    """
+    lowest = min_variance(mean, cov, bounds)
+    highest = _solve(lambda w: (-(w @ mean.to_numpy()), -mean.to_numpy()), mean, bounds, [])
+    targets = np.linspace(lowest @ mean, highest @ mean, points)
+    frontier = [lowest] + [target_return(mean, cov, target, bounds) for target in targets[1:]]
+    stats = pd.DataFrame([performance(weights, mean, cov, riskfree) for weights in frontier],
+                         columns=['Return', 'Volatility', 'Sharpe'])
+    return stats.join(pd.DataFrame(frontier).reset_index(drop=True))
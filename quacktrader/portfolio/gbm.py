@@ -0,0 +1,124 @@
+from typing import Iterator, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from quacktrader.portfolio.summary import QUANTILES, Histogram, Summary, summarize
+
+# iterations per independently seeded stream of `terminal_chunks`
+BLOCK = 4096
+
+
+def estimate(prices: pd.Series) -> Tuple[float, float]:
+    """Daily drift (mean less half the variance) and volatility of the log returns of `prices`"""
+    log_returns = np.log(1 + prices.pct_change()).dropna()
+    return log_returns.mean() - 0.5 * log_returns.var(), log_returns.std()
+
+
+def gbm_paths(last_price: float, drift: float, volatility: float, days: int, iterations: int,
+              rng: np.random.Generator = None, dtype=np.float32) -> np.ndarray:
+    """
+    A `days × iterations` matrix of geometric brownian motion price paths starting at
+    `last_price`, built as the running product of daily returns via a cumulative sum of
+    their logs. Row 0 is the starting price, like `simulate_mc`'s `price_list`.
+    """
+    rng = rng or np.random.default_rng()
+    log_returns = rng.standard_normal((days - 1, iterations), dtype=dtype)
+    log_returns *= dtype(volatility)
+    log_returns += dtype(drift)
+    paths = np.empty((days, iterations), dtype=dtype)
+    paths[0] = last_price
+    np.cumsum(log_returns, axis=0, out=paths[1:])
+    np.exp(paths[1:], out=paths[1:])
+    paths[1:] *= dtype(last_price)
+    return paths
+
+
+def estimate_panel(prices: pd.DataFrame) -> Tuple[pd.Series, pd.DataFrame]:
+    """
+    Daily drift of each column of `prices` and the covariance of their log returns, estimated
+    once over the dates where every column has a price.
+    """
+    log_returns = np.log(prices.dropna()).diff().dropna()
+    covariance = log_returns.cov()
+    return log_returns.mean() - 0.5 * np.diag(covariance), covariance
+
+
+def correlated_paths(last_prices, drift, covariance, days: int, iterations: int,
+                     rng: np.random.Generator = None, dtype=np.float32) -> np.ndarray:
+    """
+    A `days × iterations × assets` tensor of joint GBM price paths. Independent normal shocks
+    are correlated through the Cholesky factor of the daily log-return `covariance`, so every
+    asset in an iteration sees the same market. Row 0 holds `last_prices`.
+    """
+    rng = rng or np.random.default_rng()
+    last_prices = np.asarray(last_prices, dtype=dtype)
+    factor = np.linalg.cholesky(np.asarray(covariance, dtype=float)).astype(dtype)
+    shocks = rng.standard_normal((days - 1, iterations, len(last_prices)), dtype=dtype)
+    paths = np.empty((days, iterations, len(last_prices)), dtype=dtype)
+    paths[0] = last_prices
+    np.matmul(shocks, factor.T, out=paths[1:])
+    paths[1:] += np.asarray(drift, dtype=dtype)
+    np.cumsum(paths[1:], axis=0, out=paths[1:])
+    np.exp(paths[1:], out=paths[1:])
+    paths[1:] *= last_prices
+    return paths
+
+
+def portfolio_paths(paths: np.ndarray, weights, initial: float = 1) -> np.ndarray:
+    """
+    Value of a buy-and-hold portfolio over joint `paths`, which puts the fraction `weights`
+    of `initial` into each asset at the prices in row 0.
+    """
+    shares = initial * np.asarray(weights, dtype=float) / paths[0, 0]
+    return paths @ shares.astype(paths.dtype)
+
+
+def terminal_chunks(last_price: float, drift: float, volatility: float, days: int, iterations: int,
+                    seed=None, dtype=np.float32, max_bytes: int = 64 * 2**20) -> Iterator[np.ndarray]:
+    """
+    Terminal prices of `iterations` GBM paths over `days` (counting the starting day, as
+    `simulate_mc` does), in chunks. Each chunk's paths fit in `max_bytes` and are reduced to
+    their terminal prices right away, so no more than one chunk of paths is ever held.
+
+    The paths are cut into fixed blocks of `BLOCK` iterations, and each block draws from its own
+    stream spawned from `SeedSequence(seed)`. Chunks are whole blocks (at least one, whatever
+    `max_bytes` says), so a seeded run gives the same prices however it is chunked.
+    """
+    dtype = np.dtype(dtype).type
+    steps = max(days - 1, 1)
+    blocks = np.random.SeedSequence(seed).spawn(-(-iterations // BLOCK))
+    per_chunk = max(1, max_bytes // (steps * np.dtype(dtype).itemsize * BLOCK))
+    for first in range(0, len(blocks), per_chunk):
+        start = first * BLOCK
+        # a row per path, so each block's draws land in one contiguous slice
+        log_returns = np.empty((min(per_chunk * BLOCK, iterations - start), days - 1), dtype=dtype)
+        for offset, block in zip(range(0, len(log_returns), BLOCK), blocks[first:first + per_chunk]):
+            np.random.default_rng(block).standard_normal(dtype=dtype, out=log_returns[offset:offset + BLOCK])
+        log_returns *= dtype(volatility)
+        log_returns += dtype(drift)
+        yield last_price * np.exp(log_returns.sum(axis=1, dtype=np.float64))
+
+
+def terminal_prices(last_price: float, drift: float, volatility: float, days: int, iterations: int,
+                    seed=None, dtype=np.float32, max_bytes: int = 64 * 2**20) -> np.ndarray:
+    """All the terminal prices of `terminal_chunks` in one array"""
+    chunks = terminal_chunks(last_price, drift, volatility, days, iterations, seed, dtype, max_bytes)
+    return np.concatenate(list(chunks)) if iterations else np.empty(0)
+
+
+def simulate_terminal(last_price: float, drift: float, volatility: float, days: int, iterations: int,
+                      quantiles: Sequence[float] = QUANTILES, thresholds: Sequence[float] = (), seed=None,
+                      dtype=np.float32, max_bytes: int = 64 * 2**20, sketch: Histogram = None) -> Summary:
+    """
+    Simulate `iterations` GBM paths over `days` and summarize the terminal prices: their mean,
+    `quantiles`, and the probability of finishing at or above each of `thresholds`.
+
+    Only one float per iteration is kept however many days are simulated. Given a `sketch`,
+    each chunk's terminal prices go into it instead and memory stays fixed.
+    """
+    if sketch is None:
+        terminal = terminal_prices(last_price, drift, volatility, days, iterations, seed, dtype, max_bytes)
+        return summarize(terminal, thresholds, quantiles)
+    for prices in terminal_chunks(last_price, drift, volatility, days, iterations, seed, dtype, max_bytes):
+        sketch.update(prices)
+    return sketch.summary(thresholds, quantiles)
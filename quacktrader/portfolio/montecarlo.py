@@ -6,6 +6,9 @@ from scipy.stats import norm, gmean, cauchy
 import seaborn as sns
 from datetime import datetime
 
+from quacktrader.portfolio.gbm import correlated_paths, estimate, estimate_panel, portfolio_paths, simulate_terminal
+from quacktrader.portfolio.summary import probabilities, summarize
+
 
 def import_stock_data(tickers, start = '2010-1-1', end = datetime.today().strftime('%Y-%m-%d')):
     data = pd.DataFrame()
@@ -54,12 +57,10 @@ def beta_sharpe(data, mark_ticker = "^GSPC", start='2010-1-1', riskfree = 0.025)
     beta = beta.merge(stdev_ret, left_index=True, right_index=True)
     
     # CAPM
-    for i, row in beta.iterrows():
-        beta.at[i,'CAPM'] = riskfree + (row[mark_ticker] * (mark_ret-riskfree))
+    beta['CAPM'] = riskfree + (beta[mark_ticker] * (np.squeeze(mark_ret)-riskfree))
     # Sharpe
-    for i, row in beta.iterrows():
-        beta.at[i,'Sharpe'] = ((row['CAPM']-riskfree)/(row['STD']))
-    beta.rename(columns={"^GSPC":"Beta"}, inplace=True)
+    beta['Sharpe'] = (beta['CAPM']-riskfree)/beta['STD']
+    beta.rename(columns={mark_ticker:"Beta"}, inplace=True)
     
     return beta
 
@@ -102,54 +103,31 @@ def probs_find(predicted, higherthan, ticker = None, on = 'value'):
     3. on: 'return' or 'value', the return of the stock or the final value of stock for every simulation over the time specified
     4. ticker: specific ticker to compute probability for
     """
-    if ticker == None:
-        if on == 'return':
-            predicted0 = predicted.iloc[0,0]
-            predicted = predicted.iloc[-1]
-            predList = list(predicted)
-            over = [(i*100)/predicted0 for i in predList if ((i-predicted0)*100)/predicted0 >= higherthan]
-            less = [(i*100)/predicted0 for i in predList if ((i-predicted0)*100)/predicted0 < higherthan]
-        elif on == 'value':
-            predicted = predicted.iloc[-1]
-            predList = list(predicted)
-            over = [i for i in predList if i >= higherthan]
-            less = [i for i in predList if i < higherthan]
-        else:
-            print("'on' must be either value or return")
-    else:
-        if on == 'return':
-            predicted = predicted[predicted['ticker'] == ticker]
-            predicted0 = predicted.iloc[0,0]
-            predicted = predicted.iloc[-1]
-            predList = list(predicted)
-            over = [(i*100)/predicted0 for i in predList if ((i-predicted0)*100)/predicted0 >= higherthan]
-            less = [(i*100)/predicted0 for i in predList if ((i-predicted0)*100)/predicted0 < higherthan]
-        elif on == 'value':
-            predicted = predicted.iloc[-1]
-            predList = list(predicted)
-            over = [i for i in predList if i >= higherthan]
-            less = [i for i in predList if i < higherthan]
-        else:
-            print("'on' must be either value or return")        
-    return (len(over)/(len(over)+len(less)))
+    if ticker is not None:
+        predicted = predicted[predicted['ticker'] == ticker].drop(columns='ticker')
+    final = predicted.iloc[-1].to_numpy(dtype=float)
+    if on == 'return':
+        predicted0 = predicted.iloc[0,0]
+        final = (final-predicted0)*100/predicted0
+    elif on != 'value':
+        raise ValueError("'on' must be either value or return")
+    return probabilities(final, [higherthan])[0]
 
 def simulate_mc(data, days, iterations, return_type='log', plot=True):
     # Generate daily returns
     returns = daily_returns(data, days, iterations, return_type)
-    # Create empty matrix
-    price_list = np.zeros_like(returns)
-    # Put the last actual price in the first row of matrix. 
-    price_list[0] = data.iloc[-1]
-    # Calculate the price of each day
-    for t in range(1,days):
-        price_list[t] = price_list[t-1]*returns[t]
+    # Put the last actual price in the first row of matrix, then compound the daily returns
+    returns[0] = data.iloc[-1]
+    price_list = np.cumprod(returns, axis=0)
     
+    final = price_list[-1]
+    summary = summarize(final, thresholds=[price_list[0,0]])
+
     # Plot Option
     if plot == True:
-        x = pd.DataFrame(price_list).iloc[-1]
         fig, ax = plt.subplots(1,2, figsize=(14,4))
-        sns.distplot(x, ax=ax[0])
-        sns.distplot(x, hist_kws={'cumulative':True},kde_kws={'cumulative':True},ax=ax[1])
+        sns.distplot(final, ax=ax[0])
+        sns.distplot(final, hist_kws={'cumulative':True},kde_kws={'cumulative':True},ax=ax[1])
         plt.xlabel("Stock Price")
         plt.show()
     
@@ -161,9 +139,10 @@ def simulate_mc(data, days, iterations, return_type='log', plot=True):
     except:
         print(data.name)
     print(f"Days: {days-1}")
-    print(f"Expected Value: ${round(pd.DataFrame(price_list).iloc[-1].mean(),2)}")
-    print(f"Return: {round(100*(pd.DataFrame(price_list).iloc[-1].mean()-price_list[0,1])/pd.DataFrame(price_list).iloc[-1].mean(),2)}%")
-    print(f"Probability of Breakeven: {probs_find(pd.DataFrame(price_list),0, on='return')}")
+    print(f"Expected Value: ${round(summary.mean,2)}")
+    print(f"Return: {round(100*(summary.mean-price_list[0,1])/summary.mean,2)}%")
+    print(f"Probability of Breakeven: {summary.probabilities.iloc[0]}")
+    print(f"Expected Shortfall (5%): ${round(summary.expected_shortfall,2)}")
    
           
     return pd.DataFrame(price_list)
@@ -187,8 +166,40 @@ def monte_carlo(tickers, days_forecast, iterations, start_date = '2000-1-1', ret
         simulatedDF.append(y)
     simulatedDF = pd.concat(simulatedDF)
     return simulatedDF
+
+def monte_carlo_joint(tickers, days_forecast, iterations, start_date = '2000-1-1', weights = None):
+    """
+    Simulate `tickers` together with correlated shocks, rather than one at a time like `monte_carlo`.
+    Drift and covariance are estimated once from the aligned log returns.
+
+    Output:
+    1. (days_forecast+1, iterations, tickers) array of simulated prices
+    2. (days_forecast+1, iterations) array of portfolio value, starting at 1, if `weights` are given
+    """
+    data = import_stock_data(tickers, start=start_date).dropna()
+    drift, covariance = estimate_panel(data)
+    paths = correlated_paths(data.iloc[-1], drift, covariance, days_forecast + 1, iterations)
+    for t, ticker in enumerate(data.columns):
+        print(f"{ticker} Expected Value: ${round(paths[-1, :, t].mean(), 2)}")
+    if weights is None:
+        return paths, None
+    portfolio = portfolio_paths(paths, weights)
+    print(f"Portfolio Return: {round(100*(portfolio[-1].mean()-1),2)}%")
+    print(f"Portfolio Probability of Breakeven: {(portfolio[-1] >= 1).mean()}")
+    return paths, portfolio
     
-start = "2015-1-1"
-days_to_forecast= 252
-simulation_trials= 10000
-ret_sim_df = monte_carlo(['GOOG','AAPL'], days_to_forecast, simulation_trials,  start_date=start, plotten=False)
\ No newline at end of file
+if __name__ == "__main__":
+    start = "2015-1-1"
+    days_to_forecast= 252
+    simulation_trials= 10000
+    ret_sim_df = monte_carlo(['GOOG','AAPL'], days_to_forecast, simulation_trials,  start_date=start, plotten=False)
+
+    # the same forecast's terminal prices from the chunked engine, which never holds whole paths in memory
+    prices = import_stock_data('GOOG', start=start)['GOOG']
+    drift, volatility = estimate(prices)
+    summary = simulate_terminal(prices.iloc[-1], drift, volatility, days_to_forecast + 1, 1_000_000,
+                                thresholds=[prices.iloc[-1]])
+    print(summary.quantiles)
+    print(f"Probability of Breakeven: {summary.probabilities.iloc[0]}")
+
+    paths, portfolio = monte_carlo_joint(['GOOG','AAPL'], days_to_forecast, simulation_trials, start_date=start, weights=[.5, .5])
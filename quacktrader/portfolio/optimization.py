@@ -3,44 +3,34 @@ import pandas as pd
 from pandas_datareader import data as wb
 import matplotlib.pyplot as plt
 
-assets = ['MSFT','UNH']
+from quacktrader.portfolio.frontier import efficient_frontier, max_sharpe, moments, performance, random_portfolios
 
-pf_data = pd.DataFrame()
-for t in assets:
-    pf_data[t] = wb.DataReader(t, data_source='yahoo', start='2015-1-1')['Adj Close']
-    
-(pf_data / pf_data.iloc[0]*100).plot(figsize=(15,6))
+if __name__ == "__main__":
+    assets = ['MSFT','UNH']
 
-log_returns = np.log(pf_data / pf_data.shift(1))
-log_returns.mean()*250
+    pf_data = pd.DataFrame()
+    for t in assets:
+        pf_data[t] = wb.DataReader(t, data_source='yahoo', start='2015-1-1')['Adj Close']
 
-num_assets = len(assets)
+    (pf_data / pf_data.iloc[0]*100).plot(figsize=(15,6))
 
-weights = np.random.random(num_assets)
-weights /= np.sum(weights)
+    # annualized mean and covariance of the log returns, computed once for every portfolio below
+    mean, cov = moments(pf_data)
 
-pfolio_returns = []
-pfolio_volatilities = []
+    portfolios = random_portfolios(mean, cov, n=1000)
+    frontier = efficient_frontier(mean, cov)
 
-for x in range(1000):
-    weights = np.random.random(num_assets)
-    weights /= np.sum(weights)
-    
-    pfolio_returns.append(np.sum(weights*log_returns.mean())*252)
-    pfolio_volatilities.append(np.sqrt(np.dot(weights.T, np.dot(log_returns.cov()*250, weights))))
-    
-pfolio_returns = np.array(pfolio_returns)
-pfolio_volatilities = np.array(pfolio_volatilities)
+    ax = portfolios.plot(x='Volatility',y='Return', kind='scatter', figsize=(10,6))
+    frontier.plot(x='Volatility', y='Return', color='r', ax=ax, label='Efficient Frontier')
+    #plt.axis([0,])
+    plt.xlabel('Expected Volatility')
+    plt.ylabel('Expected Return')
 
-portfolios = pd.DataFrame({'Return': pfolio_returns,'Volatility': pfolio_volatilities})
+    weights = max_sharpe(mean, cov)
+    ret, volatility, sharpe = performance(weights, mean, cov)
+    print(f"Max Sharpe Weights: {weights.round(4).to_dict()}")
+    print(f"Expected Portfolio Return: {round(ret*100,2)}%")
+    print(f"Expected Portfolio Variance: {round(100*volatility**2,2)}%")
+    print(f"Expected Portfolio Volatility: {round(100*volatility,2)}%")
 
-portfolios.plot(x='Volatility',y='Return', kind='scatter', figsize=(10,6))
-#plt.axis([0,])
-plt.xlabel('Expected Volatility')
-plt.ylabel('Expected Return')
-
-print(f"Expected Portfolio Return: {round(np.sum(weights * log_returns.mean())*252*100,2)}%")
-print(f"Expected Portfolio Variance: {round(100*np.dot(weights.T, np.dot(log_returns.cov() *252, weights)),2)}%")
-print(f"Expected Portfolio Volatility: {round(100*np.sqrt(np.dot(weights.T, np.dot(log_returns.cov()*252, weights))),2)}%")
-
-plt.show()
\ No newline at end of file
+    plt.show()
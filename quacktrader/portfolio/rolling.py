@@ -0,0 +1,234 @@
+import abc
+from typing import Sequence
+import numpy as np
+import pandas as pd
+
+STATISTICS = ('mean', 'variance', 'covariance', 'beta')
+
+
+def _as_array(returns, tickers: pd.Index) -> np.ndarray:
+    if isinstance(returns, (pd.Series, dict)):
+        return pd.Series(returns, dtype=float).reindex(tickers).to_numpy()
+    return np.asarray(returns, dtype=float)
+
+
+class _Estimator(metaclass=abc.ABCMeta):
+    """Statistics shared by the estimators, which keep the benchmark's moments per ticker"""
+
+    tickers: pd.Index
+    covariance: np.ndarray
+    benchmark_variance: np.ndarray
+
+    @property
+    def beta(self) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.covariance / self.benchmark_variance
+
+    def snapshot(self) -> pd.DataFrame:
+        """The current statistics, one row per ticker"""
+        return pd.DataFrame({name: getattr(self, name) for name in STATISTICS}, index=self.tickers)
+
+    @abc.abstractmethod
+    def update(self, returns, benchmark: float) -> np.ndarray:
+        """Add the newest bar of every ticker's returns and the benchmark's return"""
+        raise NotImplementedError
+
+    def backfill(self, returns: pd.DataFrame, benchmark: pd.Series) -> pd.DataFrame:
+        """
+        Feed a history of `returns` (one column per ticker) and the `benchmark`'s returns bar by
+        bar and return the statistics after every bar, with (statistic, ticker) columns.
+        """
+        history = []
+        for row, value in zip(returns.reindex(columns=self.tickers).to_numpy(dtype=float), benchmark.to_numpy(dtype=float)):
+            self.update(row, value)
+            history.append(np.concatenate([getattr(self, name) for name in STATISTICS]))
+        columns = pd.MultiIndex.from_product([STATISTICS, self.tickers])
+        return pd.DataFrame(np.array(history).reshape(len(returns), -1), index=returns.index, columns=columns)
+
+
+class RollingBeta(_Estimator):
+    """
+    Mean, variance and covariance with a benchmark over the last `window` returns of many tickers,
+    with Welford-style updates: adding the newest bar and dropping the oldest is O(1) per ticker,
+    so every bar costs a handful of array operations however long the window is. NaN returns are
+    left out of a ticker's window, and statistics are NaN until it holds `min_periods` pairs.
+    """
+
+    def __init__(self, tickers: Sequence[str], window: int, min_periods: int = None):
+        if window < 2:
+            raise ValueError("window must be at least 2")
+        self.tickers = pd.Index(tickers)
+        self.window = window
+        self.min_periods = max(2, min_periods or window)
+        self._clear()
+
+    def _clear(self):
+        k = len(self.tickers)
+        self._x = np.zeros((self.window, k))
+        self._y = np.zeros(self.window)
+        self._valid = np.zeros((self.window, k), dtype=bool)
+        self._position = 0
+        self._bars = 0
+        self.count = np.zeros(k, dtype=np.int64)
+        self._mean_x = np.zeros(k)
+        self._mean_y = np.zeros(k)
+        self._m2x = np.zeros(k)
+        self._m2y = np.zeros(k)
+        self._cxy = np.zeros(k)
+
+    def _add(self, x: np.ndarray, y: float, valid: np.ndarray):
+        self.count += valid
+        n = np.maximum(self.count, 1)
+        dx = np.where(valid, x - self._mean_x, 0)
+        dy = np.where(valid, y - self._mean_y, 0)
+        self._mean_x += dx / n
+        self._mean_y += dy / n
+        self._m2x += np.where(valid, dx * (x - self._mean_x), 0)
+        self._m2y += np.where(valid, dy * (y - self._mean_y), 0)
+        self._cxy += np.where(valid, dx * (y - self._mean_y), 0)
+
+    def _remove(self, x: np.ndarray, y: float, valid: np.ndarray):
+        self.count -= valid
+        n = np.maximum(self.count, 1)
+        mean_x = np.where(valid, self._mean_x - (x - self._mean_x) / n, self._mean_x)
+        mean_y = np.where(valid, self._mean_y - (y - self._mean_y) / n, self._mean_y)
+        self._m2x -= np.where(valid, (x - mean_x) * (x - self._mean_x), 0)
+        self._m2y -= np.where(valid, (y - mean_y) * (y - self._mean_y), 0)
+        self._cxy -= np.where(valid, (x - mean_x) * (y - self._mean_y), 0)
+        empty = self.count == 0
+        self._mean_x = np.where(empty, 0, mean_x)
+        self._mean_y = np.where(empty, 0, mean_y)
+
+    def _resync(self):
+        """Recompute the moments from the window so floating point error can't accumulate"""
+        valid = self._valid
+        n = np.maximum(self.count, 1)
+        x = np.where(valid, self._x, 0)
+        y = np.where(valid, self._y[:, np.newaxis], 0)
+        self._mean_x = x.sum(axis=0) / n
+        self._mean_y = y.sum(axis=0) / n
+        dx = np.where(valid, self._x - self._mean_x, 0)
+        dy = np.where(valid, self._y[:, np.newaxis] - self._mean_y, 0)
+        self._m2x = (dx * dx).sum(axis=0)
+        self._m2y = (dy * dy).sum(axis=0)
+        self._cxy = (dx * dy).sum(axis=0)
+
+    def update(self, returns, benchmark: float) -> np.ndarray:
+        """Push one bar's returns, aligned with `tickers`, and the benchmark's return; returns the betas"""
+        x = _as_array(returns, self.tickers)
+        y = float(benchmark)
+        valid = ~np.isnan(x) & (y == y)
+        if self._bars == self.window:
+            self._remove(self._x[self._position], self._y[self._position], self._valid[self._position])
+        else:
+            self._bars += 1
+        self._x[self._position] = x
+        self._y[self._position] = y
+        self._valid[self._position] = valid
+        self._add(x, y, valid)
+        self._position = (self._position + 1) % self.window
+        if self._position == 0:
+            self._resync()
+        return self.beta
+
+    def _moment(self, total: np.ndarray) -> np.ndarray:
+        return np.where(self.count >= self.min_periods, total / np.maximum(self.count - 1, 1), np.nan)
+
+    @property
+    def mean(self) -> np.ndarray:
+        return np.where(self.count >= self.min_periods, self._mean_x, np.nan)
+
+    @property
+    def variance(self) -> np.ndarray:
+        return self._moment(self._m2x)
+
+    @property
+    def benchmark_variance(self) -> np.ndarray:
+        return self._moment(self._m2y)
+
+    @property
+    def covariance(self) -> np.ndarray:
+        return self._moment(self._cxy)
+
+    def backfill(self, returns: pd.DataFrame, benchmark: pd.Series) -> pd.DataFrame:
+        """
+        Rolling statistics over a whole history at once, from windowed differences of cumulative
+        sums rather than bar by bar. Afterwards the estimator holds the last window, ready for
+        `update` with the next bar.
+        """
+        x = returns.reindex(columns=self.tickers).to_numpy(dtype=float)
+        y = benchmark.to_numpy(dtype=float)[:, np.newaxis]
+        valid = ~np.isnan(x) & ~np.isnan(y)
+        # center on the full-sample means so the sums of squares don't lose precision
+        x = np.where(valid, x - np.nanmean(x, axis=0), 0)
+        y = np.where(valid, y - np.nanmean(y), 0)
+
+        def windowed(values):
+            total = np.concatenate([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+            return total[1:] - total[np.maximum(np.arange(1, len(values) + 1) - self.window, 0)]
+
+        n = windowed(valid.astype(float))
+        sx, sy, sxx, syy, sxy = (windowed(values) for values in (x, y, x * x, y * y, x * y))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            enough = n >= self.min_periods
+            statistics = {
+                'mean': np.where(enough, sx / n + np.nanmean(returns.reindex(columns=self.tickers), axis=0), np.nan),
+                'variance': np.where(enough, (sxx - sx * sx / n) / (n - 1), np.nan),
+                'covariance': np.where(enough, (sxy - sx * sy / n) / (n - 1), np.nan),
+            }
+            statistics['beta'] = statistics['covariance'] / np.where(enough, (syy - sy * sy / n) / (n - 1), np.nan)
+
+        self._clear()
+        for row, value in zip(returns.reindex(columns=self.tickers).to_numpy(dtype=float)[-self.window:],
+                              benchmark.to_numpy(dtype=float)[-self.window:]):
+            self.update(row, value)
+
+        columns = pd.MultiIndex.from_product([STATISTICS, self.tickers])
+        return pd.DataFrame(np.hstack([statistics[name] for name in STATISTICS]), index=returns.index, columns=columns)
+
+
+class EwmaBeta(_Estimator):
+    """
+    Exponentially weighted mean, variance and covariance with a benchmark for many tickers, each
+    bar folded in with decay `alpha` (or the alpha of `halflife` bars). A ticker's first valid
+    bar seeds its means; NaN returns leave its statistics unchanged.
+    """
+
+    def __init__(self, tickers: Sequence[str], alpha: float = None, halflife: float = None):
+        if (alpha is None) == (halflife is None):
+            raise ValueError("pass exactly one of alpha and halflife")
+        self.tickers = pd.Index(tickers)
+        self.alpha = alpha if alpha is not None else 1 - 0.5 ** (1 / halflife)
+        if not 0 < self.alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        k = len(self.tickers)
+        self.count = np.zeros(k, dtype=np.int64)
+        self.mean = np.full(k, np.nan)
+        self._mean_y = np.full(k, np.nan)
+        self.variance = np.full(k, np.nan)
+        self.benchmark_variance = np.full(k, np.nan)
+        self.covariance = np.full(k, np.nan)
+
+    def update(self, returns, benchmark: float) -> np.ndarray:
+        """Fold one bar's returns, aligned with `tickers`, and the benchmark's return in; returns the betas"""
+        x = _as_array(returns, self.tickers)
+        y = float(benchmark)
+        valid = ~np.isnan(x) & (y == y)
+        first = valid & (self.count == 0)
+        later = valid & ~first
+        self.count += valid
+
+        self.mean = np.where(first, x, self.mean)
+        self._mean_y = np.where(first, y, self._mean_y)
+        for name in ('variance', 'benchmark_variance', 'covariance'):
+            setattr(self, name, np.where(first, 0, getattr(self, name)))
+
+        a = self.alpha
+        dx = x - self.mean
+        dy = y - self._mean_y
+        self.mean = np.where(later, self.mean + a * dx, self.mean)
+        self._mean_y = np.where(later, self._mean_y + a * dy, self._mean_y)
+        self.variance = np.where(later, (1 - a) * (self.variance + a * dx * dx), self.variance)
+        self.benchmark_variance = np.where(later, (1 - a) * (self.benchmark_variance + a * dy * dy), self.benchmark_variance)
+        self.covariance = np.where(later, (1 - a) * (self.covariance + a * dx * dy), self.covariance)
+        return self.beta
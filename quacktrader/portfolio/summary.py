@@ -0,0 +1,155 @@
+from dataclasses import dataclass
+from typing import Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+QUANTILES = (.05, .25, .5, .75, .95)
+
+
+@dataclass
+class Summary:
+    count: int
+    mean: float
+    quantiles: pd.Series
+    probabilities: pd.Series
+    expected_shortfall: float
+    histogram: Tuple[np.ndarray, np.ndarray]
+
+
+def _quantile_series(values, quantiles: Sequence[float]) -> pd.Series:
+    return pd.Series(values, index=pd.Index(quantiles, name='quantile'), dtype=float)
+
+
+def _probability_series(values, thresholds) -> pd.Series:
+    return pd.Series(values, index=pd.Index(thresholds, name='threshold'), dtype=float)
+
+
+def _above(ordered: np.ndarray, thresholds) -> np.ndarray:
+    return (len(ordered) - np.searchsorted(ordered, np.asarray(thresholds, dtype=float), side='left')) / len(ordered)
+
+
+def probabilities(values, thresholds) -> np.ndarray:
+    """Probability of a value at or above each of `thresholds`, one sort and a binary search per threshold"""
+    return _above(np.sort(np.asarray(values, dtype=float).ravel()), thresholds)
+
+
+def summarize(values, thresholds: Sequence[float] = (), quantiles: Sequence[float] = QUANTILES,
+              alpha: float = .05, bins: int = 50) -> Summary:
+    """
+    Summary of simulation outcomes (terminal prices, returns, P&L): their mean, `quantiles`, the
+    probability of finishing at or above each of `thresholds`, the expected shortfall (mean of the
+    worst `alpha` of outcomes) and a histogram with `bins` bins.
+    """
+    values = np.sort(np.asarray(values, dtype=float).ravel())
+    thresholds = np.asarray(thresholds, dtype=float)
+    tail = values[:max(1, int(np.ceil(alpha * len(values))))]
+    return Summary(
+        count=len(values),
+        mean=float(values.mean()),
+        quantiles=_quantile_series(np.quantile(values, quantiles), quantiles),
+        probabilities=_probability_series(_above(values, thresholds), thresholds),
+        expected_shortfall=float(tail.mean()),
+        histogram=np.histogram(values, bins=bins))
+
+
+class Histogram:
+    """
+    Streaming sketch of a distribution as counts in fixed, evenly spaced bins over [low, high),
+    plus the counts below and above that range. Sketches with the same bins merge by adding
+    their counts, so chunks or worker processes can each fill one and combine them afterwards
+    without keeping the values. Quantiles, probabilities and expected shortfall are interpolated
+    within bins, so they are accurate to about one bin width. NaN and infinite values are not
+    binned, only counted in `dropped`.
+
+        >>> sketch = Histogram(0, 200, bins=2000)
+        >>> for chunk in chunks:
+        ...     sketch.update(chunk)
+        >>> sketch.summary(thresholds=[100]).probabilities
+    """
+
+    def __init__(self, low: float, high: float, bins: int = 1000):
+        if not high > low:
+            raise ValueError("high must be greater than low")
+        self.low = float(low)
+        self.high = float(high)
+        self.bins = bins
+        # counts[0] is below low, counts[-1] at or above high
+        self.counts = np.zeros(bins + 2, dtype=np.int64)
+        self.total = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.dropped = 0
+
+    @property
+    def edges(self) -> np.ndarray:
+        return np.linspace(self.low, self.high, self.bins + 1)
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else np.nan
+
+    def update(self, values) -> 'Histogram':
+        values = np.asarray(values, dtype=float).ravel()
+        finite = np.isfinite(values)
+        if not finite.all():
+            self.dropped += int(len(values) - finite.sum())
+            values = values[finite]
+        if not len(values):
+            return self
+        position = np.floor((values - self.low) * (self.bins / (self.high - self.low)))
+        self.counts += np.bincount(np.clip(position, -1, self.bins).astype(np.int64) + 1, minlength=self.bins + 2)
+        self.total += values.sum()
+        self.minimum = min(self.minimum, values.min())
+        self.maximum = max(self.maximum, values.max())
+        return self
+
+    def merge(self, other: 'Histogram') -> 'Histogram':
+        if (self.low, self.high, self.bins) != (other.low, other.high, other.bins):
+            raise ValueError("only histograms with the same bins can be merged")
+        self.counts += other.counts
+        self.dropped += other.dropped
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    def __add__(self, other: 'Histogram') -> 'Histogram':
+        merged = Histogram(self.low, self.high, self.bins)
+        return merged.merge(self).merge(other)
+
+    def _bounds(self) -> np.ndarray:
+        """Edges of every bin including the outer two, which reach to the smallest and largest value"""
+        return np.concatenate([[min(self.minimum, self.low)], self.edges, [max(self.maximum, self.high)]])
+
+    def _cdf(self) -> np.ndarray:
+        return np.concatenate([[0], np.cumsum(self.counts)]) / self.count
+
+    def quantiles(self, quantiles: Sequence[float]) -> np.ndarray:
+        return np.interp(quantiles, self._cdf(), self._bounds())
+
+    def probabilities(self, thresholds) -> np.ndarray:
+        return 1 - np.interp(thresholds, self._bounds(), self._cdf())
+
+    def expected_shortfall(self, alpha: float = .05) -> float:
+        bounds = self._bounds()
+        cutoff = self.quantiles([alpha])[0]
+        lower, upper = bounds[:-1], np.minimum(bounds[1:], cutoff)
+        width = bounds[1:] - lower
+        fraction = np.clip(np.divide(upper - lower, width, out=(cutoff >= lower).astype(float), where=width > 0), 0, 1)
+        mass = self.counts * fraction
+        return float((mass * (lower + np.maximum(upper, lower)) / 2).sum() / mass.sum())
+
+    def summary(self, thresholds: Sequence[float] = (), quantiles: Sequence[float] = QUANTILES,
+                alpha: float = .05) -> Summary:
+        thresholds = np.asarray(thresholds, dtype=float)
+        return Summary(
+            count=self.count,
+            mean=self.mean,
+            quantiles=_quantile_series(self.quantiles(quantiles), quantiles),
+            probabilities=_probability_series(self.probabilities(thresholds), thresholds),
+            expected_shortfall=self.expected_shortfall(alpha),
+            histogram=(self.counts[1:-1].copy(), self.edges))
@@ -0,0 +1,209 @@
+import datetime
+import json
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+import httpx
+import numpy as np
+from scipy.stats import norm
+from tda.client import Client
+
+OPTION_CHAINS = 'option_chains'
+ACCOUNTS = 'accounts.json'
+BASE_URL = 'https://api.tdameritrade.com'
+
+
+def _strategy(strategy) -> str:
+    return getattr(strategy, 'value', strategy) or Client.Options.Strategy.SINGLE.value
+
+
+def _chain_path(directory: str, symbol: str, strategy: str) -> str:
+    return os.path.join(directory, OPTION_CHAINS, f'{symbol}.{strategy}.json')
+
+
+class ReplayClient:
+    """
+    Stands in for `tda.client.Client` in the scanners, answering `get_option_chain` and
+    `get_accounts` with recorded response bodies, so scans run offline and repeatably.
+
+    Every call waits `latency` seconds plus up to `jitter` more, drawn uniformly, to stand in for
+    the round trip; the body is then parsed by the caller like a live response. Option chains are
+    recorded per symbol and strategy, and the other request parameters are ignored. Calls without
+    a recording get a 404.
+    """
+
+    def __init__(self, directory: str = None, latency: float = 0, jitter: float = 0, seed=None,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.latency = latency
+        self.jitter = jitter
+        self.sleep = sleep
+        self.calls: List[Tuple[str, str]] = []
+        self._rng = np.random.default_rng(seed)
+        self._option_chains: Dict[Tuple[str, str], bytes] = {}
+        self._accounts: bytes = None
+        if directory is not None:
+            self.load(directory)
+
+    def add_option_chain(self, chain, strategy=None):
+        """Record a chain, as the decoded response or its raw body"""
+        body = chain if isinstance(chain, bytes) else json.dumps(chain).encode()
+        symbol = chain['symbol'] if isinstance(chain, dict) else json.loads(body)['symbol']
+        self._option_chains[(symbol, _strategy(strategy))] = body
+
+    def add_accounts(self, accounts):
+        self._accounts = accounts if isinstance(accounts, bytes) else json.dumps(accounts).encode()
+
+    def load(self, directory: str):
+        """Read recordings saved by `save` or `RecordingClient`"""
+        chains = os.path.join(directory, OPTION_CHAINS)
+        for name in sorted(os.listdir(chains)) if os.path.isdir(chains) else []:
+            symbol, strategy, _ = name.rsplit('.', 2)
+            with open(os.path.join(chains, name), 'rb') as file:
+                self._option_chains[(symbol, strategy)] = file.read()
+        if os.path.exists(os.path.join(directory, ACCOUNTS)):
+            with open(os.path.join(directory, ACCOUNTS), 'rb') as file:
+                self._accounts = file.read()
+
+    def save(self, directory: str):
+        os.makedirs(os.path.join(directory, OPTION_CHAINS), exist_ok=True)
+        for (symbol, strategy), body in self._option_chains.items():
+            with open(_chain_path(directory, symbol, strategy), 'wb') as file:
+                file.write(body)
+        if self._accounts is not None:
+            with open(os.path.join(directory, ACCOUNTS), 'wb') as file:
+                file.write(self._accounts)
+
+    def _respond(self, path: str, body: bytes) -> httpx.Response:
+        delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            self.sleep(delay)
+        request = httpx.Request('GET', BASE_URL + path)
+        if body is None:
+            return httpx.Response(httpx.codes.NOT_FOUND, request=request)
+        return httpx.Response(httpx.codes.OK, content=body, request=request,
+                              headers={'Content-Type': 'application/json'})
+
+    def get_option_chain(self, symbol: str, *, strategy=None, **params) -> httpx.Response:
+        self.calls.append(('get_option_chain', symbol))
+        return self._respond('/v1/marketdata/chains', self._option_chains.get((symbol, _strategy(strategy))))
+
+    def get_accounts(self, *, fields=None) -> httpx.Response:
+        self.calls.append(('get_accounts', None))
+        return self._respond('/v1/accounts', self._accounts)
+
+
+class RecordingClient:
+    """
+    Passes `get_option_chain` and `get_accounts` through to a live client and saves every
+    successful response body under `directory`, for `ReplayClient` to load later.
+    """
+
+    def __init__(self, tda_client: Client, directory: str):
+        self.tda_client = tda_client
+        self.directory = directory
+        os.makedirs(os.path.join(directory, OPTION_CHAINS), exist_ok=True)
+
+    def _save(self, path: str, response: httpx.Response) -> httpx.Response:
+        if response.status_code == httpx.codes.OK:
+            with open(path, 'wb') as file:
+                file.write(response.content)
+        return response
+
+    def get_option_chain(self, symbol: str, **params) -> httpx.Response:
+        response = self.tda_client.get_option_chain(symbol, **params)
+        return self._save(_chain_path(self.directory, symbol, _strategy(params.get('strategy'))), response)
+
+    def get_accounts(self, **params) -> httpx.Response:
+        return self._save(os.path.join(self.directory, ACCOUNTS), self.tda_client.get_accounts(**params))
+
+
+def _black_scholes_puts(price: float, strikes: np.ndarray, days: int, volatility: float):
+    years = max(days, .5) / 365
+    spread = volatility * np.sqrt(years)
+    d1 = (np.log(price / strikes) + .5 * volatility ** 2 * years) / spread
+    d2 = d1 - spread
+    value = strikes * norm.cdf(-d2) - price * norm.cdf(-d1)
+    return value, norm.cdf(d1) - 1, norm.pdf(d1) / (price * spread), price * norm.pdf(d1) * np.sqrt(years) / 100
+
+
+def _expiries(quote_date: datetime.date, days: Iterable[int]) -> List[Tuple[datetime.date, int]]:
+    return [(quote_date + datetime.timedelta(days=int(day)), int(day)) for day in days]
+
+
+def synthetic_option_chain(symbol: str, price: float, quote_date: datetime.date = None,
+                           days: Iterable[int] = range(14, 91), strikes: int = 400, volatility: float = .2,
+                           seed=None) -> dict:
+    """
+    A SINGLE strategy put chain shaped like TDA's, priced with Black-Scholes: `strikes` strikes
+    from half the price to the price for every expiration `days` out. Use it to benchmark against
+    chains as large as the index chains without recording them.
+    """
+    rng = np.random.default_rng(seed)
+    quote_date = quote_date or datetime.date.today()
+    quote_time = int(datetime.datetime.combine(quote_date, datetime.time(15)).timestamp() * 1000)
+    strike_prices = np.unique(np.round(np.linspace(price / 2, price, strikes) * 2) / 2)
+    put_exp_date_map = {}
+    for expiry, dte in _expiries(quote_date, days):
+        implied = volatility * rng.uniform(.9, 1.1)
+        value, delta, gamma, vega = _black_scholes_puts(price, strike_prices, dte, implied)
+        volume = rng.poisson(3, len(strike_prices)).tolist()
+        theoretical = (implied * 100 * rng.uniform(.9, 1.1, len(strike_prices))).round(3).tolist()
+        columns = zip(strike_prices.tolist(), np.maximum(value - .05, 0).round(2).tolist(), (value + .05).round(2).tolist(),
+                      value.round(2).tolist(), delta.round(3).tolist(), gamma.round(4).tolist(),
+                      (-value / max(dte, 1)).round(3).tolist(), vega.round(3).tolist(), volume, theoretical)
+        expiration_date = int(datetime.datetime.combine(expiry, datetime.time(16)).timestamp() * 1000)
+        put_exp_date_map[f'{expiry.isoformat()}:{dte}'] = {
+            f'{strike:.1f}': [{
+                'putCall': 'PUT', 'symbol': f'{symbol}_{expiry:%m%d%y}P{strike:g}', 'description': '',
+                'exchangeName': 'OPR', 'bid': bid, 'ask': ask, 'last': mark, 'mark': mark, 'bidSize': 10, 'askSize': 10,
+                'totalVolume': traded, 'quoteTimeInLong': quote_time, 'tradeTimeInLong': quote_time,
+                'delta': put_delta, 'gamma': put_gamma, 'theta': theta, 'vega': put_vega, 'rho': 0.0,
+                'volatility': round(implied * 100, 3), 'theoreticalVolatility': theoretical_volatility,
+                'openInterest': traded * 10, 'strikePrice': strike, 'daysToExpiration': dte,
+                'expirationDate': expiration_date, 'inTheMoney': strike > price, 'multiplier': 100.0,
+            }] for strike, bid, ask, mark, put_delta, put_gamma, theta, put_vega, traded, theoretical_volatility in columns
+        }
+    return {'symbol': symbol, 'status': 'SUCCESS', 'strategy': 'SINGLE', 'underlyingPrice': price,
+            'volatility': volatility * 100, 'numberOfContracts': len(put_exp_date_map) * len(strike_prices),
+            'putExpDateMap': put_exp_date_map, 'callExpDateMap': {}}
+
+
+def synthetic_strategy_chain(chain: dict) -> dict:
+    """The VERTICAL strategy chain of adjacent put strikes to go with a synthetic SINGLE chain"""
+    monthly_strategy_list = []
+    for key, strikes in chain['putExpDateMap'].items():
+        puts = [contracts[0] for contracts in strikes.values()]
+        option_strategy_list = []
+        for long, short in zip(puts, puts[1:]):
+            legs = [{'symbol': leg['symbol'], 'putCallInd': 'P', 'description': '', 'bid': leg['bid'],
+                     'ask': leg['ask'], 'range': 'ITM' if leg['inTheMoney'] else 'OTM',
+                     'strikePrice': leg['strikePrice'], 'totalVolume': leg['totalVolume']} for leg in (short, long)]
+            option_strategy_list.append({
+                'primaryLeg': legs[0], 'secondaryLeg': legs[1],
+                'strategyStrike': f"{short['strikePrice']:g}/{long['strikePrice']:g}",
+                'strategyBid': round(short['bid'] - long['ask'], 2), 'strategyAsk': round(short['ask'] - long['bid'], 2)})
+        expiry, dte = key.split(':')
+        monthly_strategy_list.append({'month': expiry[5:7], 'year': int(expiry[:4]), 'day': int(expiry[8:]),
+                                      'daysToExp': int(dte), 'optionStrategyList': option_strategy_list})
+    return {'symbol': chain['symbol'], 'status': 'SUCCESS', 'strategy': 'VERTICAL',
+            'underlyingPrice': chain['underlyingPrice'], 'monthlyStrategyList': monthly_strategy_list}
+
+
+def synthetic_accounts(liquidation_value: float = 1_000_000) -> List[dict]:
+    return [{'securitiesAccount': {'type': 'MARGIN', 'accountId': '0', 'positions': [], 'currentBalances': {
+        'liquidationValue': liquidation_value, 'cashBalance': liquidation_value / 2,
+        'longMarketValue': liquidation_value / 2, 'buyingPower': liquidation_value,
+        'buyingPowerNonMarginableTrade': liquidation_value / 2}}}]
+
+
+def synthetic_client(prices: Dict[str, float], strikes: int = 400, days: Iterable[int] = range(14, 91),
+                     latency: float = 0, jitter: float = 0, seed=None) -> ReplayClient:
+    """A replay client with synthetic SINGLE and VERTICAL chains for each symbol and an account"""
+    client = ReplayClient(latency=latency, jitter=jitter, seed=seed)
+    for index, (symbol, price) in enumerate(prices.items()):
+        chain = synthetic_option_chain(symbol, price, days=days, strikes=strikes,
+                                       seed=None if seed is None else seed + index)
+        client.add_option_chain(chain, Client.Options.Strategy.SINGLE)
+        client.add_option_chain(synthetic_strategy_chain(chain), Client.Options.Strategy.VERTICAL)
+    client.add_accounts(synthetic_accounts())
+    return client
@@ -0,0 +1,144 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime
+import re
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+GREEKS = ('delta', 'gamma', 'vega', 'theta')
+CONTRACT_SIZE = 100
+
+# e.g. SPY_012023P380 or $SPX.X_031723P3900
+OPTION_SYMBOL = re.compile(r'^(?P<underlying>.+)_(?P<expiry>\d{6})(?P<put_call>[PC])(?P<strike>[\d.]+)$')
+
+
+def parse_option_symbol(symbol: str) -> Optional[Tuple[str, date]]:
+    """The underlying and expiration date of a TDA option symbol, or None for anything else"""
+    match = OPTION_SYMBOL.match(symbol)
+    if match is None:
+        return None
+    return match['underlying'], datetime.strptime(match['expiry'], '%m%d%y').date()
+
+
+@dataclass
+class _Holding:
+    underlying: str
+    expiry: Optional[date]
+    quantity: float
+    multiplier: float
+
+
+class GreeksBook:
+    """
+    Net delta, gamma, vega and theta of our positions, aggregated by underlying and by underlying
+    and expiry. The aggregates are updated in place: a new quote or position changes them by the
+    difference in that one symbol's contribution, instead of re-summing every position, and
+    `what_if` adds a candidate's contribution to an aggregate in O(1).
+
+    Greeks are share-equivalent, i.e. quantity × multiplier × per-unit greek. Stock positions
+    carry a delta of 1 per share.
+    """
+
+    def __init__(self):
+        self._holdings: Dict[str, _Holding] = {}
+        self._greeks: Dict[str, np.ndarray] = {}
+        self._by_underlying: Dict[str, np.ndarray] = defaultdict(lambda: np.zeros(len(GREEKS)))
+        self._by_expiry: Dict[Tuple[str, date], np.ndarray] = defaultdict(lambda: np.zeros(len(GREEKS)))
+
+    def _contribution(self, symbol: str) -> np.ndarray:
+        holding = self._holdings.get(symbol)
+        greeks = self._greeks.get(symbol)
+        if holding is None or greeks is None:
+            return np.zeros(len(GREEKS))
+        return holding.quantity * holding.multiplier * greeks
+
+    def _apply(self, symbol: str, sign: int):
+        holding = self._holdings.get(symbol)
+        if holding is None:
+            return
+        contribution = sign * self._contribution(symbol)
+        self._by_underlying[holding.underlying] += contribution
+        self._by_expiry[(holding.underlying, holding.expiry)] += contribution
+
+    def set_position(self, symbol: str, quantity: float, underlying: str = None, expiry: date = None,
+                     multiplier: float = None):
+        """
+        Set the signed quantity held of `symbol` (negative when short); zero removes it. Option
+        symbols are parsed for their underlying and expiry, anything else is treated as stock.
+        """
+        self._apply(symbol, -1)
+        if quantity == 0:
+            self._holdings.pop(symbol, None)
+            return
+        parsed = parse_option_symbol(symbol)
+        if parsed is not None:
+            underlying = underlying or parsed[0]
+            expiry = expiry or parsed[1]
+            multiplier = multiplier or CONTRACT_SIZE
+        else:
+            underlying = underlying or symbol
+            multiplier = multiplier or 1
+            self._greeks.setdefault(symbol, np.array([1.0, 0, 0, 0]))
+        self._holdings[symbol] = _Holding(underlying, expiry, quantity, multiplier)
+        self._apply(symbol, 1)
+
+    def update_quote(self, symbol: str, delta: float, gamma: float = 0, vega: float = 0, theta: float = 0):
+        """Set the per-unit greeks of `symbol` from a new quote"""
+        self._apply(symbol, -1)
+        self._greeks[symbol] = np.array([delta, gamma, vega, theta], dtype=float)
+        self._apply(symbol, 1)
+
+    def load_positions(self, positions: Iterable[dict], replace: bool = True):
+        """
+        Positions from `get_accounts(fields=POSITIONS)`. They replace every position held, so one
+        closed since the last load is zeroed, unless `replace` is False.
+        """
+        loaded = set()
+        for position in positions:
+            instrument = position['instrument']
+            self.set_position(instrument['symbol'], position['longQuantity'] - position['shortQuantity'],
+                              underlying=instrument.get('underlyingSymbol'))
+            loaded.add(instrument['symbol'])
+        if replace:
+            for symbol in set(self._holdings) - loaded:
+                self.set_position(symbol, 0)
+
+    def load_quotes(self, quotes: Dict[str, dict]):
+        """Quotes from `get_quotes`, keyed by symbol; quotes without greeks are skipped"""
+        for symbol, quote in quotes.items():
+            if all(greek in quote for greek in GREEKS):
+                self.update_quote(symbol, *(quote[greek] for greek in GREEKS))
+
+    def rebuild(self):
+        """Re-sum every aggregate from the positions, to shed accumulated rounding"""
+        self._by_underlying.clear()
+        self._by_expiry.clear()
+        for symbol in self._holdings:
+            self._apply(symbol, 1)
+
+    def underlying(self, underlying: str) -> pd.Series:
+        return pd.Series(self._by_underlying.get(underlying, np.zeros(len(GREEKS))), index=GREEKS)
+
+    def expiry(self, underlying: str, expiry: date) -> pd.Series:
+        return pd.Series(self._by_expiry.get((underlying, expiry), np.zeros(len(GREEKS))), index=GREEKS)
+
+    def by_underlying(self) -> pd.DataFrame:
+        return pd.DataFrame.from_dict(dict(self._by_underlying), orient='index', columns=list(GREEKS))
+
+    def by_expiry(self) -> pd.DataFrame:
+        frame = pd.DataFrame.from_dict(dict(self._by_expiry), orient='index', columns=list(GREEKS))
+        frame.index = pd.MultiIndex.from_tuples(frame.index, names=['underlying', 'expiry'])
+        return frame
+
+    def what_if(self, underlying, quantity, delta, gamma=0, vega=0, theta=0,
+                multiplier: float = CONTRACT_SIZE) -> pd.DataFrame:
+        """
+        Net greeks of each candidate's underlying if the candidate were added. Candidate fields may
+        be arrays, one element per candidate; each costs one aggregate lookup.
+        """
+        underlyings = np.atleast_1d(underlying)
+        current = np.array([self._by_underlying.get(u, np.zeros(len(GREEKS))) for u in underlyings])
+        candidate = np.column_stack(np.broadcast_arrays(*np.atleast_1d(delta, gamma, vega, theta)))
+        added = current + (np.asarray(quantity, dtype=float) * multiplier)[..., np.newaxis] * candidate
+        return pd.DataFrame(added, columns=list(GREEKS))
@@ -0,0 +1,100 @@
+from typing import Tuple
+import numpy as np
+import pandas as pd
+
+from quacktrader.riskmanager.short_premium_riskmanager import CONTRACT_SIZE
+
+# implied volatility is annualized over calendar days, like daysToExpiration
+CALENDAR_DAYS = 365
+
+
+def short_put_spread_pnl(terminal: np.ndarray, short_strike, long_strike, credit) -> np.ndarray:
+    """
+    P&L per contract at expiration of short put spreads (a naked put has a long strike of zero),
+    an `iterations × candidates` matrix from the terminal prices and the candidates' arrays.
+    The reference implementation that `spread_statistics` is tested against.
+    """
+    terminal = np.asarray(terminal, dtype=float)[:, np.newaxis]
+    short_strike, long_strike, credit = (np.asarray(a, dtype=float) for a in (short_strike, long_strike, credit))
+    return (credit - np.maximum(short_strike - terminal, 0) + np.maximum(long_strike - terminal, 0)) * CONTRACT_SIZE
+
+
+def spread_statistics(terminal: np.ndarray, short_strike, long_strike, credit,
+                      tail: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Probability of profit, expected P&L and mean P&L of the `tail` worst outcomes per contract of
+    short put spreads held to expiration, against terminal prices sorted in ascending order; the
+    same numbers as reducing `short_put_spread_pnl`, without its `iterations × candidates` matrix.
+
+    A short put spread's P&L never falls as the price rises, so the worst outcomes are the lowest
+    prices and it is profitable above one breakeven price. Each statistic is then a binary search
+    and a lookup in the prices' running sums, O(log n) per candidate.
+    """
+    n = len(terminal)
+    running = np.concatenate([[0.0], np.cumsum(terminal)])
+    short_strike, long_strike, credit = (np.asarray(a, dtype=float) for a in (short_strike, long_strike, credit))
+
+    def shortfall(strike: np.ndarray, limit: int) -> np.ndarray:
+        """How far the lowest `limit` prices fall below `strike`, summed"""
+        below = np.minimum(np.searchsorted(terminal, strike), limit)
+        return below * strike - running[below]
+
+    # between the strikes the P&L crosses zero at the short strike less the credit
+    profitable = n - np.searchsorted(terminal, short_strike - credit, side='right')
+    profitable = np.where(credit > short_strike - long_strike, n, np.where(credit > 0, profitable, 0))
+    expected = credit - (shortfall(short_strike, n) - shortfall(long_strike, n)) / n
+    worst = credit - (shortfall(short_strike, tail) - shortfall(long_strike, tail)) / tail
+    return profitable / n, expected * CONTRACT_SIZE, worst * CONTRACT_SIZE
+
+
+def simulate_candidates(candidates: pd.DataFrame, iterations: int = 20_000, alpha: float = .05,
+                        riskfree: float = 0, seed=None) -> pd.DataFrame:
+    """
+    Probability of profit, expected P&L and tail loss (mean P&L of the worst `alpha` of outcomes)
+    per contract held to expiration, for a frame of candidates from `put_candidates` or
+    `spread_candidates`.
+
+    Each candidate's terminal prices are lognormal at its own implied volatility with a
+    risk-neutral drift, so the statistics agree with the candidate's own quote: the expected P&L
+    is how far the credit is from the model price at that volatility, not the volatility skew
+    between strikes, and no forecast of an edge over the market. One set of normal draws per
+    underlying and expiration drives every candidate in the group, and the ones whose
+    volatilities agree to a hundredth of a point share their prices (see `spread_statistics`).
+    Candidates without a positive implied volatility get no statistics.
+    """
+    statistics = np.full((len(candidates), 3), np.nan)
+    groups = candidates.groupby(['underlying', 'days_to_expiration'], sort=False).indices
+    seeds = np.random.SeedSequence(seed).spawn(len(groups))
+    tail = max(1, int(np.ceil(alpha * iterations)))
+    volatility = candidates['volatility'].to_numpy(dtype=float)
+    short_strike, long_strike, credit = (candidates[column].to_numpy(dtype=float)
+                                         for column in ('short_strike', 'long_strike', 'credit'))
+
+    for ((underlying, days), rows), group_seed in zip(groups.items(), seeds):
+        price = candidates['underlying_price'].iloc[rows[0]]
+        rows = rows[volatility[rows] > 0]
+        if not (price > 0 and len(rows)):
+            continue
+        shocks = np.sort(np.random.default_rng(group_seed).standard_normal(iterations))
+        years = int(days) / CALENDAR_DAYS
+        levels, level_of_row = np.unique(volatility[rows].round(4), return_inverse=True)
+        for level, level_volatility in enumerate(levels):
+            members = rows[level_of_row == level]
+            # increasing in the shocks, so the terminal prices come out sorted
+            terminal = price * np.exp((riskfree - .5 * level_volatility ** 2) * years
+                                      + level_volatility * np.sqrt(years) * shocks)
+            statistics[members] = np.column_stack(spread_statistics(
+                terminal, short_strike[members], long_strike[members], credit[members], tail))
+
+    return candidates.join(pd.DataFrame(statistics, index=candidates.index,
+                                        columns=['probability_of_profit', 'expected_pnl', 'tail_loss']))
+
+
+def spread_score(candidates: pd.DataFrame) -> pd.Series:
+    """
+    Expected profit per dollar at risk per day of simulated spread candidates. A credit at or
+    above the spread's width leaves nothing at risk, a mid-price artifact rather than a trade,
+    so those candidates get no score instead of an infinite or sign-flipped one.
+    """
+    at_risk = (candidates['short_strike'] - candidates['long_strike'] - candidates['credit']) * CONTRACT_SIZE
+    return (candidates['expected_pnl'] / candidates['days_to_expiration'] / at_risk).where(at_risk > 0)
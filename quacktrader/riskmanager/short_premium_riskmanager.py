@@ -0,0 +1,146 @@
+from typing import Iterable, List
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+from quacktrader.riskmanager.riskmanager import RiskManager
+
+CONTRACT_SIZE = 100
+
+
+def put_candidates(puts: Iterable[dict], underlying_price: float = np.nan) -> pd.DataFrame:
+    """
+    Candidate short puts from option chain entries (the `put[0]` of each strike), one row per put.
+    Entries annotated with the chain's 'underlying' and 'underlyingPrice' keep them.
+    """
+    puts = list(puts)
+    return pd.DataFrame({
+        'symbol': [put['symbol'] for put in puts],
+        'underlying': [put.get('underlying', put['symbol'].split('_')[0]) for put in puts],
+        'underlying_price': [put.get('underlyingPrice', underlying_price) for put in puts],
+        'short_strike': [put['strikePrice'] for put in puts],
+        'long_strike': 0.0,
+        'credit': [put['mark'] for put in puts],
+        'delta': [put['delta'] for put in puts],
+        'volatility': [put['volatility'] / 100 for put in puts],
+        'days_to_expiration': [put['daysToExpiration'] for put in puts],
+    })
+
+
+def spread_candidates(strategies: List[dict], underlying_price: float = np.nan) -> pd.DataFrame:
+    """
+    Candidate vertical put spreads from a strategy chain's option strategies, one row per spread,
+    annotated like the scanner does with the chain's 'symbol' and optionally 'underlyingPrice'.
+    """
+    return pd.DataFrame({
+        'symbol': [strategy['primaryLeg']['symbol'] for strategy in strategies],
+        'underlying': [strategy.get('symbol', strategy['primaryLeg']['symbol'].split('_')[0]) for strategy in strategies],
+        'underlying_price': [strategy.get('underlyingPrice', underlying_price) for strategy in strategies],
+        'short_strike': [strategy['primaryLeg']['strikePrice'] for strategy in strategies],
+        'long_strike': [strategy['secondaryLeg']['strikePrice'] for strategy in strategies],
+        'credit': [(strategy['strategyAsk'] + strategy['strategyBid']) / 2 for strategy in strategies],
+        'delta': [strategy.get('delta', np.nan) for strategy in strategies],
+        'volatility': [strategy.get('volatility', np.nan) / 100 for strategy in strategies],
+        'days_to_expiration': [strategy['daysToExpiration'] for strategy in strategies],
+    })
+
+
+class ShortPremiumRiskManager(RiskManager):
+    """
+    Risk rules for selling cash-secured puts and vertical put spreads (a naked put is a spread
+    with a long strike of zero). Every method takes arrays, one element per candidate trade, so
+    thousands of candidates are evaluated with a handful of array operations; scalars work too.
+    Amounts are per contract.
+    """
+
+    def __init__(self, capital: float, exposure: float = 0, max_risk_per_trade: float = .02,
+                 max_exposure: float = .5, min_probability_of_success: float = .7,
+                 target_profit: float = .5, stop_loss: float = 2, riskfree: float = 0):
+        self.capital = capital
+        self.exposure = exposure
+        self.max_risk_per_trade = max_risk_per_trade
+        self.max_exposure = max_exposure
+        self.min_probability_of_success = min_probability_of_success
+        self.target_profit = target_profit
+        self.stop_loss = stop_loss
+        self.riskfree = riskfree
+
+    @staticmethod
+    def max_profit(credit) -> np.ndarray:
+        return np.asarray(credit, dtype=float) * CONTRACT_SIZE
+
+    @staticmethod
+    def max_loss(short_strike, long_strike, credit) -> np.ndarray:
+        return (np.asarray(short_strike, dtype=float) - long_strike - credit) * CONTRACT_SIZE
+
+    @staticmethod
+    def collateral(short_strike, long_strike) -> np.ndarray:
+        return (np.asarray(short_strike, dtype=float) - long_strike) * CONTRACT_SIZE
+
+    def calculate_risk_reward_ratio(self, short_strike, long_strike, credit) -> np.ndarray:
+        """Maximum loss per dollar of maximum profit"""
+        with np.errstate(divide='ignore'):
+            return self.max_loss(short_strike, long_strike, credit) / self.max_profit(credit)
+
+    def calculate_probability_of_success(self, short_strike, credit, underlying_price=np.nan, volatility=np.nan,
+                                         days_to_expiration=np.nan, delta=np.nan) -> np.ndarray:
+        """
+        Probability that the underlying finishes above the breakeven (short strike less the credit),
+        from a lognormal distribution at the implied volatility. Candidates without a price or
+        volatility fall back to the short strike's delta, 1 + delta for a put.
+        """
+        breakeven = np.asarray(short_strike, dtype=float) - credit
+        years = np.asarray(days_to_expiration, dtype=float) / 365
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread = volatility * np.sqrt(years)
+            d2 = (np.log(underlying_price / breakeven) + (self.riskfree - 0.5 * np.square(volatility)) * years) / spread
+            lognormal = norm.cdf(d2)
+        return np.where(np.isnan(d2), 1 + np.asarray(delta, dtype=float), lognormal)
+
+    def calculate_maximum_acceptable_loss(self) -> int:
+        return int(self.capital * self.max_risk_per_trade)
+
+    def calculate_expected_return(self, probability_of_success, short_strike, long_strike, credit) -> np.ndarray:
+        """
+        Expected profit per contract if a trade either keeps the whole credit or takes the whole
+        maximum loss; a conservative bound, since losing trades rarely lose everything.
+        """
+        probability_of_success = np.asarray(probability_of_success, dtype=float)
+        return (probability_of_success * self.max_profit(credit)
+                - (1 - probability_of_success) * self.max_loss(short_strike, long_strike, credit))
+
+    def is_overexposed(self, short_strike, long_strike, contracts=1) -> np.ndarray:
+        """Whether the collateral of a new trade takes committed capital past `max_exposure`"""
+        committed = self.exposure + self.collateral(short_strike, long_strike) * contracts
+        return committed > self.capital * self.max_exposure
+
+    def has_reached_max_allowed_loss(self, credit, cost_to_close) -> np.ndarray:
+        """Whether closing an open position now would lose `stop_loss` times the credit received"""
+        return np.asarray(cost_to_close, dtype=float) - credit >= self.stop_loss * np.asarray(credit, dtype=float)
+
+    def has_reached_target_profit(self, credit, cost_to_close) -> np.ndarray:
+        """Whether closing an open position now keeps `target_profit` of the credit received"""
+        return np.asarray(credit, dtype=float) - cost_to_close >= self.target_profit * np.asarray(credit, dtype=float)
+
+    def is_within_risk_tolerance(self, probability_of_success, short_strike, long_strike, credit, contracts=1) -> np.ndarray:
+        """Whether a new trade is likely enough to succeed and its maximum loss is acceptable"""
+        return ((np.asarray(probability_of_success) >= self.min_probability_of_success)
+                & (self.max_loss(short_strike, long_strike, credit) * contracts <= self.calculate_maximum_acceptable_loss()))
+
+    def evaluate(self, candidates: pd.DataFrame) -> pd.DataFrame:
+        """
+        Every rule at once for a frame of candidates (see `put_candidates` and `spread_candidates`),
+        with the results as new columns.
+        """
+        short_strike, long_strike, credit = candidates['short_strike'], candidates['long_strike'], candidates['credit']
+        pop = self.calculate_probability_of_success(
+            short_strike, credit, candidates['underlying_price'], candidates['volatility'],
+            candidates['days_to_expiration'], candidates['delta'])
+        return candidates.assign(
+            probability_of_success=pop,
+            max_profit=self.max_profit(credit),
+            max_loss=self.max_loss(short_strike, long_strike, credit),
+            risk_reward_ratio=self.calculate_risk_reward_ratio(short_strike, long_strike, credit),
+            expected_return=self.calculate_expected_return(pop, short_strike, long_strike, credit),
+            overexposed=self.is_overexposed(short_strike, long_strike),
+            within_risk_tolerance=self.is_within_risk_tolerance(pop, short_strike, long_strike, credit))
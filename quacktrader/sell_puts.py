@@ -1,79 +1,120 @@
 import datetime
-from functools import reduce
 import itertools
-from operator import getitem
-import operator
-from typing import List
-from constants import TDA_API_KEY, TDA_REDIRECT_URI, TDA_TOKEN_PATH
-from tda import auth
+from typing import List, Optional, Tuple
 from tda.client import Client
-import json
 import httpx
+import pandas as pd
+
+from quacktrader.chain_archive import ChainArchive
+from quacktrader.moneymanager.account_state import AccountState
+from quacktrader.riskmanager.probability_of_profit import simulate_candidates
+from quacktrader.riskmanager.short_premium_riskmanager import put_candidates
+from quacktrader.tda_session import get_account_state, get_client
+from quacktrader.timing import StageTimer
 
 
 def select_symbols() -> List[str]:
     return ['$SPX.X', '$NDX.X', '$RUT.X', '$DJX.X', '$OEX.X']
 
 
-try:
-    tda_client = auth.client_from_token_file(TDA_TOKEN_PATH, TDA_API_KEY)
-except FileNotFoundError:
-    # go through the oauth2 workflow manually, but with a little help
-    tda_client = auth.client_from_manual_flow(TDA_API_KEY, TDA_REDIRECT_URI, TDA_TOKEN_PATH)
-
-symbols: List[str] = select_symbols()
-from_date = datetime.date.today() + datetime.timedelta(days=21)
-to_date = from_date + datetime.timedelta(days=42)
-put_options = []
-
-for symbol in symbols:
-    response = tda_client.get_option_chain(
-        symbol=symbol,
-        contract_type=Client.Options.ContractType.PUT,
-        strategy=Client.Options.Strategy.SINGLE,
-        strike_range=Client.Options.StrikeRange.STRIKES_BELOW_MARKET,
-        from_date=from_date,
-        to_date=to_date)
-    assert response.status_code == httpx.codes.OK, response.raise_for_status()
-    # print(json.dumps(response.json(), indent=4))
-
-    option_chain = response.json()
-    put_expdate_map = option_chain['putExpDateMap']
-    strikes_per_expiry_date = put_expdate_map.values()
-    puts_per_strike = map(lambda x: x.values(), strikes_per_expiry_date)
-    put_options = itertools.chain(put_options, *puts_per_strike)
-    # print(list(put_options)[0]) # in the case of Strategy.SINGLE each contract only contains one option leg, but make sure to account for multiple 
-
-    accounts_response = tda_client.get_accounts()
-    assert accounts_response.status_code == 200, accounts_response.raise_for_status()
-    # print(json.dumps(response.json(), indent=4))
-
-accounts = accounts_response.json()
-buying_power = 1000000  # accounts[0]['securitiesAccount']['currentBalances']['buying_power'] * .12 # this is an arbitrarily small portion of our capital
-
-puts = filter(lambda put: put[0]['strikePrice'] * 100 <= buying_power, put_options)
-puts = filter(lambda put: put[0]['totalVolume'] > 0, puts)
-puts = filter(lambda put: not put[0]['inTheMoney'], puts)
-puts = filter(lambda put: put[0]['delta'] > -.175, puts)
-# print(list(puts))
-
-# and the best one is!...
-puts = sorted(puts, key = lambda put: (put[0]['mark'] / put[0]['strikePrice']) / put[0]['daysToExpiration'], reverse=True)
-the_one_put = puts[0][0]
-print(the_one_put)
-contract_type = the_one_put['putCall']
-option_symbol = the_one_put['symbol']
-theoretical_premium: float = the_one_put['mark'] * 100 
-profit = theoretical_premium # - cost_to_open ## this ideally will account for the cost of the trade which will be higher for more complex positions
-stake: float = the_one_put['strikePrice'] * 100
-alpha: float = 0 # because I didn't do the hard part yet lol
-delta: float = the_one_put['delta']
-expected_value = profit * (1 + delta)
-days_to_expiration = the_one_put['daysToExpiration']
-return_on_risk = (expected_value / stake) * 100
-annualized_return = return_on_risk * (365 / days_to_expiration)
-
-print(f"Sell {contract_type} on {option_symbol} to collect a ${theoretical_premium} premium for a stake of ${stake}.")
-print(f"Given a delta of {delta}, an alpha of {alpha}, and a profit of ${profit}, the expected value of this position is {expected_value}")
-print(f"This represents a hypothetical gain of {return_on_risk:.2f}% over {days_to_expiration} days, or an annualized return of {annualized_return:.2f}%.")
+def scan(tda_client: Client, account_state: AccountState = None, chain_archive: ChainArchive = None,
+         symbols: List[str] = None, today: datetime.date = None, timer: StageTimer = None,
+         iterations: int = 20_000, seed=None) -> Optional[Tuple[dict, pd.Series]]:
+    """
+    Find the put to sell: the best of the out-of-the-money puts on `symbols` by simulated expected
+    profit per dollar of collateral per day. Returns the chain's entry for it and its simulated
+    statistics, or None if no put passes the filters. Time spent fetching, parsing, filtering and
+    ranking is added to `timer`.
+    """
+    account_state = account_state or get_account_state(tda_client)
+    symbols = symbols or select_symbols()
+    timer = timer or StageTimer()
+    from_date = (today or datetime.date.today()) + datetime.timedelta(days=21)
+    to_date = from_date + datetime.timedelta(days=42)
+
+    with timer('fetch'):
+        responses = []
+        for symbol in symbols:
+            response = tda_client.get_option_chain(
+                symbol=symbol,
+                contract_type=Client.Options.ContractType.PUT,
+                strategy=Client.Options.Strategy.SINGLE,
+                strike_range=Client.Options.StrikeRange.STRIKES_BELOW_MARKET,
+                from_date=from_date,
+                to_date=to_date)
+            assert response.status_code == httpx.codes.OK, response.raise_for_status()
+            responses.append(response)
+        accounts = account_state.get().accounts
+
+    with timer('parse'):
+        option_chains = [response.json() for response in responses]
+
+    if chain_archive is not None:
+        with timer('archive'):
+            for option_chain in option_chains:
+                chain_archive.write_chain(option_chain) # keep a snapshot for backtesting the filters later
+
+    with timer('parse'):
+        put_options = []
+        for symbol, option_chain in zip(symbols, option_chains):
+            put_expdate_map = option_chain['putExpDateMap']
+            strikes_per_expiry_date = put_expdate_map.values()
+            puts_per_strike = list(itertools.chain(*map(lambda x: x.values(), strikes_per_expiry_date)))
+            for put in puts_per_strike:
+                # propagate some of the parent data to the children for simulating their payoffs
+                put[0]['underlying'] = symbol
+                put[0]['underlyingPrice'] = option_chain['underlyingPrice']
+            put_options = itertools.chain(put_options, puts_per_strike)
+            # in the case of Strategy.SINGLE each contract only contains one option leg, but make sure to account for multiple
+
+    with timer('filter'):
+        buying_power = 1000000  # accounts[0]['securitiesAccount']['currentBalances']['buying_power'] * .12 # this is an arbitrarily small portion of our capital
+
+        puts = filter(lambda put: put[0]['strikePrice'] * 100 <= buying_power, put_options)
+        puts = filter(lambda put: put[0]['totalVolume'] > 0, puts)
+        puts = filter(lambda put: not put[0]['inTheMoney'], puts)
+        puts = filter(lambda put: put[0]['delta'] > -.175, puts)
+        puts = list(puts)
+
+    with timer('rank'):
+        if not puts:
+            return None
+        # simulate every candidate's payoff at expiration against shared underlying prices
+        candidates = simulate_candidates(put_candidates(put[0] for put in puts), iterations, seed=seed)
+
+        # and the best one is!... the highest expected profit per dollar of collateral per day
+        candidates['score'] = candidates['expected_pnl'] / (candidates['short_strike'] * 100) / candidates['days_to_expiration']
+        scores = candidates['score'].dropna() # no score without a usable implied volatility
+        if scores.empty:
+            return None
+        best = scores.idxmax()
+        return puts[best][0], candidates.loc[best]
+
+
+if __name__ == "__main__":
+    tda_client = get_client()
+
+    result = scan(tda_client, chain_archive=ChainArchive())
+    if result is None:
+        print("No put passed the filters today.")
+        raise SystemExit
+    the_one_put, candidate = result
+    print(the_one_put)
+    contract_type = the_one_put['putCall']
+    option_symbol = the_one_put['symbol']
+    theoretical_premium: float = the_one_put['mark'] * 100
+    profit = theoretical_premium # - cost_to_open ## this ideally will account for the cost of the trade which will be higher for more complex positions
+    stake: float = the_one_put['strikePrice'] * 100
+    alpha: float = 0 # because I didn't do the hard part yet lol
+    delta: float = the_one_put['delta']
+    probability_of_profit = candidate['probability_of_profit']
+    expected_value = candidate['expected_pnl']
+    tail_loss = candidate['tail_loss']
+    days_to_expiration = the_one_put['daysToExpiration']
+    return_on_risk = (expected_value / stake) * 100
+    annualized_return = return_on_risk * (365 / days_to_expiration)
 
+    print(f"Sell {contract_type} on {option_symbol} to collect a ${theoretical_premium} premium for a stake of ${stake}.")
+    print(f"Given a delta of {delta}, an alpha of {alpha}, and a profit of ${profit}, the expected value of this position is {expected_value:.2f}")
+    print(f"It is profitable at expiration with a probability of {probability_of_profit:.2%}, and the worst 5% of outcomes average ${tail_loss:.2f}.")
+    print(f"This represents a hypothetical gain of {return_on_risk:.2f}% over {days_to_expiration} days, or an annualized return of {annualized_return:.2f}%.")
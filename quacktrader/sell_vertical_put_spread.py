@@ -1,119 +1,146 @@
 import datetime
-from functools import reduce
 import itertools
-from operator import getitem
-import operator
-from typing import List
-from constants import TDA_API_KEY, TDA_REDIRECT_URI, TDA_TOKEN_PATH
-from tda import auth
+from typing import List, Tuple
 from tda.client import Client
-import json
+import pandas as pd
+
+from quacktrader.moneymanager.account_state import AccountState
+from quacktrader.riskmanager.probability_of_profit import simulate_candidates, spread_score
+from quacktrader.riskmanager.short_premium_riskmanager import spread_candidates
+from quacktrader.tda_session import get_account_state, get_client
+from quacktrader.timing import StageTimer
 
 
 def select_symbols() -> List[str]:
     return ['$SPX.X', '$NDX.X', '$RUT.X', '$DJX.X', '$OEX.X']
 
 
-try:
-    tda_client = auth.client_from_token_file(TDA_TOKEN_PATH, TDA_API_KEY)
-except FileNotFoundError:
-    # go through the oauth2 workflow manually, but with a little help
-    tda_client = auth.client_from_manual_flow(TDA_API_KEY, TDA_REDIRECT_URI, TDA_TOKEN_PATH)
-
-symbols: List[str] = select_symbols()
-from_date = datetime.date.today() + datetime.timedelta(days=30)
-to_date = from_date + datetime.timedelta(days=60)
-option_strategies = []
-
-for symbol in symbols:
-    response = tda_client.get_option_chain(
-        symbol=symbol,
-        contract_type=Client.Options.ContractType.PUT,
-        strategy=Client.Options.Strategy.VERTICAL,
-        strike_range=Client.Options.StrikeRange.OUT_OF_THE_MONEY,
-        from_date=from_date,
-        to_date=to_date)
-    assert response.status_code == 200, response.raise_for_status()
-    # print(json.dumps(response.json(), indent=4))
-
-    strategy_chain = response.json()
-    if (strategy_chain['status'] == 'FAILED'):
-        raise Exception("The API request failed.")
-
-    for expiry_date in strategy_chain['monthlyStrategyList']:
-        for option_strategy in expiry_date['optionStrategyList']:
-            # propagate some of the parent data to the children for convenience
-            option_strategy['symbol'] = strategy_chain['symbol']
-            option_strategy['daysToExpiration'] = expiry_date['daysToExp']
-            option_strategies.append(option_strategy)
-
-
-
-accounts_response = tda_client.get_accounts()
-assert accounts_response.status_code == 200, accounts_response.raise_for_status()
-# print(json.dumps(response.json(), indent=4))
-
-accounts = accounts_response.json()
-buying_power = accounts[0]['securitiesAccount']['currentBalances']['buyingPower'] * .12 # this is an arbitrarily small portion of our capital
-# buying_power = 1000000
-
-# pare down the list so we don't have to make so many additional api calls
-option_strategies = filter(lambda strategy: (strategy['primaryLeg']['strikePrice'] - strategy['secondaryLeg']['strikePrice']) * 100 <= buying_power, option_strategies)
-option_strategies = filter(lambda strategy: strategy['primaryLeg']['totalVolume'] and strategy['secondaryLeg']['totalVolume'] > 0, option_strategies)
-option_strategies = filter(lambda strategy: strategy['primaryLeg']['range'] == 'OTM', option_strategies)
-viable_option_strategies = []
-
-for option_strategy in option_strategies:
-    # find stats for the primary leg
-    option_chain_response = tda_client.get_option_chain(
-        symbol=option_strategy['symbol'],
-        contract_type=Client.Options.ContractType.PUT,
-        strategy=Client.Options.Strategy.SINGLE,
-        strike_range=Client.Options.StrikeRange.OUT_OF_THE_MONEY,
-        from_date=from_date,
-        to_date=to_date)
-    assert option_chain_response.status_code == 200, option_chain_response.raise_for_status()
-    # print(json.dumps(option_chain_response.json(), indent=4))
-
-    option_chain = option_chain_response.json()
-    put_expdate_map = option_chain['putExpDateMap']
-    strikes_per_expiry_date = put_expdate_map.values()
-    puts_per_strike = map(lambda x: x.values(), strikes_per_expiry_date)
-    put_options = itertools.chain(*puts_per_strike)
-    primary_leg_option_chain = next((put_option for put_option in put_options if put_option[0]['symbol'] == option_strategy['primaryLeg']['symbol']), None)
-    if primary_leg_option_chain is None:
-        # i don't understand why this would happen but it does, maybe debug it later
-        continue
-
-    for key in ['delta', 'gamma', 'theta', 'vega', 'rho', 'volatility', 'theoreticalVolatility']:
-        option_strategy[key] = primary_leg_option_chain[0][key]
-
-    viable_option_strategies.append(option_strategy)
-
-
-
-# narrow it down
-viable_option_strategies = filter(lambda strategy: strategy['delta'] > -0.175, viable_option_strategies)
-# iv > hv ## is that actually what theoreticalVolatility and volatility are?
-viable_option_strategies = filter(lambda strategy: strategy['theoreticalVolatility'] > strategy['volatility'], viable_option_strategies)
-
-# look at the top five
-viable_option_strategies = sorted(viable_option_strategies, key = lambda strategy: (((strategy['strategyAsk'] - strategy['strategyBid']) / 2) / strategy['daysToExpiration']), reverse=True)
-for the_one_strategy in viable_option_strategies[:5]:
-    underlying_symbol = the_one_strategy['symbol']
-    print(f"The best strategy is: \n {the_one_strategy}")
-
-    theoretical_premium: float = (the_one_strategy['strategyAsk'] - the_one_strategy['strategyBid']) / 2 * 100 
-    profit = theoretical_premium # - cost_to_open ## this ideally will account for the cost of the trade which will be higher for more complex positions
-    stake: float = (the_one_strategy['primaryLeg']['strikePrice'] - the_one_strategy['secondaryLeg']['strikePrice']) * 100
-    alpha: float = 0 # because I didn't do the hard part yet lol
-    delta: float = the_one_strategy['delta']
-    expected_value = profit * (1 + delta)
-    days_to_expiration = the_one_strategy['daysToExpiration']
-    return_on_risk = (expected_value / stake) * 100
-    annualized_return = return_on_risk * (365 / days_to_expiration)
-
-    print(f"Sell vertical put spread on {underlying_symbol} to collect a ${theoretical_premium} premium for a stake of ${stake} per contract.")
-    print(f"Given a delta of {delta}, an alpha of {alpha}, and a profit of ${profit}, the expected value of this position is ${expected_value} per contract.")
-    print(f"This represents a hypothetical gain of {return_on_risk:.2f}% over {days_to_expiration} days, or an annualized return of {annualized_return:.2f}%.")
-
+def scan(tda_client: Client, account_state: AccountState = None, symbols: List[str] = None,
+         today: datetime.date = None, timer: StageTimer = None, top: int = 5, iterations: int = 20_000,
+         seed=None) -> List[Tuple[dict, pd.Series]]:
+    """
+    Find the vertical put spreads to sell: the `top` out-of-the-money spreads on `symbols` by
+    simulated expected profit per dollar at risk per day, each with its simulated statistics,
+    best first. Time spent fetching, parsing, filtering and ranking is added to `timer`.
+    """
+    account_state = account_state or get_account_state(tda_client)
+    symbols = symbols or select_symbols()
+    timer = timer or StageTimer()
+    from_date = (today or datetime.date.today()) + datetime.timedelta(days=30)
+    to_date = from_date + datetime.timedelta(days=60)
+
+    with timer('fetch'):
+        responses = []
+        for symbol in symbols:
+            response = tda_client.get_option_chain(
+                symbol=symbol,
+                contract_type=Client.Options.ContractType.PUT,
+                strategy=Client.Options.Strategy.VERTICAL,
+                strike_range=Client.Options.StrikeRange.OUT_OF_THE_MONEY,
+                from_date=from_date,
+                to_date=to_date)
+            assert response.status_code == 200, response.raise_for_status()
+            responses.append(response)
+        balances = account_state.get().balances
+
+    with timer('parse'):
+        option_strategies = []
+        for response in responses:
+            strategy_chain = response.json()
+            if (strategy_chain['status'] == 'FAILED'):
+                raise Exception("The API request failed.")
+
+            for expiry_date in strategy_chain['monthlyStrategyList']:
+                for option_strategy in expiry_date['optionStrategyList']:
+                    # propagate some of the parent data to the children for convenience
+                    option_strategy['symbol'] = strategy_chain['symbol']
+                    option_strategy['underlyingPrice'] = strategy_chain['underlyingPrice']
+                    option_strategy['daysToExpiration'] = expiry_date['daysToExp']
+                    option_strategies.append(option_strategy)
+
+    with timer('filter'):
+        buying_power = balances['buyingPower'] * .12 # this is an arbitrarily small portion of our capital
+        # buying_power = 1000000
+
+        # pare down the list so we don't have to make so many additional api calls
+        option_strategies = filter(lambda strategy: (strategy['primaryLeg']['strikePrice'] - strategy['secondaryLeg']['strikePrice']) * 100 <= buying_power, option_strategies)
+        option_strategies = filter(lambda strategy: strategy['primaryLeg']['totalVolume'] and strategy['secondaryLeg']['totalVolume'] > 0, option_strategies)
+        option_strategies = filter(lambda strategy: strategy['primaryLeg']['range'] == 'OTM', option_strategies)
+        option_strategies = list(option_strategies)
+
+    # find stats for the primary legs, from one single-option chain per underlying rather than one per spread
+    single_chain_responses = {}
+    with timer('fetch'):
+        for symbol in dict.fromkeys(strategy['symbol'] for strategy in option_strategies):
+            option_chain_response = tda_client.get_option_chain(
+                symbol=symbol,
+                contract_type=Client.Options.ContractType.PUT,
+                strategy=Client.Options.Strategy.SINGLE,
+                strike_range=Client.Options.StrikeRange.OUT_OF_THE_MONEY,
+                from_date=from_date,
+                to_date=to_date)
+            assert option_chain_response.status_code == 200, option_chain_response.raise_for_status()
+            single_chain_responses[symbol] = option_chain_response
+
+    with timer('parse'):
+        puts_by_symbol = {}
+        for option_chain_response in single_chain_responses.values():
+            option_chain = option_chain_response.json()
+            put_expdate_map = option_chain['putExpDateMap']
+            strikes_per_expiry_date = put_expdate_map.values()
+            puts_per_strike = map(lambda x: x.values(), strikes_per_expiry_date)
+            puts_by_symbol.update((put_option[0]['symbol'], put_option) for put_option in itertools.chain(*puts_per_strike))
+
+    with timer('filter'):
+        viable_option_strategies = []
+        for option_strategy in option_strategies:
+            primary_leg_option_chain = puts_by_symbol.get(option_strategy['primaryLeg']['symbol'])
+            if primary_leg_option_chain is None:
+                # i don't understand why this would happen but it does, maybe debug it later
+                continue
+
+            for key in ['delta', 'gamma', 'theta', 'vega', 'rho', 'volatility', 'theoreticalVolatility']:
+                option_strategy[key] = primary_leg_option_chain[0][key]
+
+            viable_option_strategies.append(option_strategy)
+
+        # narrow it down
+        viable_option_strategies = filter(lambda strategy: strategy['delta'] > -0.175, viable_option_strategies)
+        # iv > hv ## is that actually what theoreticalVolatility and volatility are?
+        viable_option_strategies = filter(lambda strategy: strategy['theoreticalVolatility'] > strategy['volatility'], viable_option_strategies)
+        viable_option_strategies = list(viable_option_strategies)
+
+    with timer('rank'):
+        if not viable_option_strategies:
+            return []
+        # simulate every spread's payoff at expiration against shared underlying prices
+        candidates = simulate_candidates(spread_candidates(viable_option_strategies), iterations, seed=seed)
+
+        # look at the top five by expected profit per dollar at risk per day
+        candidates['score'] = spread_score(candidates)
+        return [(viable_option_strategies[index], candidates.loc[index]) for index in candidates['score'].dropna().nlargest(top).index]
+
+
+if __name__ == "__main__":
+    tda_client = get_client()
+
+    for the_one_strategy, candidate in scan(tda_client):
+        underlying_symbol = the_one_strategy['symbol']
+        print(f"The best strategy is: \n {the_one_strategy}")
+
+        theoretical_premium: float = (the_one_strategy['strategyAsk'] - the_one_strategy['strategyBid']) / 2 * 100
+        profit = theoretical_premium # - cost_to_open ## this ideally will account for the cost of the trade which will be higher for more complex positions
+        stake: float = (the_one_strategy['primaryLeg']['strikePrice'] - the_one_strategy['secondaryLeg']['strikePrice']) * 100
+        alpha: float = 0 # because I didn't do the hard part yet lol
+        delta: float = the_one_strategy['delta']
+        probability_of_profit = candidate['probability_of_profit']
+        expected_value = candidate['expected_pnl']
+        tail_loss = candidate['tail_loss']
+        days_to_expiration = the_one_strategy['daysToExpiration']
+        return_on_risk = (expected_value / stake) * 100
+        annualized_return = return_on_risk * (365 / days_to_expiration)
+
+        print(f"Sell vertical put spread on {underlying_symbol} to collect a ${theoretical_premium} premium for a stake of ${stake} per contract.")
+        print(f"Given a delta of {delta}, an alpha of {alpha}, and a profit of ${profit}, the expected value of this position is ${expected_value:.2f} per contract.")
+        print(f"It is profitable at expiration with a probability of {probability_of_profit:.2%}, and the worst 5% of outcomes average ${tail_loss:.2f} per contract.")
+        print(f"This represents a hypothetical gain of {return_on_risk:.2f}% over {days_to_expiration} days, or an annualized return of {annualized_return:.2f}%.")
@@ -1,12 +1,25 @@
 from backtesting import Backtest, Strategy
 from backtesting.lib import crossover
 from finta import TA
+import numpy as np
+import pandas as pd
 import yfinance
 
+from quacktrader.indicator_cache import cached
+from quacktrader.strategy.vectorized import threshold_signals, warmup
+
 
 class ChaikinTrend(Strategy):
     def init(self):
-        self.chaikin_oscillator = self.I(TA.CHAIKIN, self.data.df)
+        self.chaikin_oscillator = self.I(cached(TA.CHAIKIN), self.data.df)
+
+    @classmethod
+    def signals(cls, ohlc: pd.DataFrame) -> np.ndarray:
+        """The orders `next` places, for every bar at once"""
+        chaikin_oscillator = cached(TA.CHAIKIN)(ohlc).to_numpy()
+        with np.errstate(invalid='ignore'):
+            buy = chaikin_oscillator > 0
+        return threshold_signals(buy, ~buy, warmup(chaikin_oscillator))
 
     def next(self):
         if (self.chaikin_oscillator > 0):
@@ -14,12 +27,13 @@ class ChaikinTrend(Strategy):
         else:
             self.sell()
 
-goog = yfinance.Ticker('goog')
-ohlc = goog.history(interval='1d', start='2004-08-19', end='2013-03-01')
-bt = Backtest(ohlc, ChaikinTrend,
-              cash=10000, commission=.002,
-              exclusive_orders=True)
+if __name__ == "__main__":
+    goog = yfinance.Ticker('goog')
+    ohlc = goog.history(interval='1d', start='2004-08-19', end='2013-03-01')
+    bt = Backtest(ohlc, ChaikinTrend,
+                  cash=10000, commission=.002,
+                  exclusive_orders=True)
 
-output = bt.run()
-print(output)
-bt.plot()
\ No newline at end of file
+    output = bt.run()
+    print(output)
+    bt.plot()
\ No newline at end of file
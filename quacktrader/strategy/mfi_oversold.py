@@ -1,28 +1,46 @@
 from backtesting import Backtest, Strategy
 from backtesting.lib import crossover
 from finta import TA
+import numpy as np
+import pandas as pd
 import yfinance
 
+from quacktrader.indicator_cache import cached
+from quacktrader.strategy.vectorized import threshold_signals, warmup
+
 
 class MFIOversold(Strategy):
+    oversold = 20
+    overbought = 80
+
     def init(self):
-        self.mfi = self.I(TA.MFI, self.data.df)
+        self.mfi = self.I(cached(TA.MFI), self.data.df)
+
+    @classmethod
+    def signals(cls, ohlc: pd.DataFrame, oversold: float = None, overbought: float = None) -> np.ndarray:
+        """The orders `next` places, for every bar at once"""
+        mfi = cached(TA.MFI)(ohlc).to_numpy()
+        with np.errstate(invalid='ignore'):
+            buy = mfi < (cls.oversold if oversold is None else oversold)
+            sell = mfi > (cls.overbought if overbought is None else overbought)
+        return threshold_signals(buy, sell, warmup(mfi))
 
     def next(self):
-        if (self.mfi < 20):
+        if (self.mfi < self.oversold):
             # oversold
             self.buy()
-        elif (self.mfi > 80):
+        elif (self.mfi > self.overbought):
             # overbought
             self.sell()
 
 
-goog = yfinance.Ticker('goog')
-ohlc = goog.history(interval='1d', start='2004-08-19', end='2013-03-01')
-bt = Backtest(ohlc, MFIOversold,
-              cash=10000, commission=.002,
-              exclusive_orders=True)
+if __name__ == "__main__":
+    goog = yfinance.Ticker('goog')
+    ohlc = goog.history(interval='1d', start='2004-08-19', end='2013-03-01')
+    bt = Backtest(ohlc, MFIOversold,
+                  cash=10000, commission=.002,
+                  exclusive_orders=True)
 
-output = bt.run()
-print(output)
-bt.plot()
\ No newline at end of file
+    output = bt.run()
+    print(output)
+    bt.plot()
\ No newline at end of file
@@ -0,0 +1,171 @@
+from concurrent.futures import Executor, ProcessPoolExecutor
+import itertools
+import math
+import random
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Type
+from backtesting import Backtest, Strategy
+import pandas as pd
+
+from quacktrader.ohlc import SharedOHLC, SharedOHLCHandle, fingerprint
+
+Params = Dict[str, object]
+Constraint = Callable[[Params], bool]
+
+
+def scalar_stats(stats: pd.Series) -> Dict[str, object]:
+    """The summary numbers of a `Backtest.run()` result, without the equity curve, trades or strategy"""
+    return {key: value for key, value in stats.items() if not key.startswith('_')}
+
+
+def grid(space: Mapping[str, Sequence], constraint: Constraint = None) -> List[Params]:
+    """Every combination of the parameter values in `space` that satisfies `constraint`"""
+    names = list(space)
+    candidates = (dict(zip(names, values)) for values in itertools.product(*space.values()))
+    return [params for params in candidates if constraint is None or constraint(params)]
+
+
+def random_sample(space: Mapping[str, Sequence], n: int, seed: int = None, constraint: Constraint = None) -> List[Params]:
+    """Up to `n` distinct combinations drawn uniformly from the grid"""
+    candidates = grid(space, constraint)
+    return random.Random(seed).sample(candidates, min(n, len(candidates)))
+
+
+def _key(params: Params) -> Tuple:
+    return tuple(sorted(params.items()))
+
+
+def _strategy_key(strategy: Type[Strategy]) -> str:
+    return f"{strategy.__module__}.{strategy.__qualname__}"
+
+
+def _run_backtest(handle: SharedOHLCHandle, start: int, stop: int, strategy: Type[Strategy], params: Params, backtest_kwargs: dict) -> Dict[str, object]:
+    ohlc = handle.attach().iloc[start:stop]
+    return scalar_stats(Backtest(ohlc, strategy, **backtest_kwargs).run(**params))
+
+
+class Optimizer:
+    """
+    Search a strategy's parameters with `Backtest` evaluations spread across a process pool.
+
+    The OHLC frame is put in shared memory once and mapped by the workers, and every
+    evaluation is cached by (strategy, parameters, data fingerprint), so repeated
+    candidates in later searches are not run again.
+
+        >>> with Optimizer(ohlc, SmaCross, cash=10000, commission=.002, exclusive_orders=True) as optimizer:
+        ...     optimizer.grid_search(n1=range(5, 30, 5), n2=range(10, 70, 10), constraint=lambda p: p['n1'] < p['n2'])
+    """
+
+    def __init__(self, ohlc: pd.DataFrame, strategy: Type[Strategy], maximize: str = 'SQN', max_workers: int = None, **backtest_kwargs):
+        self.strategy = strategy
+        self.maximize = maximize
+        self.max_workers = max_workers
+        self.backtest_kwargs = backtest_kwargs
+        self.cache: Dict[Tuple, Dict[str, object]] = {}
+        self._ohlc = ohlc
+        self._shared: Optional[SharedOHLC] = None
+        self._executor: Optional[Executor] = None
+        self._fingerprints: Dict[Tuple[int, int], str] = {}
+
+    def __enter__(self) -> 'Optimizer':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Shut down the worker pool and release the shared OHLC frame"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._shared is not None:
+            self._shared.close()
+            self._shared = None
+
+    def grid_search(self, constraint: Constraint = None, **space: Sequence) -> pd.DataFrame:
+        """Evaluate every combination of the parameter values in `space`"""
+        return self._table(self.evaluate(grid(space, constraint)))
+
+    def random_search(self, n: int, seed: int = None, constraint: Constraint = None, **space: Sequence) -> pd.DataFrame:
+        """Evaluate `n` combinations drawn at random from `space`"""
+        return self._table(self.evaluate(random_sample(space, n, seed, constraint)))
+
+    def successive_halving(self, eta: int = 3, min_bars: int = 250, constraint: Constraint = None, **space: Sequence) -> pd.DataFrame:
+        """
+        Evaluate every combination on a short, recent slice of the history, keep the
+        best 1/`eta` of them and re-evaluate the survivors on an `eta` times longer
+        slice, until the last round runs on the whole history. No slice is shorter
+        than `min_bars`, which can leave more than one survivor in the last round.
+        """
+        candidates = grid(space, constraint)
+        if not candidates:
+            return self._table([])
+        bars = len(self._ohlc)
+        rounds = math.ceil(math.log(len(candidates), eta)) if len(candidates) > 1 else 0
+        # the shortest slice still has to be long enough to say something
+        rounds = min(rounds, int(math.log(bars / min_bars, eta))) if bars > min_bars else 0
+        results = []
+        for remaining in range(rounds, -1, -1):
+            window = bars // eta ** remaining
+            evaluated = self.evaluate(candidates, start=bars - window)
+            results.extend({**result, 'Bars': window} for result in evaluated)
+            ranked = sorted(evaluated, key=self._objective, reverse=True)
+            candidates = [{name: result[name] for name in candidates[0]} for result in ranked[:max(1, len(ranked) // eta)]]
+        table = self._table(results)
+        return table.sort_values(['Bars', self.maximize], ascending=False, na_position='last', kind='stable').reset_index(drop=True)
+
+    def evaluate(self, candidates: List[Params], start: int = 0, stop: int = None) -> List[Dict[str, object]]:
+        """Backtest each parameter set on `ohlc[start:stop]`, reusing cached results"""
+        stop = len(self._ohlc) if stop is None else stop
+        data_key = self._fingerprint(start, stop)
+        strategy_key = _strategy_key(self.strategy)
+        keys = [(strategy_key, _key(params), data_key) for params in candidates]
+
+        missing = {}
+        for key, params in zip(keys, candidates):
+            if key not in self.cache:
+                missing[key] = params
+        if missing:
+            handle = self._share()
+            stats = self._pool().map(
+                _run_backtest,
+                itertools.repeat(handle), itertools.repeat(start), itertools.repeat(stop),
+                itertools.repeat(self.strategy), missing.values(), itertools.repeat(self.backtest_kwargs),
+                chunksize=max(1, len(missing) // (4 * (self.max_workers or 8))))
+            for key, result in zip(missing, stats):
+                self.cache[key] = result
+
+        return [{**params, **self.cache[key]} for key, params in zip(keys, candidates)]
+
+    def best(self, candidates: List[Params], start: int = 0, stop: int = None) -> Dict[str, object]:
+        """The evaluation of `candidates` on `ohlc[start:stop]` that maximizes the objective, the first on ties"""
+        return max(self.evaluate(candidates, start, stop), key=self._objective)
+
+    def map(self, function: Callable, *iterables) -> Iterator:
+        """Run `function(handle, *args)` across the worker pool, `handle` mapping the shared OHLC frame"""
+        return self._pool().map(function, itertools.repeat(self._share()), *iterables)
+
+    def _objective(self, result: Mapping[str, object]) -> float:
+        value = result[self.maximize]
+        return -math.inf if value is None or value != value else value
+
+    def _table(self, results: List[Dict[str, object]]) -> pd.DataFrame:
+        table = pd.DataFrame(results)
+        if table.empty:
+            return table
+        return table.sort_values(self.maximize, ascending=False, na_position='last', kind='stable').reset_index(drop=True)
+
+    def _fingerprint(self, start: int, stop: int) -> str:
+        key = (start, stop)
+        if key not in self._fingerprints:
+            self._fingerprints[key] = fingerprint(self._ohlc.iloc[start:stop])
+        return self._fingerprints[key]
+
+    def _share(self) -> SharedOHLCHandle:
+        if self._shared is None:
+            self._shared = SharedOHLC(self._ohlc)
+        return self._shared.handle
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
@@ -0,0 +1,333 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import os
+from typing import Iterable, List, Tuple, Union
+import numpy as np
+import optopsy as op
+import pandas as pd
+
+from quacktrader.chain_archive import ChainArchive
+from quacktrader.riskmanager.probability_of_profit import simulate_candidates, spread_score
+from quacktrader.riskmanager.short_premium_riskmanager import CONTRACT_SIZE, ShortPremiumRiskManager
+
+# archived columns the selection rules look at
+COLUMNS = ['underlying', 'quote_date', 'symbol', 'expiry', 'dte', 'strike', 'bid', 'ask', 'mark', 'delta', 'gamma',
+           'vega', 'volatility', 'volume', 'in_the_money', 'underlying_price']
+
+TRADE_COLUMNS = ['underlying', 'symbol', 'hedge', 'strike', 'hedge_strike', 'quantity', 'entry_date', 'entry',
+                 'expiry', 'exit_date', 'exit', 'pnl', 'exit_reason']
+
+
+def _value(chain: pd.DataFrame) -> pd.Series:
+    """What a contract is worth: the mark, or the bid/ask midpoint where the data has no mark"""
+    return chain['mark'].fillna((chain['bid'] + chain['ask']) / 2)
+
+
+def _candidates(short: pd.DataFrame, long: pd.DataFrame = None) -> pd.DataFrame:
+    """Archived puts (and the long legs of spreads) as candidates for `simulate_candidates`"""
+    long_value = long['value'].to_numpy() if long is not None else 0.0
+    return pd.DataFrame({
+        'symbol': short['symbol'].to_numpy(),
+        'hedge': long['symbol'].to_numpy() if long is not None else None,
+        'underlying': short['underlying'].to_numpy(),
+        'underlying_price': short['underlying_price'].to_numpy(),
+        'short_strike': short['strike'].to_numpy(),
+        'long_strike': long['strike'].to_numpy() if long is not None else 0.0,
+        'credit': short['value'].to_numpy() - long_value,
+        'delta': short['delta'].to_numpy(),
+        'volatility': short['volatility'].to_numpy(),
+        'days_to_expiration': short['dte'].to_numpy(),
+        'expiry': short['expiry'].to_numpy(),
+    })
+
+
+@dataclass(frozen=True)
+class SellPuts:
+    """
+    The `sell_puts.py` rules: out-of-the-money puts that traded that day with a delta above
+    `min_delta`, ranked by simulated expected profit per dollar of collateral per day; one
+    contract each.
+    """
+    min_dte: int = 21
+    max_dte: int = 63
+    min_delta: float = -.175
+    buying_power: float = 1_000_000
+    iterations: int = 20_000
+    picks: int = 1
+
+    def select(self, chain: pd.DataFrame, seed=None) -> pd.DataFrame:
+        puts = chain[(chain['strike'] * CONTRACT_SIZE <= self.buying_power) & (chain['volume'] > 0)
+                     & ~chain['in_the_money'] & (chain['delta'] > self.min_delta)]
+        candidates = simulate_candidates(_candidates(puts), self.iterations, seed=seed)
+        candidates['score'] = (candidates['expected_pnl'] / (candidates['short_strike'] * CONTRACT_SIZE)
+                               / candidates['days_to_expiration'])
+        return candidates.loc[candidates['score'].dropna().nlargest(self.picks).index]
+
+    def quantity(self, candidate: pd.Series, equity: float) -> int:
+        return -1
+
+    def statistics(self, data: pd.DataFrame, **kwargs) -> pd.DataFrame:
+        return op.short_puts(data, **{'max_entry_dte': self.max_dte, **kwargs})
+
+
+@dataclass(frozen=True)
+class BuyUnitPuts:
+    """
+    The `buy_unit_puts.py` rules: affordable puts with a delta above `min_delta` and little gamma
+    or vega, the highest strike of them, bought with `stake` of equity.
+    """
+    min_dte: int = 14
+    max_dte: int = 74
+    min_delta: float = -.05
+    max_gamma: float = .02
+    max_vega: float = .02
+    buying_power: float = 1_000_000
+    stake: float = .02
+
+    def select(self, chain: pd.DataFrame, seed=None) -> pd.DataFrame:
+        puts = chain[(chain['value'] * CONTRACT_SIZE <= self.buying_power) & (chain['value'] > 0)
+                     & (chain['delta'] > self.min_delta) & (chain['gamma'] < self.max_gamma)
+                     & (chain['vega'] < self.max_vega)]
+        return _candidates(puts.nlargest(1, 'strike'))
+
+    def quantity(self, candidate: pd.Series, equity: float) -> int:
+        return int(equity * self.stake / (candidate['credit'] * CONTRACT_SIZE))
+
+    def statistics(self, data: pd.DataFrame, **kwargs) -> pd.DataFrame:
+        return op.long_puts(data, **{'max_entry_dte': self.max_dte, **kwargs})
+
+
+@dataclass(frozen=True)
+class SellVerticalPutSpread:
+    """
+    The `sell_vertical_put_spread.py` rules: put spreads `width` strikes wide whose legs both
+    traded that day, with an out-of-the-money short leg above `min_delta`, ranked by simulated
+    expected profit per dollar at risk per day; one contract each.
+    """
+    min_dte: int = 30
+    max_dte: int = 90
+    min_delta: float = -.175
+    width: int = 1
+    buying_power: float = 1_000_000
+    iterations: int = 20_000
+    picks: int = 1
+
+    def select(self, chain: pd.DataFrame, seed=None) -> pd.DataFrame:
+        puts = chain.sort_values(['underlying', 'expiry', 'strike'])
+        long = puts.groupby(['underlying', 'expiry'], sort=False).shift(self.width)
+        paired = long['symbol'].notna()
+        short, long = puts[paired], long[paired]
+        viable = ((short['strike'] - long['strike']) * CONTRACT_SIZE <= self.buying_power) \
+            & (short['volume'] > 0) & (long['volume'] > 0) & ~short['in_the_money'] \
+            & (short['delta'] > self.min_delta) & (short['value'] > long['value'])
+        candidates = simulate_candidates(_candidates(short[viable], long[viable]), self.iterations, seed=seed)
+        candidates['score'] = spread_score(candidates)
+        return candidates.loc[candidates['score'].dropna().nlargest(self.picks).index]
+
+    def quantity(self, candidate: pd.Series, equity: float) -> int:
+        return -1
+
+    def statistics(self, data: pd.DataFrame, **kwargs) -> pd.DataFrame:
+        return op.short_put_spread(data, **{'max_entry_dte': self.max_dte, **kwargs})
+
+
+Rule = Union[SellPuts, BuyUnitPuts, SellVerticalPutSpread]
+
+
+@dataclass
+class OptionsBacktestResult:
+    trades: pd.DataFrame
+    equity: pd.Series
+
+
+@dataclass(eq=False)
+class _Position:
+    candidate: pd.Series
+    quantity: int
+    entry_date: pd.Timestamp
+    value: float
+
+    @property
+    def collateral(self) -> float:
+        return (self.candidate['short_strike'] - self.candidate['long_strike']) * CONTRACT_SIZE * -self.quantity
+
+
+def _read_puts(archive: ChainArchive, underlyings: List[str], first, last, dte: Tuple[int, int]) -> pd.DataFrame:
+    chains = archive.read(underlyings, quote_dates=(first.date(), last.date()), dte=dte, put_call='PUT',
+                          columns=COLUMNS, latest_only=True)
+    return chains.assign(
+        symbol=chains['symbol'].astype(str),
+        quote_date=pd.to_datetime(chains['quote_date']),
+        expiry=pd.to_datetime(chains['expiry']),
+        in_the_money=chains['in_the_money'].fillna(False).astype(bool),
+        value=_value(chains))
+
+
+def _select_days(root: str, rule: Rule, underlyings: List[str], days: List[pd.Timestamp],
+                 seeds: List[int]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Apply `rule` to every day of a contiguous range of trading days, reading them in one scan"""
+    chains = _read_puts(ChainArchive(root), underlyings, days[0], days[-1], (rule.min_dte, rule.max_dte))
+    seeds = dict(zip(days, seeds))
+    selections = [rule.select(chain, seeds.get(quote_date)).assign(quote_date=quote_date)
+                  for quote_date, chain in chains.groupby('quote_date', sort=True)]
+    prices = chains.groupby(['quote_date', 'underlying'])['underlying_price'].first().unstack()
+    return (pd.concat(selections, ignore_index=True) if selections else pd.DataFrame()), prices
+
+
+def select_trades(rule: Rule, archive: ChainArchive, underlyings: Iterable[str], days: List[pd.Timestamp],
+                  seed=None, max_workers: int = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    The candidates `rule` picks on each of `days`, best first within a day, and the underlyings'
+    prices on those days. The rules look at one day's chain at a time, so the days are split into
+    contiguous ranges that worker processes read from the archive and evaluate independently.
+    Every day gets its own seed, so results don't depend on how the days are split.
+    """
+    underlyings = list(underlyings)
+    seeds = [int(state) for state in np.random.SeedSequence(seed).generate_state(len(days))]
+    chunks = np.array_split(np.arange(len(days)), min(len(days), 4 * (max_workers or os.cpu_count() or 1)))
+    chunks = [chunk for chunk in chunks if len(chunk)]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(
+            _select_days, [archive.root] * len(chunks), [rule] * len(chunks), [underlyings] * len(chunks),
+            [[days[i] for i in chunk] for chunk in chunks], [[seeds[i] for i in chunk] for chunk in chunks]))
+    selections = pd.concat([selection for selection, _ in results], ignore_index=True)
+    prices = pd.concat([prices for _, prices in results]).sort_index()
+    return selections, prices
+
+
+def _hedged(candidate: pd.Series) -> bool:
+    return isinstance(candidate['hedge'], str)
+
+
+def _settlement(position: _Position, price: float) -> float:
+    candidate = position.candidate
+    return max(candidate['short_strike'] - price, 0.0) - max(candidate['long_strike'] - price, 0.0)
+
+
+def backtest_options(rule: Rule, archive: ChainArchive, underlyings: Iterable[str], start=None, end=None,
+                     capital: float = 100_000, max_exposure: float = .5, max_positions: int = None,
+                     target_profit: float = None, stop_loss: float = None, commission: float = 0,
+                     seed=None, max_workers: int = None) -> OptionsBacktestResult:
+    """
+    Replay a scanner's selection rules over the archived chains of `underlyings`, the last
+    snapshot of each day, and manage the positions they open through expiry.
+
+    Selection runs in parallel across days (see `select_trades`); positions are then walked day
+    by day. Each day the picks are opened in rank order as long as fewer than `max_positions` are
+    open and, for short premium, the collateral stays within `max_exposure` of equity. Open
+    positions are marked to the archived marks, closed early at `target_profit` or `stop_loss`
+    (fractions of the credit, for short premium, see `ShortPremiumRiskManager`) and otherwise
+    settled at intrinsic value on the underlying's last price at or before expiration.
+    `commission` is charged per contract and leg, on entry and early exits.
+
+    Returns every trade, with 'open' ones marked at the last day, and the daily equity curve.
+    """
+    underlyings = list(underlyings)
+    days = sorted(set().union(*(archive.quote_dates(underlying) for underlying in underlyings)))
+    days = [day for day in days if (start is None or day >= pd.Timestamp(start)) and (end is None or day <= pd.Timestamp(end))]
+    if not days:
+        raise ValueError(f"the archive has no chains for {underlyings} between {start} and {end}")
+
+    selections, prices = select_trades(rule, archive, underlyings, days, seed, max_workers)
+    marks = pd.DataFrame(index=pd.DatetimeIndex(days))
+    if not selections.empty:
+        symbols = set(selections['symbol']) | set(selections['hedge'].dropna())
+        quotes = archive.read(underlyings, quote_dates=(days[0].date(), days[-1].date()), symbols=symbols,
+                              columns=['quote_date', 'symbol', 'mark', 'bid', 'ask'], latest_only=True)
+        quotes = quotes.assign(symbol=quotes['symbol'].astype(str), quote_date=pd.to_datetime(quotes['quote_date']))
+        marks = quotes.assign(value=_value(quotes)).pivot_table(index='quote_date', columns='symbol', values='value')
+        picks = dict(tuple(selections.groupby('quote_date', sort=False)))
+    else:
+        picks = {}
+
+    manager = ShortPremiumRiskManager(capital, max_exposure=max_exposure,
+                                      target_profit=target_profit or np.inf, stop_loss=stop_loss or np.inf)
+    cash, positions, trades, equity = float(capital), [], [], []
+
+    def close(position: _Position, day, value: float, reason: str, fee: float = 0):
+        nonlocal cash
+        cash += position.quantity * value * CONTRACT_SIZE - fee
+        candidate = position.candidate
+        trades.append({
+            'underlying': candidate['underlying'], 'symbol': candidate['symbol'], 'hedge': candidate['hedge'],
+            'strike': candidate['short_strike'], 'hedge_strike': candidate['long_strike'],
+            'quantity': position.quantity, 'entry_date': position.entry_date, 'entry': candidate['credit'],
+            'expiry': candidate['expiry'], 'exit_date': day, 'exit': value,
+            'pnl': position.quantity * (value - candidate['credit']) * CONTRACT_SIZE, 'exit_reason': reason})
+
+    def fee(position: _Position) -> float:
+        return commission * abs(position.quantity) * (2 if _hedged(position.candidate) else 1)
+
+    for day in days:
+        quotes = marks.loc[day] if day in marks.index else pd.Series(dtype=float)
+        for position in list(positions):
+            candidate = position.candidate
+            if day >= candidate['expiry']:
+                price = prices[candidate['underlying']].loc[:candidate['expiry']].dropna()
+                if not price.empty:
+                    positions.remove(position)
+                    close(position, candidate['expiry'], _settlement(position, price.iloc[-1]), 'expired')
+                continue
+            value = quotes.get(candidate['symbol'], np.nan)
+            if _hedged(candidate):
+                value -= quotes.get(candidate['hedge'], np.nan)
+            if np.isnan(value):
+                continue
+            position.value = value
+            if position.quantity < 0 and manager.has_reached_target_profit(candidate['credit'], value):
+                positions.remove(position)
+                close(position, day, value, 'target', fee(position))
+            elif position.quantity < 0 and manager.has_reached_max_allowed_loss(candidate['credit'], value):
+                positions.remove(position)
+                close(position, day, value, 'stop', fee(position))
+
+        worth = cash + sum(position.quantity * position.value * CONTRACT_SIZE for position in positions)
+        manager.capital = worth
+        manager.exposure = sum(position.collateral for position in positions if position.quantity < 0)
+        for _, candidate in picks.get(day, pd.DataFrame()).iterrows():
+            if max_positions is not None and len(positions) >= max_positions:
+                break
+            quantity = rule.quantity(candidate, worth)
+            if quantity == 0:
+                continue
+            if quantity < 0 and manager.is_overexposed(candidate['short_strike'], candidate['long_strike'], -quantity):
+                continue
+            position = _Position(candidate, quantity, day, candidate['credit'])
+            positions.append(position)
+            cash -= quantity * candidate['credit'] * CONTRACT_SIZE + fee(position)
+            manager.exposure += position.collateral if quantity < 0 else 0
+        equity.append(cash + sum(position.quantity * position.value * CONTRACT_SIZE for position in positions))
+
+    for position in positions:
+        close(position, pd.NaT, position.value, 'open')
+    trades = pd.DataFrame(trades, columns=TRADE_COLUMNS).sort_values('entry_date', kind='stable', ignore_index=True)
+    return OptionsBacktestResult(trades,
+                                 pd.Series(equity, index=pd.DatetimeIndex(days), name='Equity'))
+
+
+def optopsy_chains(chains: pd.DataFrame) -> pd.DataFrame:
+    """Archived chains in the standardized columns optopsy's strategies take"""
+    return pd.DataFrame({
+        'underlying_symbol': chains['underlying'].astype(str).to_numpy(),
+        'underlying_price': chains['underlying_price'].astype(float).to_numpy(),
+        'option_type': chains['put_call'].astype(str).str[0].str.lower().to_numpy(),
+        'expiration': pd.to_datetime(chains['expiry']).to_numpy(),
+        'quote_date': pd.to_datetime(chains['quote_date']).to_numpy(),
+        'strike': chains['strike'].astype(float).to_numpy(),
+        'bid': chains['bid'].astype(float).to_numpy(),
+        'ask': chains['ask'].astype(float).to_numpy(),
+    })
+
+
+def strategy_statistics(rule: Rule, archive: ChainArchive, underlyings: Iterable[str], start=None, end=None,
+                        **kwargs) -> pd.DataFrame:
+    """
+    optopsy's statistics of the rule's strategy over the archived chains, every contract entered
+    up to the rule's maximum DTE and held to expiration, bucketed by DTE and moneyness. Useful to
+    see where in the chain the edge is before tuning a rule's filters; `kwargs` go to optopsy.
+    """
+    bounds = tuple(None if bound is None else pd.Timestamp(bound).date() for bound in (start, end))
+    chains = archive.read(list(underlyings), quote_dates=bounds, dte=(0, rule.max_dte), put_call='PUT',
+                          columns=['underlying', 'quote_date', 'put_call', 'expiry', 'strike', 'bid', 'ask',
+                                   'underlying_price'], latest_only=True)
+    return rule.statistics(optopsy_chains(chains), **kwargs)
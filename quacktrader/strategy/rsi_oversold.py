@@ -1,28 +1,46 @@
 from backtesting import Backtest, Strategy
 from backtesting.lib import crossover
 from finta import TA
+import numpy as np
+import pandas as pd
 import yfinance
 
+from quacktrader.indicator_cache import cached
+from quacktrader.strategy.vectorized import threshold_signals, warmup
+
 
 class RSIOversold(Strategy):
+    oversold = 30
+    overbought = 70
+
     def init(self):
-        self.rsi = self.I(TA.RSI, self.data.df)
+        self.rsi = self.I(cached(TA.RSI), self.data.df)
+
+    @classmethod
+    def signals(cls, ohlc: pd.DataFrame, oversold: float = None, overbought: float = None) -> np.ndarray:
+        """The orders `next` places, for every bar at once"""
+        rsi = cached(TA.RSI)(ohlc).to_numpy()
+        with np.errstate(invalid='ignore'):
+            buy = rsi < (cls.oversold if oversold is None else oversold)
+            sell = rsi > (cls.overbought if overbought is None else overbought)
+        return threshold_signals(buy, sell, warmup(rsi))
 
     def next(self):
-        if (self.rsi < 30):
+        if (self.rsi < self.oversold):
             # oversold
             self.buy()
-        elif (self.rsi > 70):
+        elif (self.rsi > self.overbought):
             # overbought
             self.sell()
 
 
-goog = yfinance.Ticker('goog')
-ohlc = goog.history(interval='1d', start='2004-08-19', end='2013-03-01')
-bt = Backtest(ohlc, RSIOversold,
-              cash=10000, commission=.002,
-              exclusive_orders=True)
+if __name__ == "__main__":
+    goog = yfinance.Ticker('goog')
+    ohlc = goog.history(interval='1d', start='2004-08-19', end='2013-03-01')
+    bt = Backtest(ohlc, RSIOversold,
+                  cash=10000, commission=.002,
+                  exclusive_orders=True)
 
-output = bt.run()
-print(output)
-bt.plot()
\ No newline at end of file
+    output = bt.run()
+    print(output)
+    bt.plot()
\ No newline at end of file
@@ -0,0 +1,86 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import itertools
+import os
+from typing import Callable, Dict, Iterable, Iterator, Sequence, Tuple, Type
+from backtesting import Backtest, Strategy
+import pandas as pd
+import yfinance
+
+from quacktrader.strategy.optimizer import scalar_stats
+
+Window = Tuple[str, str]
+Loader = Callable[[str, str, str], pd.DataFrame]
+
+
+def load_history(symbol: str, start: str, end: str) -> pd.DataFrame:
+    """Daily bars from yahoo finance, the same history the strategy scripts backtest on"""
+    return yfinance.Ticker(symbol).history(interval='1d', start=start, end=end)
+
+
+def _backtest(strategy: Type[Strategy], symbol: str, window: Window, loader: Loader, params: dict, backtest_kwargs: dict) -> Dict[str, object]:
+    # only the summary numbers leave the worker, the equity curve and trades die with the Backtest
+    start, end = window
+    result = {'Symbol': symbol, 'From': start, 'To': end}
+    try:
+        ohlc = loader(symbol, start, end)
+        if ohlc.empty:
+            return {**result, 'Error': 'no data'}
+        return {**result, **scalar_stats(Backtest(ohlc, strategy, **backtest_kwargs).run(**params))}
+    except Exception as e:
+        return {**result, 'Error': repr(e)}
+
+
+def run_universe(strategy: Type[Strategy], symbols: Iterable[str], windows: Sequence[Window], loader: Loader = load_history,
+                 params: dict = None, max_workers: int = None, max_pending: int = None, **backtest_kwargs) -> Iterator[Dict[str, object]]:
+    """
+    Backtest `strategy` on every symbol and window across a process pool, yielding each
+    result as soon as its worker finishes. At most `max_pending` backtests are queued at
+    a time, so memory stays flat however many symbols are scanned. A symbol that fails
+    to load or backtest yields a row with an 'Error' instead of stopping the scan.
+
+        >>> for result in run_universe(ChaikinTrend, ['goog', 'msft'], [('2004-08-19', '2013-03-01')], cash=10000, commission=.002, exclusive_orders=True):
+        ...     print(result['Symbol'], result['Return [%]'])
+    """
+    params = params or {}
+    max_workers = max_workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * max_workers
+    tasks = itertools.product(symbols, windows)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        def submit(task):
+            symbol, window = task
+            return executor.submit(_backtest, strategy, symbol, window, loader, params, backtest_kwargs)
+
+        pending = {submit(task) for task in itertools.islice(tasks, max_pending)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+            pending |= {submit(task) for task in itertools.islice(tasks, len(done))}
+
+
+def summarize_universe(results: Iterable[Dict[str, object]]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Collect results from `run_universe` into a table with one row per symbol and window,
+    and a cross-sectional summary (count, mean, std, quartiles) of every numeric statistic.
+    """
+    table = pd.DataFrame(list(results))
+    if table.empty:
+        return table, pd.DataFrame()
+    table = table.set_index(['Symbol', 'From', 'To']).sort_index()
+    if 'Error' in table:
+        succeeded = table[table['Error'].isna()]
+    else:
+        succeeded = table
+    summary = succeeded.select_dtypes('number').describe().T
+    return table, summary
+
+
+if __name__ == "__main__":
+    from quacktrader.strategy.chaikin_trend import ChaikinTrend
+
+    results = run_universe(ChaikinTrend, ['goog', 'msft', 'aapl', 'amzn'], [('2004-08-19', '2013-03-01')],
+                           cash=10000, commission=.002, exclusive_orders=True)
+    table, summary = summarize_universe(results)
+    print(table)
+    print(summary)
@@ -0,0 +1,132 @@
+from dataclasses import dataclass
+import sys
+from typing import Tuple, Type
+from backtesting import Strategy
+from backtesting._stats import compute_stats
+import numpy as np
+import pandas as pd
+
+from quacktrader.weatherman.backfill import crossovers
+
+# the fraction of equity `Strategy.buy()` and `sell()` order by default
+FULL_EQUITY = 1 - sys.float_info.epsilon
+
+
+def warmup(*indicators) -> int:
+    """
+    The first bar `Backtest.run()` calls `next()` on: one past the bar where
+    the slowest indicator stops being NaN, so there are always two values to compare.
+    """
+    return 1 + max((int(np.isnan(np.asarray(indicator, dtype=float)).argmin()) for indicator in indicators), default=0)
+
+
+def threshold_signals(buy: np.ndarray, sell: np.ndarray, start: int) -> np.ndarray:
+    """Orders placed by a `next()` that buys on `buy`, else sells on `sell`: 1, -1 or 0 per bar"""
+    signals = np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8)
+    signals[:start] = 0
+    return signals
+
+
+@dataclass
+class VectorizedResult:
+    equity: pd.Series
+    trades: pd.DataFrame
+
+
+def _whole_unit_sizes(direction: np.ndarray, entry_prices: np.ndarray, exit_prices: np.ndarray,
+                      cash: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Each trade's size in whole units and the equity it was sized from, the way `Backtest` sizes
+    an order for all available equity. Each size depends on the trades before it, so this walks
+    the trades, not the bars.
+    """
+    sizes = np.zeros(len(direction))
+    entry_equity = np.empty(len(direction))
+    equity = float(cash)
+    for trade in range(len(direction)):
+        entry_equity[trade] = equity
+        sizes[trade] = direction[trade] * (max(equity, 0) * FULL_EQUITY // entry_prices[trade])
+        equity += sizes[trade] * (exit_prices[trade] - entry_prices[trade])
+    return sizes, entry_equity
+
+
+def vectorized_backtest(ohlc: pd.DataFrame, signals: np.ndarray, cash: float = 10_000, commission: float = .0,
+                        whole_units: bool = False) -> VectorizedResult:
+    """
+    Replay the orders of a signal-defined strategy the way `Backtest(..., exclusive_orders=True)`
+    fills them, as whole-array operations instead of a `next()` call per bar.
+
+    `signals` holds the order placed at the close of each bar: 1 to buy, -1 to sell, 0 for none.
+    Every order closes the open trade and opens a new one with all available equity at the next
+    bar's open, paying `commission` on entry. Orders placed on the last bar and the final
+    liquidation fill at the last bar's open, as they do in `Backtest.run()`.
+
+    Positions are sized in fractional units unless `whole_units`, which rounds them down like
+    `Backtest.run()` does (and skips orders that can't afford a single unit); that only matters
+    when `cash` is small next to the price.
+    """
+    signals = np.asarray(signals)
+    opens = ohlc['Open'].to_numpy(dtype=float)
+    closes = ohlc['Close'].to_numpy(dtype=float)
+    bars = len(closes)
+
+    signal_bars = np.flatnonzero(signals)
+    entry_bars = np.minimum(signal_bars + 1, bars - 1)
+    direction = signals[signal_bars].astype(float)
+    entry_prices = opens[entry_bars] * (1 + direction * commission)
+
+    # each trade is closed by the next one, at that one's unadjusted open, or liquidated at the
+    # last open; a trade opened by an order on the last bar is still open at the end
+    still_open = len(signal_bars) > 0 and signal_bars[-1] == bars - 1
+    exit_bars = np.append(entry_bars[1:], bars - 1)
+    exit_prices = opens[exit_bars]
+    growth = 1 + direction * (exit_prices / entry_prices - 1)
+    closed = len(growth) - still_open
+
+    if whole_units:
+        size, entry_equity = _whole_unit_sizes(direction, entry_prices, exit_prices, cash)
+    else:
+        entry_equity = cash * np.concatenate(([1.], np.cumprod(growth[:-1])))
+        size = direction * entry_equity / entry_prices
+    pnl = size * (exit_prices - entry_prices)
+
+    # equity at each bar's close, marked to market against the trade open at that bar
+    active = np.searchsorted(entry_bars, np.arange(bars), side='right') - 1
+    equity = np.full(bars, float(cash))
+    holding = active >= 0
+    trade = active[holding]
+    equity[holding] = entry_equity[trade] + size[trade] * (closes[holding] - entry_prices[trade])
+    if not still_open:
+        equity[-1] = cash + pnl[:closed].sum()
+
+    busted = np.flatnonzero(equity <= 0)
+    if len(busted):
+        equity[busted[0]:] = 0
+        closed = min(closed, int(np.searchsorted(exit_bars, busted[0], side='left')))
+
+    # orders too small for a single unit never became trades
+    kept = np.flatnonzero(size[:closed] != 0)
+    index = ohlc.index
+    trades = pd.DataFrame({
+        'Size': size[kept],
+        'EntryBar': entry_bars[kept],
+        'ExitBar': exit_bars[kept],
+        'EntryPrice': entry_prices[kept],
+        'ExitPrice': exit_prices[kept],
+        'PnL': pnl[kept],
+        'ReturnPct': (growth - 1)[kept],
+        'EntryTime': index[entry_bars[kept]],
+        'ExitTime': index[exit_bars[kept]],
+    })
+    trades['Duration'] = trades['ExitTime'] - trades['EntryTime']
+    return VectorizedResult(pd.Series(equity, index=index, name='Equity'), trades)
+
+
+def run_vectorized(ohlc: pd.DataFrame, strategy: Type[Strategy], cash: float = 10_000, commission: float = .0, **params) -> pd.Series:
+    """
+    Backtest a strategy that defines its orders with a `signals(ohlc, **params)` classmethod,
+    returning the same statistics as `Backtest(ohlc, strategy, cash=cash, commission=commission,
+    exclusive_orders=True).run(**params)`.
+    """
+    result = vectorized_backtest(ohlc, strategy.signals(ohlc, **params), cash, commission, whole_units=True)
+    return compute_stats(trades=result.trades, equity=result.equity.to_numpy(), ohlc_data=ohlc, strategy_instance=strategy)
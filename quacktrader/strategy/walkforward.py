@@ -0,0 +1,102 @@
+from dataclasses import dataclass
+from typing import List, Sequence, Type
+from backtesting import Backtest, Strategy
+import pandas as pd
+
+from quacktrader.ohlc import SharedOHLCHandle
+from quacktrader.strategy.optimizer import Constraint, Optimizer, Params, grid
+
+
+@dataclass(frozen=True)
+class Fold:
+    train_start: int
+    train_stop: int
+    test_start: int
+    test_stop: int
+
+
+@dataclass
+class WalkForwardResult:
+    folds: pd.DataFrame
+    equity: pd.Series
+
+
+def make_folds(bars: int, train: int, test: int, anchored: bool = False) -> List[Fold]:
+    """
+    Split `bars` into consecutive train/test folds. Rolling folds train on the `train`
+    bars right before each test segment; anchored folds train on everything before it.
+    The last test segment may be shorter than `test`.
+    """
+    folds = []
+    for test_start in range(train, bars, test):
+        train_start = 0 if anchored else test_start - train
+        folds.append(Fold(train_start, test_start, test_start, min(test_start + test, bars)))
+    return folds
+
+
+def _run_test(handle: SharedOHLCHandle, fold: Fold, strategy: Type[Strategy], params: Params, warmup: int,
+              backtest_kwargs: dict) -> dict:
+    # the test run starts `warmup` bars early so the indicators are primed on the first test bar
+    start = max(0, fold.test_start - warmup)
+    stats = Backtest(handle.attach().iloc[start:fold.test_stop], strategy, **backtest_kwargs).run(**params)
+    equity = stats._equity_curve['Equity']
+    offset = fold.test_start - start
+    before = equity.iloc[offset - 1] if offset else equity.iloc[0]
+    test_equity = equity.iloc[offset:]
+    trades = stats._trades
+    returns = test_equity.pct_change()
+    returns.iloc[0] = test_equity.iloc[0] / before - 1
+
+    return {
+        'Test Return [%]': (test_equity.iloc[-1] / before - 1) * 100,
+        '# Test Trades': int((trades['EntryBar'] >= offset).sum()),
+        'returns': returns,
+    }
+
+
+def walk_forward(ohlc: pd.DataFrame, strategy: Type[Strategy], train: int, test: int, anchored: bool = False,
+                 maximize: str = 'SQN', constraint: Constraint = None, warmup: int = 0, max_workers: int = None,
+                 backtest_kwargs: dict = None, **space: Sequence) -> WalkForwardResult:
+    """
+    Walk-forward analysis of `strategy` over `ohlc`: grid-search the parameters in `space`
+    on each train segment, backtest the best of them on the test segment that follows, and
+    chain the out-of-sample test returns into one equity curve. Each train segment is searched
+    by an `Optimizer`, whose process pool maps the OHLC frame from shared memory and whose
+    cache keeps any (parameters, segment) pair from being backtested twice; the test segments
+    then run in parallel on the same pool.
+
+    `warmup` bars before each test segment are replayed with it so indicators have values
+    from the first test bar; any position they open carries into the test segment.
+
+        >>> result = walk_forward(ohlc, SmaCross, train=750, test=250, warmup=50,
+        ...                       backtest_kwargs=dict(cash=10000, commission=.002, exclusive_orders=True),
+        ...                       n1=range(5, 30, 5), n2=range(10, 70, 10), constraint=lambda p: p['n1'] < p['n2'])
+    """
+    backtest_kwargs = backtest_kwargs or {}
+    folds = make_folds(len(ohlc), train, test, anchored)
+    if not folds:
+        raise ValueError(f"{len(ohlc)} bars are not enough for a {train} bar train segment and a test segment")
+    candidates = grid(space, constraint)
+    if not candidates:
+        raise ValueError("no parameter combination satisfies the constraint")
+
+    with Optimizer(ohlc, strategy, maximize, max_workers, **backtest_kwargs) as optimizer:
+        trained = [optimizer.best(candidates, fold.train_start, fold.train_stop) for fold in folds]
+        best = [{name: result[name] for name in candidates[0]} for result in trained]
+        results = list(optimizer.map(
+            _run_test, folds, [strategy] * len(folds), best, [warmup] * len(folds), [backtest_kwargs] * len(folds)))
+
+    returns = pd.concat([result.pop('returns') for result in results])
+    returns.index = ohlc.index[folds[0].test_start:folds[-1].test_stop]
+    cash = backtest_kwargs.get('cash', 10_000)
+    equity = (cash * (1 + returns).cumprod()).rename('Equity')
+
+    table = pd.DataFrame([{
+        'Train Start': ohlc.index[fold.train_start],
+        'Test Start': ohlc.index[fold.test_start],
+        'Test End': ohlc.index[fold.test_stop - 1],
+        **params,
+        f'Train {maximize}': result[maximize],
+        **test_result,
+    } for fold, params, result, test_result in zip(folds, best, trained, results)])
+    return WalkForwardResult(table, equity)
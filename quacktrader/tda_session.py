@@ -0,0 +1,258 @@
+import fcntl
+import importlib.util
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+import anyio
+import httpx
+from authlib.integrations.httpx_client import AsyncOAuth2Client, OAuth2Client
+from authlib.oauth2.rfc6749 import OAuth2Token
+from tda import auth
+from tda.client import AsyncClient, Client
+from tda.debug import register_redactions
+
+from quacktrader.constants import (TDA_API_KEY, TDA_KEEPALIVE_EXPIRY, TDA_MAX_CONNECTIONS,
+                                   TDA_MAX_KEEPALIVE_CONNECTIONS, TDA_REDIRECT_URI, TDA_TOKEN_PATH)
+from quacktrader.moneymanager.account_state import AccountState
+
+# httpx negotiates HTTP/2 only with the optional h2 package installed
+HTTP2 = importlib.util.find_spec('h2') is not None
+# tda-api's default: within the refresh token's 90 day lifetime, but rarely enough not to trip TDA's limits
+REFRESH_TOKEN_UPDATE_INTERVAL = 60 * 60 * 24 * 85
+
+
+class TokenFile:
+    """
+    The token file at `path`, shared by every process that uses the same `TDA_TOKEN_PATH`.
+    Writes replace the file atomically, so readers never see half a token, and `acquire` takes
+    an exclusive lock on a sibling `.lock` file that workers hold while they refresh.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock_path = path + '.lock'
+
+    def read(self) -> dict:
+        with open(self.path) as file:
+            return json.load(file)
+
+    def write(self, token: dict, *args, **kwargs):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.tda-token-', suffix='.json')
+        try:
+            with os.fdopen(descriptor, 'w') as file:
+                json.dump(token, file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def acquire(self) -> int:
+        """Block until this process holds the lock, returning the descriptor to `release`"""
+        descriptor = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(descriptor, fcntl.LOCK_EX)
+        return descriptor
+
+    def release(self, descriptor: int):
+        fcntl.flock(descriptor, fcntl.LOCK_UN)
+        os.close(descriptor)
+
+
+def _unwrap(token: dict) -> dict:
+    return token['token'] if auth.TokenMetadata.is_metadata_aware_token(token) else token
+
+
+class SharedTokenMetadata(auth.TokenMetadata):
+    """
+    Metadata of a token in a `TokenFile` that other workers update too. Every refresh re-reads the
+    file under its lock and adopts a token another worker already wrote, and the refresh token is
+    rotated in place on the pooled session instead of on a new one.
+    """
+
+    def __init__(self, creation_timestamp: Optional[int], token_file: TokenFile):
+        super().__init__(creation_timestamp, token_file.write)
+        self.token_file = token_file
+
+    @classmethod
+    def from_token_file(cls, token_file: TokenFile) -> Tuple['SharedTokenMetadata', dict]:
+        """The metadata of the stored token, and the token itself"""
+        token = token_file.read()
+        return cls(token.get('creation_timestamp'), token_file), _unwrap(token)
+
+    def adopt_stored_token(self, session) -> bool:
+        """Switch `session` to the stored token if another worker wrote a different, unexpired one"""
+        stored = self.token_file.read()
+        token = OAuth2Token.from_dict(_unwrap(stored))
+        if token.get('access_token') == session.token.get('access_token') or token.is_expired():
+            return False
+        register_redactions(token)
+        session.token = token
+        self.creation_timestamp = stored.get('creation_timestamp', self.creation_timestamp)
+        return True
+
+    def _is_due(self, update_interval_seconds: float) -> bool:
+        return self.creation_timestamp is None or time.time() - self.creation_timestamp > update_interval_seconds
+
+    def ensure_refresh_token_update(self, api_key, session, update_interval_seconds=None):
+        if update_interval_seconds is None:
+            update_interval_seconds = REFRESH_TOKEN_UPDATE_INTERVAL
+        if not self._is_due(update_interval_seconds):
+            return None
+        descriptor = self.token_file.acquire()
+        try:
+            # another worker may have rotated it while this one waited for the lock
+            if self.adopt_stored_token(session) and not self._is_due(update_interval_seconds):
+                return None
+            params = dict(grant_type='refresh_token', refresh_token=session.token['refresh_token'],
+                          access_type='offline')
+            if isinstance(session, AsyncOAuth2Client):
+                # tda-api checks this synchronously, even for its async client
+                with OAuth2Client(session.client_id) as oauth:
+                    session.token = oauth.fetch_token(auth.TOKEN_ENDPOINT, **params)
+            else:
+                session.fetch_token(auth.TOKEN_ENDPOINT, **params)
+            register_redactions(session.token)
+            self.creation_timestamp = int(time.time())
+            self.wrapped_token_write_func()(session.token)
+            return session
+        finally:
+            self.token_file.release(descriptor)
+
+
+class SharedTokenOAuth2Client(OAuth2Client):
+    """
+    A pooled OAuth2 session whose expired tokens are refreshed at most once across every thread
+    and process sharing the token file: the refresh happens under the file's lock, after checking
+    whether another worker already wrote a fresh token.
+    """
+
+    def __init__(self, api_key: str, token_metadata: SharedTokenMetadata, **kwargs):
+        super().__init__(api_key, **kwargs)
+        self.token_metadata = token_metadata
+        self._refresh_lock = threading.Lock()
+
+    def ensure_active_token(self, token):
+        if not self.token.is_expired():
+            return True
+        with self._refresh_lock:
+            if not self.token.is_expired():
+                return True
+            descriptor = self.token_metadata.token_file.acquire()
+            try:
+                return self.token_metadata.adopt_stored_token(self) or super().ensure_active_token(self.token)
+            finally:
+                self.token_metadata.token_file.release(descriptor)
+
+
+class SharedTokenAsyncOAuth2Client(AsyncOAuth2Client):
+    """The asyncio counterpart of `SharedTokenOAuth2Client`, waiting for the file lock in a thread"""
+
+    def __init__(self, api_key: str, token_metadata: SharedTokenMetadata, **kwargs):
+        super().__init__(api_key, **kwargs)
+        self.token_metadata = token_metadata
+
+    async def ensure_active_token(self, token):
+        async with self._token_refresh_lock:
+            if not self.token.is_expired():
+                return
+            token_file = self.token_metadata.token_file
+            descriptor = await anyio.to_thread.run_sync(token_file.acquire)
+            try:
+                if not self.token_metadata.adopt_stored_token(self):
+                    await self.refresh_token(self.metadata['token_endpoint'],
+                                             refresh_token=self.token.get('refresh_token'))
+            finally:
+                token_file.release(descriptor)
+
+
+def pool_limits(max_connections: int = TDA_MAX_CONNECTIONS,
+                max_keepalive_connections: int = TDA_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry: float = TDA_KEEPALIVE_EXPIRY) -> httpx.Limits:
+    return httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections,
+                        keepalive_expiry=keepalive_expiry)
+
+
+def client_from_token_path(token_path: str = TDA_TOKEN_PATH, api_key: str = TDA_API_KEY, asyncio: bool = False,
+                           limits: httpx.Limits = None, http2: bool = HTTP2,
+                           enforce_enums: bool = True) -> Union[Client, AsyncClient]:
+    """
+    Like `auth.client_from_token_file`, but on a keep-alive connection pool bounded by `limits`,
+    over HTTP/2 where available, and refreshing the token safely alongside other workers.
+    """
+    metadata, token = SharedTokenMetadata.from_token_file(TokenFile(token_path))
+    register_redactions(token)
+    api_key = auth._normalize_api_key(api_key)
+    write_token = metadata.wrapped_token_write_func()
+
+    if asyncio:
+        async def update_token(token, *args, **kwargs):
+            write_token(token, *args, **kwargs)
+        session_class, client_class = SharedTokenAsyncOAuth2Client, AsyncClient
+    else:
+        update_token = write_token
+        session_class, client_class = SharedTokenOAuth2Client, Client
+
+    session = session_class(api_key, metadata, token=token, token_endpoint=auth.TOKEN_ENDPOINT,
+                            update_token=update_token, limits=limits or pool_limits(), http2=http2)
+    return client_class(api_key, session, token_metadata=metadata, enforce_enums=enforce_enums)
+
+
+_clients: Dict[bool, Union[Client, AsyncClient]] = {}
+_account_state: Optional[AccountState] = None
+_lock = threading.Lock()
+
+
+def _client(asyncio: bool) -> Union[Client, AsyncClient]:
+    with _lock:
+        if asyncio not in _clients:
+            if not os.path.exists(TDA_TOKEN_PATH):
+                # go through the oauth2 workflow manually, but with a little help
+                auth.client_from_manual_flow(TDA_API_KEY, TDA_REDIRECT_URI, TDA_TOKEN_PATH).session.close()
+            _clients[asyncio] = client_from_token_path(TDA_TOKEN_PATH, TDA_API_KEY, asyncio=asyncio)
+        return _clients[asyncio]
+
+
+def get_client() -> Client:
+    """The process-wide client, created on first use and then shared by every caller and thread"""
+    return _client(asyncio=False)
+
+
+def get_account_state(tda_client: Client = None) -> AccountState:
+    """
+    The process-wide account state over the shared client, so the money managers and scanners
+    reuse one snapshot and wait on one in-flight request. Any other `tda_client` gets its own.
+    """
+    global _account_state
+    tda_client = tda_client or get_client()
+    with _lock:
+        if tda_client is not _clients.get(False):
+            return AccountState(tda_client)
+        if _account_state is None or _account_state.tda_client is not tda_client:
+            _account_state = AccountState(tda_client)
+        return _account_state
+
+
+def get_async_client() -> AsyncClient:
+    """The process-wide asyncio client; its connections belong to the event loop that first uses them"""
+    return _client(asyncio=True)
+
+
+def close():
+    """Close the shared sync client's connections, so the next `get_client` starts a new pool"""
+    with _lock:
+        client: Optional[Client] = _clients.pop(False, None)
+    if client is not None:
+        client.session.close()
+
+
+async def aclose():
+    """Close the shared asyncio client's connections, so the next `get_async_client` starts a new pool"""
+    with _lock:
+        client: Optional[AsyncClient] = _clients.pop(True, None)
+    if client is not None:
+        await client.session.aclose()
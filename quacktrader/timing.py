@@ -0,0 +1,25 @@
+from contextlib import contextmanager
+import time
+from typing import Dict
+
+
+class StageTimer:
+    """
+    Wall-clock seconds spent in each named stage of a run, accumulated across
+    `with timer('fetch'): ...` blocks, in the order the stages first ran.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def __call__(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - start
+
+    @property
+    def total(self) -> float:
+        return sum(self.timings.values())
@@ -0,0 +1,96 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Mapping, Sequence
+from finta import TA
+import numpy as np
+import pandas as pd
+
+from quacktrader.indicator_cache import cached
+from quacktrader.weatherman.streaming import find_column
+
+TIMEFRAME_30D = np.timedelta64(30, 'D')
+TIMEFRAME_60D = np.timedelta64(60, 'D')
+
+
+def crossovers(series1: Sequence, series2: Sequence) -> np.ndarray:
+    """
+    Vectorized `crossover`: `True` at every position where `series1`
+    just crossed over (above) `series2`.
+    """
+    series1 = np.asarray(series1, dtype=float)
+    series2 = np.asarray(series2, dtype=float)
+    crossed = np.zeros(len(series1), dtype=bool)
+    # comparisons with an indicator's leading NaNs are simply False
+    with np.errstate(invalid='ignore'):
+        crossed[1:] = (series1[:-1] < series2[:-1]) & (series1[1:] > series2[1:])
+    return crossed
+
+
+def _directions(fast: Sequence, slow: Sequence) -> np.ndarray:
+    return np.where(crossovers(fast, slow), 1, np.where(crossovers(slow, fast), -1, 0))
+
+
+def backfill_forecasts(ohlc: pd.DataFrame) -> pd.DataFrame:
+    """
+    The forecast `Weatherman.make_forecast` would have made at every bar of `ohlc`,
+    computed in one pass over the history instead of once per date.
+    """
+    sma_50 = cached(TA.SMA)(ohlc, period=50, column='close')
+    sma_100 = cached(TA.SMA)(ohlc, period=100, column='close')
+    sma_200 = cached(TA.SMA)(ohlc, period=200, column='close')
+
+    direction_30d = _directions(sma_50, sma_100)
+    direction_60d = _directions(sma_50, sma_200)
+    # same precedence as make_forecast: the 60d forecast when both agree, the 30d one otherwise
+    agree = direction_30d == direction_60d
+    return pd.DataFrame({
+        'direction': np.where(agree, direction_60d, direction_30d),
+        'timeframe': np.where(agree, TIMEFRAME_60D, TIMEFRAME_30D),
+        'direction_30d': direction_30d,
+        'direction_60d': direction_60d,
+    }, index=ohlc.index)
+
+
+def score_forecasts(ohlc: pd.DataFrame, forecasts: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Score each forecast against the return realized over its timeframe, measured
+    from the close on the forecast date to the first close at least `timeframe` later.
+    Forecasts whose timeframe runs past the end of the history are left unscored.
+    """
+    if forecasts is None:
+        forecasts = backfill_forecasts(ohlc)
+    close = ohlc[find_column(ohlc, 'close')].to_numpy(dtype=float)
+
+    targets = ohlc.index + pd.to_timedelta(forecasts['timeframe'])
+    exits = ohlc.index.searchsorted(targets, side='left')
+    scored = exits < len(close)
+    realized_return = np.full(len(close), np.nan)
+    realized_return[scored] = close[exits[scored]] / close[scored] - 1
+
+    direction = forecasts['direction'].to_numpy()
+    hit = np.where(scored & (direction != 0), np.sign(realized_return) == direction, np.nan)
+    return forecasts.assign(realized_return=realized_return, hit=hit)
+
+
+def hit_rate(scored: pd.DataFrame) -> pd.Series:
+    """Summarize scored forecasts: how many calls were made, how often they were right and what they returned"""
+    calls = scored[scored['hit'].notna()]
+    signed_return = calls['direction'] * calls['realized_return']
+    return pd.Series({
+        'forecasts': len(calls),
+        'bullish': int((calls['direction'] > 0).sum()),
+        'bearish': int((calls['direction'] < 0).sum()),
+        'hit_rate': calls['hit'].mean(),
+        'mean_return': signed_return.mean(),
+    })
+
+
+def _evaluate(ohlc: pd.DataFrame) -> pd.Series:
+    return hit_rate(score_forecasts(ohlc))
+
+
+def evaluate_symbols(histories: Mapping[str, pd.DataFrame], max_workers: int = None) -> pd.DataFrame:
+    """Backfill, score and summarize the forecasts of many symbols across a process pool"""
+    symbols = list(histories)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        summaries = list(executor.map(_evaluate, (histories[symbol] for symbol in symbols)))
+    return pd.DataFrame(summaries, index=pd.Index(symbols, name='symbol'))
@@ -0,0 +1,122 @@
+import math
+from datetime import datetime
+from typing import Dict, Iterable, Tuple
+import pandas as pd
+
+SMA_PERIODS = (50, 100, 200)
+
+
+class RollingSMA:
+    """
+    Simple moving average over the last `period` values, kept as a running sum
+    over a ring buffer so that each new value is an O(1) update.
+    """
+
+    def __init__(self, period: int):
+        if period < 1:
+            raise ValueError("period must be a positive integer")
+        self.period = period
+        self.previous = math.nan
+        self.value = math.nan
+        self._window = [0.0] * period
+        self._position = 0
+        self._count = 0
+        self._sum = 0.0
+
+    def update(self, value: float) -> float:
+        """Push a new value into the window and return the new average"""
+        if self._count == self.period:
+            self._sum -= self._window[self._position]
+        else:
+            self._count += 1
+        self._window[self._position] = value
+        self._sum += value
+        self._position = (self._position + 1) % self.period
+        if self._position == 0:
+            # re-sum once per lap so floating point error can't accumulate
+            self._sum = math.fsum(self._window)
+
+        self.previous = self.value
+        self.value = self._average()
+        return self.value
+
+    def revise(self, value: float) -> float:
+        """Replace the most recent value, e.g. when an intraday bar's close changes"""
+        if self._count == 0:
+            return self.update(value)
+        last = (self._position - 1) % self.period
+        self._sum += value - self._window[last]
+        self._window[last] = value
+        self.value = self._average()
+        return self.value
+
+    def _average(self) -> float:
+        return self._sum / self.period if self._count == self.period else math.nan
+
+
+class IndicatorState:
+    """Rolling indicator state for a single symbol"""
+
+    def __init__(self, periods: Iterable[int] = SMA_PERIODS):
+        self.timestamp: datetime = None
+        self.smas: Dict[int, RollingSMA] = {period: RollingSMA(period) for period in periods}
+
+    def update(self, timestamp: datetime, close: float):
+        """
+        Add a bar to the state. A bar with the same timestamp as the last one
+        revises it instead, so the state can follow a bar that is still forming.
+        """
+        if timestamp is not None and timestamp == self.timestamp:
+            for sma in self.smas.values():
+                sma.revise(close)
+        else:
+            for sma in self.smas.values():
+                sma.update(close)
+        self.timestamp = timestamp
+
+    def sma(self, period: int) -> Tuple[float, float]:
+        """The previous and current value of the `period` SMA, in that order"""
+        sma = self.smas[period]
+        return (sma.previous, sma.value)
+
+
+class IndicatorEngine:
+    """Rolling indicator state for many symbols"""
+
+    def __init__(self, periods: Iterable[int] = SMA_PERIODS):
+        self.periods = tuple(periods)
+        self._states: Dict[str, IndicatorState] = {}
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._states
+
+    def __getitem__(self, symbol: str) -> IndicatorState:
+        return self._states[symbol]
+
+    def update(self, symbol: str, timestamp: datetime, close: float) -> IndicatorState:
+        """Add a new bar for `symbol`, creating its state on first sight"""
+        state = self._states.get(symbol)
+        if state is None:
+            state = self._states[symbol] = IndicatorState(self.periods)
+        state.update(timestamp, close)
+        return state
+
+    def warm_up(self, symbol: str, ohlc: pd.DataFrame, column: str = 'close') -> IndicatorState:
+        """
+        Seed the state for `symbol` from its history. Only the last bars that
+        can still affect the indicators are replayed, not the whole frame.
+        """
+        closes = ohlc[find_column(ohlc, column)]
+        closes = closes.iloc[-(max(self.periods) + 1):]
+        state = self._states[symbol] = IndicatorState(self.periods)
+        for timestamp, close in zip(closes.index, closes.values):
+            state.update(timestamp, float(close))
+        return state
+
+
+def find_column(ohlc: pd.DataFrame, column: str) -> str:
+    """finta lowercases column names, so 'close' should match yfinance's 'Close' here too"""
+    for candidate in ohlc.columns:
+        if str(candidate).lower() == column.lower():
+            return candidate
+    raise KeyError(column)
@@ -1,7 +1,9 @@
 import datetime
 from numbers import Number
 from typing import Sequence
+from quacktrader.indicator_cache import cached
 from quacktrader.weatherman.forecast import Forecast
+from quacktrader.weatherman.streaming import IndicatorState
 from finta import TA
 import pandas as pd
 
@@ -28,11 +30,16 @@ def crossover(series1: Sequence, series2: Sequence) -> bool:
 
 class Weatherman:
     def make_forecast(self, ohlc: pd.DataFrame) -> Forecast:
-        sma_50 = TA.SMA(ohlc, period=50, column='close')
-        sma_100 = TA.SMA(ohlc, period=100, column='close')
-        sma_200 = TA.SMA(ohlc, period=200, column='close')
-        timestamp = ohlc.index[-1]
+        sma_50 = cached(TA.SMA)(ohlc, period=50, column='close')
+        sma_100 = cached(TA.SMA)(ohlc, period=100, column='close')
+        sma_200 = cached(TA.SMA)(ohlc, period=200, column='close')
+        return self._forecast(ohlc.index[-1], sma_50, sma_100, sma_200)
 
+    def make_streaming_forecast(self, state: IndicatorState) -> Forecast:
+        """Make the same forecast as `make_forecast` from rolling indicator state, without the history"""
+        return self._forecast(state.timestamp, state.sma(50), state.sma(100), state.sma(200))
+
+    def _forecast(self, timestamp, sma_50: Sequence, sma_100: Sequence, sma_200: Sequence) -> Forecast:
         direction = 0
         if crossover(sma_50, sma_100):
             direction = 1
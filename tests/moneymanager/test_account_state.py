@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import pytest
+from quacktrader.moneymanager.account_state import AccountState
+
+ACCOUNTS = [{'securitiesAccount': {'currentBalances': {'buyingPower': 5000}, 'positions': [{'symbol': 'SPY'}]}}]
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, accounts):
+        self.accounts = accounts
+
+    def json(self):
+        return self.accounts
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeClient:
+    def __init__(self, release: threading.Event = None, fail: bool = False):
+        self.calls = 0
+        self.release = release
+        self.fail = fail
+
+    def get_accounts(self, fields=None):
+        self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        if self.fail:
+            raise ConnectionError("accounts are down")
+        return FakeResponse(ACCOUNTS)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_snapshot_is_cached_for_ttl():
+    client, clock = FakeClient(), FakeClock()
+    state = AccountState(client, ttl=30, clock=clock)
+    assert state.get().balances['buyingPower'] == 5000
+    assert state.get().positions == [{'symbol': 'SPY'}]
+    clock.now = 29.5
+    state.get()
+    assert client.calls == 1
+    clock.now = 30
+    state.get()
+    assert client.calls == 2
+    state.get(max_age=0)
+    assert client.calls == 3
+    state.invalidate()
+    state.get()
+    assert client.calls == 4
+
+
+def test_concurrent_requests_share_one_call():
+    release = threading.Event()
+    client = FakeClient(release)
+    state = AccountState(client, ttl=30)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(state.get) for _ in range(8)]
+        release.set()
+        snapshots = [future.result() for future in futures]
+    assert client.calls == 1
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+
+
+def test_failed_request_is_not_cached():
+    client = FakeClient(fail=True)
+    state = AccountState(client, ttl=30)
+    with pytest.raises(ConnectionError):
+        state.get()
+    client.fail = False
+    assert state.get().balances['buyingPower'] == 5000
+    assert client.calls == 2
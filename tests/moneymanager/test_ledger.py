@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+import pytest
+from quacktrader.moneymanager.ledger import EquityLedger
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    with EquityLedger(str(tmp_path / 'ledger.sqlite')) as ledger:
+        yield ledger
+
+
+def test_month_to_date_uses_last_snapshot_before_the_month(ledger):
+    ledger.record(10_000, datetime(2023, 1, 31, 16), kind='daily')
+    ledger.record(10_500, datetime(2023, 2, 1, 10))
+    ledger.record(9_200, datetime(2023, 2, 14, 12))
+    assert ledger.month_to_date(datetime(2023, 2, 15)) == pytest.approx(-.08)
+    assert ledger.month_to_date(datetime(2023, 1, 31)) == pytest.approx(9_200 / 10_000 - 1)
+    assert ledger.equity_at(datetime(2023, 2, 10)) == 10_500
+    assert ledger.latest() == (datetime(2023, 2, 14, 12), 9_200)
+
+
+def test_drawdown_and_rolling_loss(ledger):
+    start = datetime(2023, 3, 1)
+    for day, equity in enumerate([100, 120, 90, 110, 130, 117]):
+        ledger.record(equity, start + timedelta(days=day))
+    assert ledger.drawdown() == pytest.approx(117 / 130 - 1)
+    assert ledger.max_drawdown() == pytest.approx(90 / 120 - 1)
+    assert ledger.rolling_loss(timedelta(days=2)) == pytest.approx(117 / 110 - 1)
+    # a window reaching back before the ledger starts is measured from its first snapshot
+    assert ledger.rolling_loss(timedelta(days=30)) == pytest.approx(117 / 100 - 1)
+
+
+def test_ledger_is_append_only_and_persistent(tmp_path):
+    path = str(tmp_path / 'ledger.sqlite')
+    with EquityLedger(path) as ledger:
+        assert ledger.month_to_date() == 0 and ledger.drawdown() == 0
+        ledger.record(100, datetime(2023, 1, 2))
+        with pytest.raises(ValueError):
+            ledger.record(101, datetime(2023, 1, 1))
+    with EquityLedger(path) as ledger:
+        ledger.record(95, datetime(2023, 1, 3))
+        assert ledger.max_drawdown() == pytest.approx(-.05)
+
+
+def test_snapshots_taken_now_never_go_back_in_time(tmp_path):
+    path = str(tmp_path / 'ledger.sqlite')
+    with EquityLedger(path) as ledger, EquityLedger(path) as other_process:
+        # another process (or a clock stepped back) already wrote a later snapshot
+        other_process.record(100, datetime.now() + timedelta(hours=1))
+        ledger.record(90)
+        other_process.record(80)
+        assert ledger.latest()[1] == 80 and ledger.latest()[0] > datetime.now() + timedelta(minutes=59)
+        assert ledger.max_drawdown() == pytest.approx(-.2)
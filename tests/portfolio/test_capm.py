@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+from quacktrader.portfolio.capm import compute_beta, compute_capm, compute_sharpe, universe_capm
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(0)
+    market = rng.normal(.0004, .01, 500)
+    stocks = market[:, np.newaxis] * [.5, 1, 1.5, 2] + rng.normal(0, .01, (500, 4))
+    returns = pd.DataFrame(np.column_stack([stocks, market]), columns=['A', 'B', 'C', 'D', 'SPY'])
+    return 100 * np.exp(returns.cumsum())
+
+
+def test_universe_capm_matches_single_stock_formulas(prices):
+    log_returns = np.log(prices / prices.shift(1))
+    table = universe_capm(prices, 'SPY', riskfree=.02)
+    assert list(table.index) == ['A', 'B', 'C', 'D']
+    for stock in table.index:
+        beta = log_returns[stock].cov(log_returns['SPY']) / log_returns['SPY'].var()
+        capm = .02 + beta * (log_returns['SPY'].mean() * 252 - .02)
+        assert table.at[stock, 'Beta'] == pytest.approx(beta)
+        assert table.at[stock, 'Return'] == pytest.approx(capm)
+        assert table.at[stock, 'Sharpe'] == pytest.approx((capm - .02) / (log_returns[stock].std() * 250 ** .5))
+    assert table['Beta'].is_monotonic_increasing
+    assert compute_beta(prices, 'C', 'SPY') == pytest.approx(table.at['C', 'Beta'], rel=1e-9)
+    assert compute_capm(prices, 'C', 'SPY', riskfree=.02) == pytest.approx(table.at['C', 'Return'])
+    assert compute_sharpe(prices, 'C', 'SPY', riskfree=.02) == pytest.approx(table.at['C', 'Sharpe'])
+
+
+def test_universe_capm_pairs_missing_history(prices):
+    # a ticker that listed later is compared with the market only over its own history
+    prices.loc[:199, 'D'] = np.nan
+    log_returns = np.log(prices / prices.shift(1))
+    table = universe_capm(prices, 'SPY')
+    expected = log_returns['D'].cov(log_returns['SPY']) / log_returns['SPY'][log_returns['D'].notna()].var()
+    assert table.at['D', 'Beta'] == pytest.approx(expected)
+    assert table.at['A', 'Beta'] == pytest.approx(universe_capm(prices.drop(columns='D'), 'SPY').at['A', 'Beta'])
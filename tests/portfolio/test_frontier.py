@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.optimize import brentq
+from quacktrader.portfolio.frontier import (efficient_frontier, max_sharpe, min_variance, moments, performance,
+                                            random_portfolios, target_return)
+
+
+@pytest.fixture
+def universe():
+    rng = np.random.default_rng(0)
+    assets = 8
+    mean = pd.Series(rng.uniform(.02, .15, assets), index=[f'A{i}' for i in range(assets)])
+    loadings = rng.normal(0, .1, (assets, 3))
+    cov = pd.DataFrame(loadings @ loadings.T + np.diag(rng.uniform(.01, .05, assets)), index=mean.index, columns=mean.index)
+    return mean, cov
+
+
+def project_onto_box(weights, low, high):
+    """The closest fully invested weights within [low, high]: shift them all by the same amount, then clip"""
+    weights = np.asarray(weights, dtype=float)
+    shift = brentq(lambda shift: np.clip(weights - shift, low, high).sum() - 1, weights.min() - high, weights.max() - low)
+    return np.clip(weights - shift, low, high)
+
+
+def test_moments():
+    prices = pd.DataFrame({'A': [100, 101, 102.5, 101], 'B': [50, 49, 51, 52]})
+    mean, cov = moments(prices)
+    log_returns = np.log(prices).diff().dropna()
+    np.testing.assert_allclose(mean, log_returns.mean() * 252)
+    np.testing.assert_allclose(cov, log_returns.cov() * 252)
+
+
+def test_random_portfolios(universe):
+    mean, cov = universe
+    portfolios = random_portfolios(mean, cov, n=500, seed=1)
+    weights = portfolios[mean.index]
+    np.testing.assert_allclose(weights.sum(axis=1), 1)
+    assert (weights >= 0).all().all()
+    row = portfolios.iloc[7]
+    np.testing.assert_allclose(performance(row[mean.index], mean, cov), row[['Return', 'Volatility', 'Sharpe']])
+
+
+def test_min_variance_unconstrained_matches_closed_form(universe):
+    mean, cov = universe
+    inverse = np.linalg.inv(cov.to_numpy())
+    expected = inverse.sum(axis=1) / inverse.sum()
+    np.testing.assert_allclose(min_variance(mean, cov, bounds=(None, None)), expected, atol=1e-5)
+
+
+def test_max_sharpe_beats_random_cloud(universe):
+    mean, cov = universe
+    weights = max_sharpe(mean, cov, riskfree=.01)
+    assert weights.sum() == pytest.approx(1)
+    assert (weights >= -1e-9).all()
+    cloud = random_portfolios(mean, cov, n=20_000, riskfree=.01, seed=2)
+    assert performance(weights, mean, cov, .01)[2] >= cloud['Sharpe'].max()
+
+
+def test_box_constraints_and_target(universe):
+    mean, cov = universe
+    weights = target_return(mean, cov, .09, bounds=(0, .25))
+    assert weights @ mean == pytest.approx(.09)
+    assert weights.max() <= .25 + 1e-9
+    with pytest.raises(ValueError):
+        min_variance(mean, cov, bounds=(0, .1))
+
+
+def test_efficient_frontier(universe):
+    mean, cov = universe
+    frontier = efficient_frontier(mean, cov, points=10)
+    assert len(frontier) == 10
+    assert frontier['Return'].is_monotonic_increasing
+    assert frontier['Volatility'].is_monotonic_increasing
+    cloud = random_portfolios(mean, cov, n=5000, seed=3)
+    # nothing in the cloud has less risk than the frontier for the same return
+    closest = np.interp(cloud['Return'], frontier['Return'], frontier['Volatility'])
+    inside = cloud['Return'].between(frontier['Return'].min(), frontier['Return'].max())
+    assert (cloud['Volatility'][inside] >= closest[inside] - 1e-6).all()
+
+
+def test_max_sharpe_with_box_constraints(universe):
+    mean, cov = universe
+    weights = max_sharpe(mean, cov, riskfree=.01, bounds=(.05, .3))
+    assert weights.sum() == pytest.approx(1)
+    assert weights.min() >= .05 - 1e-7 and weights.max() <= .3 + 1e-7
+    rng = np.random.default_rng(4)
+    best = performance(weights, mean, cov, .01)[2]
+    for _ in range(200):
+        # project each perturbation back into the box and onto full investment, so every one is feasible
+        candidate = project_onto_box(weights + rng.normal(0, .01, len(mean)), .05, .3)
+        assert candidate.sum() == pytest.approx(1) and candidate.min() >= .05 and candidate.max() <= .3
+        assert performance(candidate, mean, cov, .01)[2] <= best + 1e-9
@@ -0,0 +1,74 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from quacktrader.portfolio.gbm import (correlated_paths, estimate, estimate_panel, gbm_paths, portfolio_paths,
+                                      simulate_terminal, terminal_prices)
+from quacktrader.portfolio.montecarlo import simulate_mc
+
+
+def test_estimate_matches_log_returns():
+    prices = pd.Series([100, 101, 99, 102, 103.5])
+    log_returns = np.log(prices).diff().dropna()
+    drift, volatility = estimate(prices)
+    assert drift == pytest.approx(log_returns.mean() - 0.5 * log_returns.var())
+    assert volatility == pytest.approx(log_returns.std())
+
+
+def test_gbm_paths_compound_daily_returns():
+    paths = gbm_paths(100, .001, .02, days=5, iterations=3, rng=np.random.default_rng(0), dtype=np.float64)
+    shocks = np.random.default_rng(0).standard_normal((4, 3))
+    expected = 100 * np.cumprod(np.exp(.001 + .02 * shocks), axis=0)
+    assert paths.shape == (5, 3)
+    assert (paths[0] == 100).all()
+    np.testing.assert_allclose(paths[1:], expected)
+
+
+def test_simulate_terminal_is_chunk_independent():
+    whole = terminal_prices(100, .0005, .02, days=253, iterations=10_000, seed=1)
+    for max_bytes in (1, 252 * 4 * 5000, 252 * 4 * 9000):
+        chunked = terminal_prices(100, .0005, .02, days=253, iterations=10_000, seed=1, max_bytes=max_bytes)
+        np.testing.assert_array_equal(chunked, whole)
+
+
+def test_simulate_terminal_matches_lognormal():
+    drift, volatility, days = .0003, .015, 253
+    summary = simulate_terminal(50, drift, volatility, days, 200_000, quantiles=[.5], thresholds=[50, 60], seed=2)
+    assert summary.quantiles[.5] == pytest.approx(50 * np.exp(drift * (days - 1)), rel=.01)
+    # terminal log return is normal with mean drift * t and standard deviation volatility * sqrt(t)
+    assert summary.probabilities[50] == pytest.approx(.5 + .5 * math.erf(drift * 252 / (volatility * 252 ** .5) / 2 ** .5), abs=.01)
+    assert summary.probabilities[60] < summary.probabilities[50]
+
+
+def test_simulate_mc_starts_from_last_price():
+    prices = pd.Series(100 * np.exp(np.cumsum(np.random.default_rng(3).normal(0, .01, 500))), name='TEST')
+    simulated = simulate_mc(prices, 11, 50, plot=False)
+    assert simulated.shape == (11, 50)
+    assert (simulated.iloc[0] == prices.iloc[-1]).all()
+
+
+def test_correlated_paths_reproduce_covariance():
+    covariance = np.array([[4e-4, 3e-4], [3e-4, 9e-4]])
+    drift = np.array([.001, -.0005])
+    paths = correlated_paths([10, 20], drift, covariance, days=3, iterations=200_000,
+                             rng=np.random.default_rng(4), dtype=np.float64)
+    assert paths.shape == (3, 200_000, 2)
+    np.testing.assert_array_equal(paths[0, 0], [10, 20])
+    log_returns = np.log(paths[1] / paths[0])
+    np.testing.assert_allclose(np.cov(log_returns.T), covariance, rtol=.02)
+    np.testing.assert_allclose(log_returns.mean(axis=0), drift, atol=1e-4)
+
+
+def test_estimate_panel_and_portfolio_paths():
+    rng = np.random.default_rng(5)
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, .01, (300, 2)), axis=0)), columns=['A', 'B'])
+    drift, covariance = estimate_panel(prices)
+    assert drift['A'] == pytest.approx(estimate(prices['A'])[0])
+    assert covariance.loc['B', 'B'] == pytest.approx(estimate(prices['B'])[1] ** 2)
+
+    paths = correlated_paths(prices.iloc[-1], drift, covariance, days=5, iterations=10, rng=rng)
+    portfolio = portfolio_paths(paths, [.25, .75], initial=1000)
+    assert portfolio.shape == (5, 10)
+    np.testing.assert_allclose(portfolio[0], 1000, rtol=1e-6)
+    shares = 1000 * np.array([.25, .75]) / prices.iloc[-1].to_numpy()
+    np.testing.assert_allclose(portfolio, paths @ shares, rtol=1e-5)
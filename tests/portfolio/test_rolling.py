@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+from quacktrader.portfolio.rolling import EwmaBeta, RollingBeta, _Estimator
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(0)
+    benchmark = pd.Series(rng.normal(0, .01, 400), name='SPY')
+    stocks = pd.DataFrame(benchmark.to_numpy()[:, np.newaxis] * [.5, 1, 1.5] + rng.normal(0, .01, (400, 3)),
+                          columns=['A', 'B', 'C'])
+    stocks.iloc[10:40, 2] = np.nan
+    return stocks, benchmark
+
+
+def test_rolling_updates_match_pandas(returns):
+    stocks, benchmark = returns
+    estimator = RollingBeta(stocks.columns, window=60)
+    betas = np.array([estimator.update(row, value) for row, value in zip(stocks.to_numpy(), benchmark)])
+    for i, ticker in enumerate(['A', 'B']):
+        expected = stocks[ticker].rolling(60).cov(benchmark) / benchmark.rolling(60).var()
+        np.testing.assert_allclose(betas[:, i], expected, atol=1e-12)
+    np.testing.assert_allclose(estimator.variance[:2], stocks[['A', 'B']].iloc[-60:].var(), rtol=1e-10)
+    np.testing.assert_allclose(estimator.mean[:2], stocks[['A', 'B']].iloc[-60:].mean(), rtol=1e-10)
+    # C's window skips its missing returns, so it has a beta again only once it holds 60 pairs
+    assert np.isnan(betas[98, 2]) and not np.isnan(betas[99, 2])
+
+
+def test_rolling_backfill_matches_updates_and_continues(returns):
+    stocks, benchmark = returns
+    batch = RollingBeta(stocks.columns, window=60, min_periods=30)
+    history = batch.backfill(stocks.iloc[:300], benchmark.iloc[:300])
+    online = RollingBeta(stocks.columns, window=60, min_periods=30)
+    for row, value in zip(stocks.iloc[:300].to_numpy(), benchmark.iloc[:300]):
+        online.update(row, value)
+    snapshot = online.snapshot()
+    for statistic in snapshot.columns:
+        np.testing.assert_allclose(history[statistic].iloc[-1], snapshot[statistic], atol=1e-12)
+
+    for row, value in zip(stocks.iloc[300:].to_numpy(), benchmark.iloc[300:]):
+        np.testing.assert_allclose(batch.update(row, value), online.update(row, value), atol=1e-12)
+
+
+def test_ewma_matches_pandas(returns):
+    stocks, benchmark = returns
+    estimator = EwmaBeta(stocks.columns, halflife=20)
+    history = estimator.backfill(stocks, benchmark)
+    alpha = 1 - .5 ** (1 / 20)
+    for ticker in stocks.columns:
+        ewm = stocks[ticker].ewm(alpha=alpha, adjust=False, ignore_na=True)
+        np.testing.assert_allclose(history['covariance'][ticker], ewm.cov(benchmark, bias=True), atol=1e-15)
+        np.testing.assert_allclose(history['variance'][ticker], ewm.var(bias=True), atol=1e-15)
+    estimator.update({'A': .01, 'B': np.nan, 'C': .02}, .005)
+    assert estimator.count.tolist() == [401, 400, 371]
+    with pytest.raises(ValueError):
+        EwmaBeta(['A'], alpha=.1, halflife=5)
+
+
+def test_estimators_must_implement_update():
+    class Incomplete(_Estimator):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
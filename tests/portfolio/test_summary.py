@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from quacktrader.portfolio.gbm import simulate_terminal
+from quacktrader.portfolio.montecarlo import probs_find
+from quacktrader.portfolio.summary import Histogram, probabilities, summarize
+
+
+def test_summarize():
+    values = np.arange(1, 101, dtype=float)
+    summary = summarize(values, thresholds=[50, 101], quantiles=[.5], alpha=.1, bins=10)
+    assert summary.count == 100
+    assert summary.mean == 50.5
+    assert summary.quantiles[.5] == 50.5
+    assert list(summary.probabilities) == [.51, 0]
+    assert summary.expected_shortfall == 5.5
+    counts, edges = summary.histogram
+    assert list(counts) == [10] * 10 and len(edges) == 11
+
+
+def test_probs_find_matches_comprehensions():
+    rng = np.random.default_rng(0)
+    predicted = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, .02, (20, 500)), axis=0)))
+    predicted.iloc[0] = 100
+    final = list(predicted.iloc[-1])
+    assert probs_find(predicted, 0, on='return') == sum((i - 100) * 100 / 100 >= 0 for i in final) / len(final)
+    assert probs_find(predicted, 105, on='value') == sum(i >= 105 for i in final) / len(final)
+
+    tagged = predicted.copy()
+    tagged['ticker'] = 'AAA'
+    tagged = tagged[['ticker'] + list(predicted.columns)]
+    both = pd.concat([tagged, tagged.assign(ticker='BBB') * 1])
+    assert probs_find(both, 0, ticker='AAA', on='return') == probs_find(predicted, 0, on='return')
+    with pytest.raises(ValueError):
+        probs_find(predicted, 0, on='price')
+
+
+def test_histogram_merges_chunks():
+    rng = np.random.default_rng(1)
+    values = rng.normal(100, 15, 200_000)
+    whole = Histogram(0, 200, bins=2000).update(values)
+    parts = [Histogram(0, 200, bins=2000).update(chunk) for chunk in np.array_split(values, 7)]
+    merged = parts[0]
+    for part in parts[1:]:
+        merged = merged + part
+    np.testing.assert_array_equal(merged.counts, whole.counts)
+    assert merged.count == len(values)
+    assert merged.mean == pytest.approx(values.mean())
+
+    exact = summarize(values, thresholds=[90, 100, 130], quantiles=[.05, .5, .95])
+    sketched = merged.summary(thresholds=[90, 100, 130], quantiles=[.05, .5, .95])
+    np.testing.assert_allclose(sketched.quantiles, exact.quantiles, atol=.1)
+    np.testing.assert_allclose(sketched.probabilities, exact.probabilities, atol=1e-3)
+    assert sketched.expected_shortfall == pytest.approx(exact.expected_shortfall, abs=.1)
+
+
+def test_histogram_tails_and_mismatched_bins():
+    sketch = Histogram(0, 10, bins=10).update([-5, 5, 15])
+    assert list(sketch.counts[[0, 6, -1]]) == [1, 1, 1]
+    assert sketch.quantiles([0, 1]).tolist() == [-5, 15]
+    assert probabilities([-5, 5, 15], [5]) == pytest.approx(2 / 3)
+    with pytest.raises(ValueError):
+        sketch.merge(Histogram(0, 20, bins=10))
+
+
+def test_histogram_counts_non_finite_values_apart():
+    sketch = Histogram(0, 10, bins=10).update([1.0, np.nan]).update([np.inf, 3.0, -np.inf])
+    assert (sketch.count, sketch.dropped) == (2, 3)
+    assert sketch.mean == pytest.approx(2)
+    assert (sketch + Histogram(0, 10, bins=10).update([np.nan])).dropped == 4
+
+
+def test_simulate_terminal_into_sketch():
+    exact = simulate_terminal(100, .0003, .015, days=253, iterations=50_000, thresholds=[100], seed=3)
+    sketched = simulate_terminal(100, .0003, .015, days=253, iterations=50_000, thresholds=[100], seed=3,
+                                 sketch=Histogram(0, 400, bins=4000))
+    assert sketched.count == exact.count
+    assert sketched.mean == pytest.approx(exact.mean, rel=1e-6)
+    assert sketched.probabilities[100] == pytest.approx(exact.probabilities[100], abs=1e-3)
@@ -0,0 +1,86 @@
+from datetime import date
+import numpy as np
+import pytest
+from quacktrader.riskmanager.greeks import GreeksBook, parse_option_symbol
+
+POSITIONS = [
+    {'instrument': {'symbol': 'SPY_012023P380', 'underlyingSymbol': 'SPY', 'assetType': 'OPTION'}, 'longQuantity': 0, 'shortQuantity': 2},
+    {'instrument': {'symbol': 'SPY_021723P370', 'underlyingSymbol': 'SPY', 'assetType': 'OPTION'}, 'longQuantity': 1, 'shortQuantity': 0},
+    {'instrument': {'symbol': 'SPY', 'assetType': 'EQUITY'}, 'longQuantity': 50, 'shortQuantity': 0},
+    {'instrument': {'symbol': 'QQQ_012023P260', 'underlyingSymbol': 'QQQ', 'assetType': 'OPTION'}, 'longQuantity': 0, 'shortQuantity': 1},
+]
+QUOTES = {
+    'SPY_012023P380': {'delta': -.2, 'gamma': .01, 'vega': .3, 'theta': -.1},
+    'SPY_021723P370': {'delta': -.15, 'gamma': .008, 'vega': .4, 'theta': -.05},
+    'QQQ_012023P260': {'delta': -.25, 'gamma': .02, 'vega': .25, 'theta': -.08},
+    'SPY': {'lastPrice': 400},
+}
+
+
+@pytest.fixture
+def book():
+    book = GreeksBook()
+    book.load_positions(POSITIONS)
+    book.load_quotes(QUOTES)
+    return book
+
+
+def full_sum(book, underlying):
+    """Aggregate the slow way, for comparison"""
+    total = np.zeros(4)
+    for symbol, holding in book._holdings.items():
+        if holding.underlying == underlying:
+            total += holding.quantity * holding.multiplier * book._greeks.get(symbol, np.zeros(4))
+    return total
+
+
+def test_parse_option_symbol():
+    assert parse_option_symbol('SPY_012023P380') == ('SPY', date(2023, 1, 20))
+    assert parse_option_symbol('$SPX.X_031723P3900') == ('$SPX.X', date(2023, 3, 17))
+    assert parse_option_symbol('SPY') is None
+
+
+def test_aggregates_by_underlying_and_expiry(book):
+    spy = book.underlying('SPY')
+    assert spy['delta'] == pytest.approx(-2 * 100 * -.2 + 100 * -.15 + 50)
+    assert spy['theta'] == pytest.approx(-2 * 100 * -.1 + 100 * -.05)
+    assert book.expiry('SPY', date(2023, 1, 20))['vega'] == pytest.approx(-2 * 100 * .3)
+    assert book.underlying('QQQ')['gamma'] == pytest.approx(-100 * .02)
+    assert list(book.by_underlying().index) == ['SPY', 'QQQ']
+    assert len(book.by_expiry()) == 4
+
+
+def test_incremental_updates_match_full_sum(book):
+    book.update_quote('SPY_012023P380', -.3, .012, .28, -.12)
+    book.set_position('SPY_021723P370', 3)
+    book.set_position('SPY_031723P350', -1)
+    book.update_quote('SPY_031723P350', -.1, .005, .5, -.03)
+    np.testing.assert_allclose(book.underlying('SPY'), full_sum(book, 'SPY'))
+    book.set_position('SPY_012023P380', 0)
+    np.testing.assert_allclose(book.underlying('SPY'), full_sum(book, 'SPY'))
+    assert book.expiry('SPY', date(2023, 1, 20)).abs().sum() == pytest.approx(0)
+    book.rebuild()
+    np.testing.assert_allclose(book.underlying('SPY'), full_sum(book, 'SPY'))
+
+
+def test_reloading_zeroes_closed_positions(book):
+    book.load_positions(POSITIONS[:2] + POSITIONS[3:])
+    assert book.underlying('SPY')['delta'] == pytest.approx(-2 * 100 * -.2 + 100 * -.15)
+    book.load_positions(POSITIONS[:3])
+    assert book.underlying('QQQ').abs().sum() == pytest.approx(0)
+    assert book.what_if('QQQ', -1, -.25).loc[0, 'delta'] == pytest.approx(25)
+    np.testing.assert_allclose(book.underlying('SPY'), full_sum(book, 'SPY'))
+    book.load_positions(POSITIONS[3:], replace=False)
+    assert book.underlying('QQQ')['delta'] == pytest.approx(25)
+    assert 'SPY' in book._holdings
+
+
+def test_what_if(book):
+    spy = book.underlying('SPY')
+    added = book.what_if(['SPY', 'SPY', 'IWM'], quantity=[-1, -2, -1], delta=[-.2, -.1, -.3], gamma=.01)
+    assert added.loc[0, 'delta'] == pytest.approx(spy['delta'] + 20)
+    assert added.loc[1, 'delta'] == pytest.approx(spy['delta'] + 20)
+    assert added.loc[1, 'gamma'] == pytest.approx(spy['gamma'] - 2)
+    assert added.loc[2, 'delta'] == pytest.approx(30)
+    # nothing is actually added
+    assert book.underlying('SPY').equals(spy)
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import norm
+from quacktrader.riskmanager.probability_of_profit import short_put_spread_pnl, simulate_candidates, spread_score, spread_statistics
+
+
+def test_short_put_spread_pnl():
+    pnl = short_put_spread_pnl([400, 375, 300], short_strike=[380, 380], long_strike=[0, 370], credit=[2, 1])
+    np.testing.assert_allclose(pnl, [[200, 100], [-300, -400], [-7800, -900]])
+
+
+def test_spread_statistics_match_the_pnl_matrix():
+    terminal = np.sort(np.random.default_rng(3).lognormal(np.log(400), .1, 5000).round())
+    short_strike = np.array([380, 390, 390, 400, 380, 350])
+    long_strike = np.array([0, 0, 380, 390, 370, 345])
+    # including a worthless credit, one wider than the spread and strikes on the simulated prices
+    credit = np.array([2, 4, 2.5, 0, 12, 1])
+    pnl = short_put_spread_pnl(terminal, short_strike, long_strike, credit)
+    tail = 250
+    probability, expected, worst = spread_statistics(terminal, short_strike, long_strike, credit, tail)
+    np.testing.assert_allclose(probability, (pnl > 0).mean(axis=0))
+    np.testing.assert_allclose(expected, pnl.mean(axis=0))
+    np.testing.assert_allclose(worst, np.partition(pnl, tail - 1, axis=0)[:tail].mean(axis=0))
+
+
+def test_simulate_candidates_matches_lognormal():
+    candidates = pd.DataFrame({
+        'underlying': ['SPY'] * 3 + ['QQQ'],
+        'underlying_price': [400.0] * 3 + [300.0],
+        'short_strike': [380.0, 390, 390, 280],
+        'long_strike': [0, 0, 380, 270],
+        'credit': [2.0, 4, 2.5, 1.5],
+        'volatility': [.2, .2, .2, .25],
+        'days_to_expiration': [30] * 4,
+    })
+    simulated = simulate_candidates(candidates, iterations=200_000, seed=0)
+    assert list(simulated.columns[-3:]) == ['probability_of_profit', 'expected_pnl', 'tail_loss']
+
+    years = 30 / 365
+    breakeven = candidates['short_strike'] - candidates['credit']
+    expected = norm.cdf((np.log(candidates['underlying_price'] / breakeven) - .5 * candidates['volatility'] ** 2 * years)
+                        / (candidates['volatility'] * np.sqrt(years)))
+    np.testing.assert_allclose(simulated['probability_of_profit'], expected, atol=.005)
+    assert (simulated['tail_loss'] < simulated['expected_pnl']).all()
+    # a spread caps the loss of the naked put at the same strike
+    assert simulated.loc[2, 'tail_loss'] >= -(10 - 2.5) * 100
+    assert simulated.loc[1, 'tail_loss'] < simulated.loc[2, 'tail_loss']
+
+
+def test_simulate_candidates_is_reproducible_and_skips_missing_volatility():
+    candidates = pd.DataFrame({
+        'underlying': ['SPY', 'IWM'], 'underlying_price': [400.0, 180], 'short_strike': [380.0, 170],
+        'long_strike': [0.0, 0], 'credit': [2.0, 1], 'volatility': [.2, -9.99], 'days_to_expiration': [30, 30]})
+    first = simulate_candidates(candidates, iterations=1000, seed=1)
+    pd.testing.assert_frame_equal(first, simulate_candidates(candidates, iterations=1000, seed=1))
+    assert first.loc[1, ['probability_of_profit', 'expected_pnl', 'tail_loss']].isna().all()
+
+
+def test_each_candidate_is_priced_at_its_own_volatility():
+    candidates = pd.DataFrame({
+        'underlying': ['SPY'] * 3, 'underlying_price': [400.0] * 3, 'short_strike': [380.0, 380, 360],
+        'long_strike': [0.0] * 3, 'credit': [3.0] * 3, 'volatility': [.15, .3, np.nan], 'days_to_expiration': [30] * 3})
+    simulated = simulate_candidates(candidates, iterations=200_000, seed=0)
+    # the same put is likelier to lose at the higher volatility
+    assert simulated.loc[0, 'probability_of_profit'] > simulated.loc[1, 'probability_of_profit']
+    assert simulated.loc[2, ['probability_of_profit', 'expected_pnl', 'tail_loss']].isna().all()
+    # and a candidate's statistics don't depend on the other candidates in its group
+    alone = simulate_candidates(candidates.iloc[[1]], iterations=200_000, seed=0)
+    pd.testing.assert_frame_equal(alone, simulated.iloc[[1]])
+
+    # priced at its own volatility, a put's expected P&L is its credit less the Black-Scholes value
+    years, volatility = 30 / 365, .3
+    d1 = (np.log(400 / 380) + .5 * volatility ** 2 * years) / (volatility * np.sqrt(years))
+    value = 380 * norm.cdf(-(d1 - volatility * np.sqrt(years))) - 400 * norm.cdf(-d1)
+    assert simulated.loc[1, 'expected_pnl'] == pytest.approx((3 - value) * 100, abs=15)
+
+
+def test_spreads_with_nothing_at_risk_get_no_score():
+    candidates = pd.DataFrame({
+        'short_strike': [380.0, 380, 380],
+        'long_strike': [375.0, 375, 375],
+        # a credit below, at and above the width of the spread
+        'credit': [1.0, 5, 6],
+        'expected_pnl': [10.0, 20, 30],
+        'days_to_expiration': [10] * 3,
+    })
+    score = spread_score(candidates)
+    assert score[0] == pytest.approx(10 / 10 / 400)
+    assert score[1:].isna().all()
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import norm
+from quacktrader.riskmanager.riskmanager import RiskManager
+from quacktrader.riskmanager.short_premium_riskmanager import ShortPremiumRiskManager, put_candidates, spread_candidates
+
+PUTS = [
+    {'symbol': 'SPY_P380', 'strikePrice': 380, 'mark': 2.5, 'delta': -.15, 'volatility': 20, 'daysToExpiration': 30},
+    {'symbol': 'SPY_P400', 'strikePrice': 400, 'mark': 6.0, 'delta': -.35, 'volatility': 18, 'daysToExpiration': 30},
+]
+
+
+@pytest.fixture
+def riskmanager():
+    return ShortPremiumRiskManager(capital=100_000, exposure=20_000)
+
+
+def test_is_a_risk_manager(riskmanager):
+    assert isinstance(riskmanager, RiskManager)
+
+
+def test_rules_for_a_put_and_a_spread(riskmanager):
+    short_strike, long_strike, credit = np.array([380, 380]), np.array([0, 370]), np.array([2.5, 1.0])
+    np.testing.assert_allclose(riskmanager.max_loss(short_strike, long_strike, credit), [37_750, 900])
+    np.testing.assert_allclose(riskmanager.calculate_risk_reward_ratio(short_strike, long_strike, credit), [151, 9])
+    np.testing.assert_allclose(riskmanager.calculate_expected_return([.9, .9], short_strike, long_strike, credit),
+                               [.9 * 250 - .1 * 37_750, .9 * 100 - .1 * 900], atol=1e-9)
+    assert riskmanager.is_overexposed(short_strike, long_strike).tolist() == [True, False]
+    assert riskmanager.calculate_maximum_acceptable_loss() == 2000
+    assert riskmanager.is_within_risk_tolerance([.9, .9], short_strike, long_strike, credit).tolist() == [False, True]
+    assert riskmanager.has_reached_target_profit([2, 2], [.9, 1.1]).tolist() == [True, False]
+    assert riskmanager.has_reached_max_allowed_loss([2, 2], [6, 5.9]).tolist() == [True, False]
+
+
+def test_probability_of_success(riskmanager):
+    pop = riskmanager.calculate_probability_of_success([380, 380], [2.5, 2.5], [400, np.nan], [.2, .2], [30, 30], [-.15, -.15])
+    breakeven, years = 377.5, 30 / 365
+    expected = norm.cdf((np.log(400 / breakeven) - .02 * years) / (.2 * np.sqrt(years)))
+    np.testing.assert_allclose(pop, [expected, .85])
+
+
+def test_evaluate_candidates(riskmanager):
+    puts = riskmanager.evaluate(put_candidates(PUTS, underlying_price=410))
+    assert list(puts['symbol']) == ['SPY_P380', 'SPY_P400']
+    assert puts['probability_of_success'].is_monotonic_decreasing
+    assert (puts['max_profit'] == [250, 600]).all()
+
+    strategy = {'primaryLeg': {'symbol': 'SPY_P400', 'strikePrice': 400}, 'secondaryLeg': {'strikePrice': 390},
+                'strategyBid': 2.8, 'strategyAsk': 3.2, 'daysToExpiration': 30, 'delta': -.35, 'volatility': 18}
+    spreads = riskmanager.evaluate(spread_candidates([strategy], underlying_price=410))
+    assert spreads.loc[0, 'credit'] == pytest.approx(3)
+    assert spreads.loc[0, 'max_loss'] == pytest.approx(700)
+    assert not spreads.loc[0, 'overexposed']
+
+
+def test_thousands_of_candidates(riskmanager):
+    rng = np.random.default_rng(0)
+    n = 10_000
+    candidates = pd.DataFrame({
+        'underlying_price': 400.0, 'short_strike': rng.uniform(300, 400, n), 'long_strike': 0.0,
+        'credit': rng.uniform(.5, 8, n), 'delta': np.nan, 'volatility': .2, 'days_to_expiration': 30})
+    evaluated = riskmanager.evaluate(candidates)
+    assert len(evaluated) == n
+    assert evaluated['probability_of_success'].between(0, 1).all()
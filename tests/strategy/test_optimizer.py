@@ -0,0 +1,40 @@
+from backtesting import Backtest
+from backtesting.test import GOOG
+import pandas as pd
+from quacktrader.backtesting_example import SmaCross
+from quacktrader.ohlc import SharedOHLC, fingerprint
+from quacktrader.strategy.optimizer import Optimizer, grid, random_sample
+
+
+def test_grid_applies_constraint():
+    candidates = grid({'n1': [5, 10, 20], 'n2': [10, 20]}, constraint=lambda p: p['n1'] < p['n2'])
+    assert candidates == [{'n1': 5, 'n2': 10}, {'n1': 5, 'n2': 20}, {'n1': 10, 'n2': 20}]
+
+
+def test_random_sample_is_reproducible():
+    space = {'n1': range(5, 50), 'n2': range(10, 100)}
+    assert random_sample(space, 10, seed=1) == random_sample(space, 10, seed=1)
+    assert len(random_sample({'n1': [1, 2]}, 10)) == 2
+
+
+def test_shared_ohlc_round_trip():
+    ohlc = GOOG.tz_localize('America/New_York')
+    with SharedOHLC(ohlc) as shared:
+        attached = shared.handle.attach()
+        pd.testing.assert_frame_equal(attached, ohlc.astype(float), check_freq=False)
+        assert shared.handle.fingerprint == fingerprint(ohlc)
+
+
+def test_grid_search_matches_backtest_and_caches():
+    ohlc = GOOG.iloc[-500:]
+    kwargs = dict(cash=10000, commission=.002, exclusive_orders=True)
+    with Optimizer(ohlc, SmaCross, max_workers=2, **kwargs) as optimizer:
+        results = optimizer.grid_search(n1=[5, 10], n2=[20, 30])
+        assert len(optimizer.cache) == 4
+        optimizer.random_search(2, seed=0, n1=[5, 10], n2=[20, 30])
+        assert len(optimizer.cache) == 4
+
+    best = results.iloc[0]
+    expected = Backtest(ohlc, SmaCross, **kwargs).run(n1=best['n1'], n2=best['n2'])
+    assert best['SQN'] == expected['SQN']
+    assert results['SQN'].is_monotonic_decreasing
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import norm
+from quacktrader.chain_archive import ChainArchive
+from quacktrader.strategy.options_backtest import (BuyUnitPuts, SellPuts, SellVerticalPutSpread, backtest_options,
+                                                   select_trades, strategy_statistics)
+
+VOLATILITY = .2
+
+
+def put_chains(underlying='SPY', days=70, seed=7) -> pd.DataFrame:
+    """Black-Scholes end-of-day put chains on a random walk, Friday expirations, strikes 2.5 apart"""
+    rng = np.random.default_rng(seed)
+    quote_dates = pd.bdate_range('2023-01-02', periods=days)
+    prices = 400 * np.exp(np.cumsum(rng.normal(0, VOLATILITY / np.sqrt(252), days)))
+    expiries = pd.date_range('2023-01-06', periods=30, freq='W-FRI')
+    frames = []
+    for quote_date, price in zip(quote_dates, prices):
+        expiry = expiries[(expiries >= quote_date) & (expiries <= quote_date + pd.Timedelta(days=100))]
+        strikes = np.arange(300, 460, 2.5)
+        expiry, strike = (grid.ravel() for grid in np.meshgrid(expiry, strikes, indexing='ij'))
+        dte = (pd.DatetimeIndex(expiry) - quote_date).days.to_numpy()
+        years = np.maximum(dte, .5) / 365
+        d1 = (np.log(price / strike) + .5 * VOLATILITY ** 2 * years) / (VOLATILITY * np.sqrt(years))
+        d2 = d1 - VOLATILITY * np.sqrt(years)
+        value = strike * norm.cdf(-d2) - price * norm.cdf(-d1)
+        frames.append(pd.DataFrame({
+            'underlying': underlying, 'quote_date': quote_date.date(),
+            'symbol': [f'{underlying}_{e:%m%d%y}P{s:g}' for e, s in zip(pd.DatetimeIndex(expiry), strike)],
+            'put_call': 'PUT', 'expiry': pd.DatetimeIndex(expiry).date, 'dte': dte, 'strike': strike,
+            'bid': np.maximum(value - .05, 0), 'ask': value + .05, 'mark': value, 'delta': norm.cdf(d1) - 1,
+            'gamma': norm.pdf(d1) / (price * VOLATILITY * np.sqrt(years)),
+            'vega': price * norm.pdf(d1) * np.sqrt(years) / 100, 'volatility': VOLATILITY, 'volume': 10,
+            'in_the_money': strike > price, 'underlying_price': price}))
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.fixture(scope='module')
+def archive(tmp_path_factory):
+    archive = ChainArchive(str(tmp_path_factory.mktemp('chains')))
+    archive.write(put_chains())
+    return archive
+
+
+def test_selection_is_independent_of_parallelism(archive):
+    rule = SellPuts(iterations=2000)
+    days = list(archive.quote_dates('SPY'))
+    serial, prices = select_trades(rule, archive, ['SPY'], days, seed=1, max_workers=1)
+    parallel, _ = select_trades(rule, archive, ['SPY'], days, seed=1, max_workers=2)
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert len(prices) == len(days)
+    assert (serial['delta'] > -.175).all()
+    assert serial['days_to_expiration'].between(21, 63).all()
+
+
+def test_short_puts_are_managed_through_expiry(archive):
+    result = backtest_options(SellPuts(iterations=2000), archive, ['SPY'], capital=100_000, max_exposure=1,
+                              seed=1, max_workers=2)
+    trades, equity = result.trades, result.equity
+    assert len(equity) == 70 and equity.iloc[0] == pytest.approx(100_000, abs=500)
+    expired = trades[trades['exit_reason'] == 'expired']
+    assert len(expired) and (expired['exit_date'] == expired['expiry']).all()
+    assert (trades['quantity'] == -1).all()
+    # every position's collateral fits in equity
+    assert (trades['strike'] * 100).max() <= 100_000
+    # the equity curve ends where the closed trades' P&L and the open ones' marks put it
+    closed = trades['exit_reason'] != 'open'
+    assert equity.iloc[-1] == pytest.approx(100_000 + trades['pnl'].sum())
+    assert closed.any()
+
+
+def test_target_profit_closes_early(archive):
+    held = backtest_options(SellPuts(iterations=2000), archive, ['SPY'], capital=1_000_000, seed=1, max_workers=1)
+    managed = backtest_options(SellPuts(iterations=2000), archive, ['SPY'], capital=1_000_000, seed=1,
+                               target_profit=.5, max_workers=1)
+    assert 'target' not in set(held.trades['exit_reason'])
+    targets = managed.trades[managed.trades['exit_reason'] == 'target']
+    assert len(targets) and (targets['exit'] <= targets['entry'] / 2 + 1e-9).all()
+
+
+def test_spreads_and_unit_puts(archive):
+    spreads = backtest_options(SellVerticalPutSpread(iterations=2000), archive, ['SPY'], capital=100_000,
+                               max_positions=3, seed=1, max_workers=2).trades
+    assert len(spreads) and (spreads['strike'] - spreads['hedge_strike'] == 2.5).all()
+    assert (spreads['entry'] > 0).all()
+
+    units = backtest_options(BuyUnitPuts(), archive, ['SPY'], capital=100_000, max_positions=2, max_workers=2)
+    trades = units.trades
+    assert len(trades) and (trades['quantity'] > 0).all()
+    # each buy spends its stake of the equity that day
+    cost = trades['quantity'] * trades['entry'] * 100
+    assert (cost <= .02 * units.equity.loc[trades['entry_date']].to_numpy()).all()
+
+
+def test_missing_chains(archive):
+    with pytest.raises(ValueError):
+        backtest_options(SellPuts(), archive, ['QQQ'])
+
+
+def test_strategy_statistics(archive):
+    statistics = strategy_statistics(SellPuts(), archive, ['SPY'])
+    assert {'dte_range', 'otm_pct_range', 'count', 'mean'} <= set(statistics.columns)
+    assert statistics['count'].sum() > 0
+
+
+def test_intraday_snapshots_use_the_last_quote_of_the_day(tmp_path):
+    archive = ChainArchive(str(tmp_path))
+    chains = put_chains(days=30)
+    morning = chains.assign(quote_time=pd.to_datetime(chains['quote_date']) + pd.Timedelta(hours=10))
+    afternoon = morning.assign(quote_time=morning['quote_time'] + pd.Timedelta(hours=5), mark=morning['mark'] * .9)
+    archive.write(morning)
+    archive.write(afternoon)
+
+    selections, _ = select_trades(SellVerticalPutSpread(iterations=2000, picks=10_000), archive, ['SPY'],
+                                  list(archive.quote_dates('SPY')), seed=1, max_workers=1)
+    assert len(selections) and (selections['symbol'] != selections['hedge']).all()
+    assert (selections['short_strike'] - selections['long_strike'] == 2.5).all()
+
+    trades = backtest_options(SellPuts(iterations=2000), archive, ['SPY'], capital=1_000_000, seed=1,
+                              max_workers=1).trades
+    entries = afternoon.set_index(['quote_date', 'symbol'])['mark']
+    expected = [entries[(day.date(), symbol)] for day, symbol in zip(trades['entry_date'], trades['symbol'])]
+    np.testing.assert_allclose(trades['entry'], expected)
@@ -0,0 +1,21 @@
+from backtesting.test import GOOG
+from quacktrader.strategy.chaikin_trend import ChaikinTrend
+from quacktrader.strategy.universe import run_universe, summarize_universe
+
+
+def _load(symbol, start, end):
+    if symbol == 'missing':
+        raise KeyError(symbol)
+    return GOOG.loc[start:end]
+
+
+def test_run_universe_streams_scalar_results():
+    windows = [('2005-01-01', '2008-01-01'), ('2008-01-01', '2012-01-01')]
+    results = list(run_universe(ChaikinTrend, ['goog', 'missing'], windows, loader=_load, max_workers=2,
+                                cash=10000, commission=.002, exclusive_orders=True))
+    assert len(results) == 4
+    assert not any(key.startswith('_') for result in results for key in result)
+
+    table, summary = summarize_universe(results)
+    assert table['Error'].notna().sum() == 2
+    assert summary.loc['Return [%]', 'count'] == 2
@@ -0,0 +1,66 @@
+import inspect
+from backtesting import Backtest
+from backtesting._stats import compute_stats
+from backtesting.test import GOOG
+import numpy as np
+import pytest
+from quacktrader.backtesting_example import SmaCross
+from quacktrader.strategy.chaikin_trend import ChaikinTrend
+from quacktrader.strategy.mfi_oversold import MFIOversold
+from quacktrader.strategy.rsi_oversold import RSIOversold
+from quacktrader.strategy.vectorized import run_vectorized, vectorized_backtest
+
+# a realistic account, where Backtest's rounding to whole units decides the trades, and one
+# large enough that the rounding is negligible
+CASH = [10_000, 1e10]
+STATS = ['Equity Final [$]', 'Equity Peak [$]', 'Return [%]', 'Max. Drawdown [%]', 'Exposure Time [%]',
+         'Win Rate [%]', 'Best Trade [%]', 'Worst Trade [%]', 'SQN']
+
+
+@pytest.mark.parametrize('cash', CASH)
+@pytest.mark.parametrize('strategy, params', [
+    (SmaCross, {}),
+    (SmaCross, {'n1': 5, 'n2': 50}),
+    (ChaikinTrend, {}),
+    (RSIOversold, {}),
+    (RSIOversold, {'oversold': 25, 'overbought': 75}),
+    (MFIOversold, {}),
+])
+def test_parity_with_backtest(strategy, params, cash):
+    expected = Backtest(GOOG, strategy, cash=cash, commission=.002, exclusive_orders=True).run(**params)
+    actual = run_vectorized(GOOG, strategy, cash=cash, commission=.002, **params)
+    assert actual['# Trades'] == expected['# Trades']
+    for stat in STATS:
+        assert actual[stat] == pytest.approx(expected[stat], rel=1e-4), stat
+    np.testing.assert_allclose(actual._equity_curve['Equity'], expected._equity_curve['Equity'], rtol=1e-4)
+    np.testing.assert_array_equal(actual._trades['EntryBar'], expected._trades['EntryBar'])
+    np.testing.assert_array_equal(actual._trades['ExitBar'], expected._trades['ExitBar'])
+    np.testing.assert_array_equal(actual._trades['Size'], expected._trades['Size'])
+
+
+def test_compute_stats_signature():
+    # run_vectorized calls this private backtesting function, fail loudly if an upgrade changes it
+    assert list(inspect.signature(compute_stats).parameters) == [
+        'trades', 'equity', 'ohlc_data', 'strategy_instance', 'risk_free_rate']
+
+
+def test_whole_units_skip_orders_that_cannot_afford_one():
+    signals = np.zeros(len(GOOG))
+    signals[[10, 20]] = 1
+    sizes = vectorized_backtest(GOOG, signals, cash=1000, whole_units=True).trades['Size']
+    assert sizes.iloc[0] == 1000 // GOOG['Open'].iloc[11] and (sizes == sizes.round()).all()
+    assert vectorized_backtest(GOOG, signals, cash=10, whole_units=True).trades.empty
+
+
+def test_no_signals_keeps_cash():
+    result = vectorized_backtest(GOOG, np.zeros(len(GOOG)), cash=100)
+    assert (result.equity == 100).all()
+    assert result.trades.empty
+
+
+def test_order_on_last_bar_stays_open():
+    signals = np.zeros(len(GOOG))
+    signals[[10, len(GOOG) - 1]] = 1
+    result = vectorized_backtest(GOOG, signals, cash=100)
+    assert len(result.trades) == 1
+    assert result.trades['ExitBar'].iloc[0] == len(GOOG) - 1
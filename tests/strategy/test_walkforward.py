@@ -0,0 +1,34 @@
+from backtesting.test import GOOG
+import pytest
+from quacktrader.backtesting_example import SmaCross
+from quacktrader.strategy.optimizer import Optimizer
+from quacktrader.strategy.walkforward import make_folds, walk_forward
+
+
+def test_rolling_and_anchored_folds():
+    rolling = make_folds(100, train=50, test=20)
+    assert [(f.train_start, f.train_stop, f.test_start, f.test_stop) for f in rolling] == [
+        (0, 50, 50, 70), (20, 70, 70, 90), (40, 90, 90, 100)]
+    anchored = make_folds(100, train=50, test=20, anchored=True)
+    assert all(fold.train_start == 0 for fold in anchored)
+
+
+def test_walk_forward_stitches_out_of_sample_equity():
+    result = walk_forward(GOOG, SmaCross, train=500, test=250, warmup=30, max_workers=2,
+                          backtest_kwargs=dict(cash=10000, commission=.002, exclusive_orders=True),
+                          n1=[5, 10], n2=[20, 40], constraint=lambda p: p['n1'] < p['n2'])
+    assert len(result.folds) == len(make_folds(len(GOOG), 500, 250))
+    assert result.equity.index[0] == GOOG.index[500]
+    assert result.equity.index[-1] == GOOG.index[-1]
+    total = (result.folds['Test Return [%]'] / 100 + 1).prod()
+    assert result.equity.iloc[-1] == pytest.approx(10000 * total)
+
+
+def test_walk_forward_trains_like_the_optimizer():
+    kwargs = dict(cash=10000, commission=.002, exclusive_orders=True)
+    result = walk_forward(GOOG, SmaCross, train=500, test=250, max_workers=2, backtest_kwargs=kwargs,
+                          n1=[5, 10], n2=[20, 40])
+    with Optimizer(GOOG.iloc[:500], SmaCross, max_workers=2, **kwargs) as optimizer:
+        best = optimizer.grid_search(n1=[5, 10], n2=[20, 40]).iloc[0]
+    first = result.folds.iloc[0]
+    assert (first['n1'], first['n2'], first['Train SQN']) == (best['n1'], best['n2'], best['SQN'])
@@ -0,0 +1,101 @@
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+from quacktrader.chain_archive import ChainArchive, normalize_chain
+
+
+def option_chain(symbol='$SPX.X', price=4000, quote_date=date(2023, 1, 3), expiries=(17, 45), strikes=(3600, 3800, 3900)):
+    put_exp_date_map, call_exp_date_map = {}, {}
+    for days in expiries:
+        expiry = quote_date + timedelta(days=days)
+        key = f'{expiry.isoformat()}:{days}'
+        put_exp_date_map[key], call_exp_date_map[key] = {}, {}
+        for strike in strikes:
+            contract = {'strikePrice': float(strike), 'bid': 1.0, 'ask': 1.2, 'last': 1.1, 'mark': 1.1, 'gamma': .001,
+                        'theta': -.5, 'vega': 2.0, 'rho': .1, 'volatility': 20.0, 'totalVolume': 5, 'openInterest': 100,
+                        'inTheMoney': False, 'quoteTimeInLong': 1672772400000}
+            put_exp_date_map[key][f'{strike}.0'] = [{**contract, 'putCall': 'PUT', 'delta': (strike - price) / 1000,
+                                                    'symbol': f'{symbol}_{expiry:%m%d%y}P{strike}'}]
+            call_exp_date_map[key][f'{strike}.0'] = [{**contract, 'putCall': 'CALL', 'delta': -999.0,
+                                                     'symbol': f'{symbol}_{expiry:%m%d%y}C{strike}'}]
+    return {'symbol': symbol, 'underlyingPrice': price,
+            'putExpDateMap': put_exp_date_map, 'callExpDateMap': call_exp_date_map}
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = ChainArchive(str(tmp_path))
+    for day in range(3):
+        quote_date = date(2023, 1, 3) + timedelta(days=day)
+        archive.write_chain(option_chain(quote_date=quote_date), quote_date)
+        archive.write_chain(option_chain('$RUT.X', 1800, quote_date, strikes=(1600, 1700)), quote_date)
+    return archive
+
+
+def test_normalize_chain():
+    frame = normalize_chain(option_chain(), date(2023, 1, 3))
+    assert len(frame) == 12
+    put = frame.iloc[0]
+    assert put['expiry'] == date(2023, 1, 20) and put['dte'] == 17
+    assert put['volatility'] == pytest.approx(.2)
+    assert put['delta'] == pytest.approx(-.4)
+    assert frame.loc[frame['put_call'] == 'CALL', 'delta'].isna().all()
+    assert (frame['underlying'] == '$SPX.X').all() and (frame['underlying_price'] == 4000).all()
+
+
+def test_quote_date_defaults_to_the_session_of_the_quotes():
+    # quoted at 2pm New York time on Tuesday, 2023-01-03
+    assert (normalize_chain(option_chain())['quote_date'] == date(2023, 1, 3)).all()
+    chain = option_chain()
+    for strikes in chain['putExpDateMap'].values():
+        for contracts in strikes.values():
+            # 11pm in New York is already the next day in UTC
+            contracts[0]['quoteTimeInLong'] = 1672804800000
+    assert (normalize_chain(chain)['quote_date'] == date(2023, 1, 3)).all()
+
+
+def test_archive_partitions_by_underlying_and_quote_date(archive, tmp_path):
+    assert (tmp_path / 'underlying=$SPX.X' / 'quote_date=2023-01-04').is_dir()
+    assert list(archive.quote_dates('$RUT.X')) == list(pd.date_range('2023-01-03', periods=3))
+    assert len(archive.read()) == 3 * (12 + 8)
+
+
+def test_archive_round_trips_a_snapshot(archive):
+    frame = archive.read('$SPX.X', quote_dates=(date(2023, 1, 4), date(2023, 1, 4)))
+    expected = normalize_chain(option_chain(quote_date=date(2023, 1, 4)), date(2023, 1, 4))
+    frame = frame.astype({'put_call': str}).sort_values(['put_call', 'expiry', 'strike'], ignore_index=True)
+    expected = expected.sort_values(['put_call', 'expiry', 'strike'], ignore_index=True)
+    assert list(frame['symbol']) == list(expected['symbol'])
+    np.testing.assert_allclose(frame['delta'], expected['delta'], rtol=1e-6)
+    np.testing.assert_array_equal(frame['dte'], expected['dte'])
+
+
+def test_archive_filters(archive):
+    puts = archive.read('$SPX.X', put_call='PUT', dte=(30, None), strike=(3700, 3900), delta=(-.2, -.1))
+    assert len(puts) == 3
+    assert (puts['strike'] == 3900).all() and (puts['dte'] == 45).all()
+    near = archive.read(['$SPX.X', '$RUT.X'], expiry=(None, date(2023, 1, 20)), columns=['symbol', 'underlying'])
+    assert list(near.columns) == ['symbol', 'underlying']
+    assert len(near) == 6 + 4  # only the first day quotes an expiry that early
+
+
+def test_empty_archive(tmp_path):
+    assert ChainArchive(str(tmp_path / 'missing')).read('$SPX.X').empty
+
+
+def test_archive_keeps_every_snapshot_unless_latest_only(tmp_path):
+    archive = ChainArchive(str(tmp_path))
+    quote_date = date(2023, 1, 3)
+    morning, afternoon = option_chain(), option_chain()
+    for put in afternoon['putExpDateMap'].values():
+        for contracts in put.values():
+            contracts[0].update(mark=2.5, quoteTimeInLong=1672772400000 + 4 * 3600 * 1000)
+    archive.write_chain(morning, quote_date)
+    archive.write_chain(afternoon, quote_date)
+
+    assert len(archive.read('$SPX.X')) == 2 * 12
+    latest = archive.read('$SPX.X', put_call='PUT', latest_only=True)
+    assert len(latest) == 6 and latest['symbol'].is_unique and (latest['mark'] == 2.5).all()
+    marks = archive.read('$SPX.X', put_call='PUT', columns=['symbol', 'mark'], latest_only=True)
+    assert list(marks.columns) == ['symbol', 'mark'] and (marks['mark'] == 2.5).all()
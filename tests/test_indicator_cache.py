@@ -0,0 +1,59 @@
+from backtesting import Backtest
+from backtesting.test import GOOG
+from finta import TA
+import pandas as pd
+from quacktrader import indicator_cache
+from quacktrader.indicator_cache import IndicatorCache, cached
+from quacktrader.strategy.rsi_oversold import RSIOversold
+
+
+def test_cache_computes_each_series_once():
+    cache = IndicatorCache()
+    sma = cached(TA.SMA, cache)
+    first = sma(GOOG, 10)
+    pd.testing.assert_series_equal(sma(GOOG, 10), first)
+    sma(GOOG, period=10)
+    sma(GOOG, 10, 'close')
+    sma(GOOG.iloc[:-1], 10)
+    assert (cache.hits, cache.misses) == (3, 2)
+    assert sma.__name__ == 'SMA'
+
+
+def test_each_frame_is_fingerprinted_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(indicator_cache, 'fingerprint', lambda ohlc: calls.append(ohlc) or str(len(calls)))
+    cache = IndicatorCache()
+    ohlc = GOOG.copy()
+    for period in (10, 20, 10):
+        cached(TA.SMA, cache)(ohlc, period)
+    assert len(calls) == 1 and (cache.hits, cache.misses) == (1, 2)
+    key = id(ohlc)
+    del ohlc, calls[:]
+    assert key not in indicator_cache._fingerprints
+
+
+def test_cache_evicts_least_recently_used():
+    cache = IndicatorCache(max_entries=2)
+    sma = cached(TA.SMA, cache)
+    sma(GOOG, 10)
+    sma(GOOG, 20)
+    sma(GOOG, 10)
+    sma(GOOG, 30)
+    assert len(cache) == 2
+    sma(GOOG, 10)
+    assert cache.hits == 2
+
+
+def test_cache_reads_through_disk(tmp_path):
+    cached(TA.RSI, IndicatorCache(directory=str(tmp_path)))(GOOG)
+    cache = IndicatorCache(directory=str(tmp_path))
+    pd.testing.assert_series_equal(cached(TA.RSI, cache)(GOOG), TA.RSI(GOOG))
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_cached_strategy_matches_uncached_indicator():
+    stats = Backtest(GOOG, RSIOversold, cash=10000, commission=.002, exclusive_orders=True).run()
+    assert stats['# Trades'] > 0
+    rsi = stats._strategy.rsi
+    assert rsi.name == 'RSI(df)'
+    pd.testing.assert_series_equal(pd.Series(rsi, index=GOOG.index), TA.RSI(GOOG), check_names=False)
@@ -0,0 +1,48 @@
+import httpx
+import pytest
+from tda.client import Client
+from quacktrader.replay import (RecordingClient, ReplayClient, synthetic_accounts, synthetic_option_chain,
+                                synthetic_strategy_chain)
+
+
+@pytest.fixture
+def chain():
+    return synthetic_option_chain('SPY', 400.0, days=[21, 28], strikes=20, seed=0)
+
+
+def test_replay_client_answers_like_the_live_client(chain):
+    delays = []
+    client = ReplayClient(latency=.05, jitter=.01, seed=0, sleep=delays.append)
+    client.add_option_chain(chain)
+    client.add_option_chain(synthetic_strategy_chain(chain), Client.Options.Strategy.VERTICAL)
+    client.add_accounts(synthetic_accounts())
+
+    response = client.get_option_chain(symbol='SPY', strategy=Client.Options.Strategy.SINGLE,
+                                       contract_type=Client.Options.ContractType.PUT)
+    assert response.status_code == httpx.codes.OK and response.json() == chain
+    vertical = client.get_option_chain('SPY', strategy=Client.Options.Strategy.VERTICAL).json()
+    assert vertical['monthlyStrategyList'][0]['optionStrategyList'][0]['secondaryLeg']['strikePrice'] == 200.0
+    assert client.get_accounts(fields=Client.Account.Fields.POSITIONS).json() == synthetic_accounts()
+
+    missing = client.get_option_chain('QQQ')
+    assert missing.status_code == httpx.codes.NOT_FOUND
+    with pytest.raises(httpx.HTTPStatusError):
+        missing.raise_for_status()
+    assert len(delays) == 4 and all(.05 <= delay <= .06 for delay in delays)
+    assert client.calls[-1] == ('get_option_chain', 'QQQ')
+
+
+def test_recordings_round_trip(chain, tmp_path):
+    live = ReplayClient()
+    live.add_option_chain(chain)
+    live.add_accounts(synthetic_accounts())
+    recording = RecordingClient(live, str(tmp_path))
+    recording.get_option_chain('SPY', strategy=Client.Options.Strategy.SINGLE)
+    recording.get_accounts()
+    recording.get_option_chain('QQQ')
+
+    replay = ReplayClient(str(tmp_path))
+    assert replay.get_option_chain('SPY').json() == chain
+    assert replay.get_accounts().json() == synthetic_accounts()
+    assert replay.get_option_chain('QQQ').status_code == httpx.codes.NOT_FOUND
+    assert replay.calls == [('get_option_chain', 'SPY'), ('get_accounts', None), ('get_option_chain', 'QQQ')]
@@ -0,0 +1,53 @@
+import pytest
+from quacktrader import buy_unit_puts, sell_puts, sell_vertical_put_spread
+from quacktrader.benchmark_scanners import STAGES, benchmark, benchmark_scanners
+from quacktrader.chain_archive import ChainArchive
+from quacktrader.moneymanager.account_state import AccountState
+from quacktrader.replay import synthetic_client
+from quacktrader.timing import StageTimer
+
+PRICES = {'SPY': 400.0, 'QQQ': 300.0}
+
+
+@pytest.fixture(scope='module')
+def client():
+    return synthetic_client(PRICES, strikes=60, days=range(14, 91, 7), seed=0)
+
+
+def test_sell_puts_scan(client, tmp_path):
+    timer = StageTimer()
+    the_one_put, candidate = sell_puts.scan(client, symbols=list(PRICES), chain_archive=ChainArchive(str(tmp_path)),
+                                            timer=timer, iterations=2000, seed=0)
+    assert the_one_put['delta'] > -.175 and not the_one_put['inTheMoney'] and the_one_put['totalVolume'] > 0
+    assert candidate['symbol'] == the_one_put['symbol']
+    assert list(timer.timings) == ['fetch', 'parse', 'archive', 'filter', 'rank']
+    assert len(ChainArchive(str(tmp_path)).read()) == 2 * 11 * 60
+
+
+def test_buy_unit_puts_scan(client):
+    the_one_put, contracts = buy_unit_puts.scan(client, symbols=list(PRICES))
+    assert the_one_put['delta'] > -.05 and the_one_put['gamma'] < .02 and the_one_put['vega'] < .02
+    assert contracts == int(min(500_000 * .05, 1_000_000 * .02) / (the_one_put['mark'] * 100))
+
+
+def test_sell_vertical_put_spread_scan_fetches_each_single_chain_once(client):
+    account_state = AccountState(client)
+    start = len(client.calls)
+    picks = sell_vertical_put_spread.scan(client, account_state=account_state, symbols=list(PRICES),
+                                          iterations=2000, seed=0)
+    assert 0 < len(picks) <= 5
+    scores = [candidate['score'] for _, candidate in picks]
+    assert scores == sorted(scores, reverse=True)
+    for strategy, candidate in picks:
+        assert strategy['delta'] > -.175 and strategy['primaryLeg']['range'] == 'OTM'
+        assert candidate['short_strike'] == strategy['primaryLeg']['strikePrice']
+    # two strategy chains, the accounts, and then one single chain per underlying
+    assert len(client.calls) - start == 5
+
+
+def test_benchmark_reports_every_stage(client):
+    runs = benchmark(sell_puts.scan, client, repeat=2, symbols=list(PRICES), iterations=500)
+    assert list(runs.columns) == [*STAGES, 'total'] and len(runs) == 2
+    assert (runs['total'] >= runs[STAGES].sum(axis=1)).all()
+    summary = benchmark_scanners(client, repeat=1, symbols=list(PRICES))
+    assert set(summary.index.get_level_values(0)) == {'sell_puts', 'buy_unit_puts', 'sell_vertical_put_spread'}
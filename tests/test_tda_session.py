@@ -0,0 +1,137 @@
+import asyncio
+import json
+import time
+import httpx
+import pytest
+from tda import auth
+from tda.client import AsyncClient, Client
+from quacktrader import tda_session
+from quacktrader.moneymanager.conservative_moneymanager import ConservativeMoneyManger
+from quacktrader.tda_session import (REFRESH_TOKEN_UPDATE_INTERVAL, SharedTokenAsyncOAuth2Client,
+                                     SharedTokenMetadata, SharedTokenOAuth2Client, TokenFile, client_from_token_path,
+                                     pool_limits)
+
+
+def _token(access_token: str, expires_at: float) -> dict:
+    return {'access_token': access_token, 'refresh_token': 'refresh', 'token_type': 'Bearer',
+            'expires_in': 1800, 'expires_at': int(expires_at)}
+
+
+@pytest.fixture
+def token_path(tmp_path):
+    path = str(tmp_path / 'token.json')
+    TokenFile(path).write({'creation_timestamp': int(time.time()), 'token': _token('stale', time.time() - 60)})
+    return path
+
+
+@pytest.fixture
+def refreshes():
+    return []
+
+
+@pytest.fixture
+def transport(refreshes):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if str(request.url) == auth.TOKEN_ENDPOINT:
+            refreshes.append(request)
+            return httpx.Response(200, json=_token(f'fresh-{len(refreshes)}', time.time() + 1800))
+        return httpx.Response(200, json={'authorization': request.headers['Authorization']})
+    return httpx.MockTransport(handler)
+
+
+def _session(session_class, token_path, transport):
+    metadata, token = SharedTokenMetadata.from_token_file(TokenFile(token_path))
+    write_token = metadata.wrapped_token_write_func()
+
+    async def update_token(token, *args, **kwargs):
+        write_token(token, *args, **kwargs)
+    return session_class('key@AMER.OAUTHAP', metadata, token=token, token_endpoint=auth.TOKEN_ENDPOINT,
+                         transport=transport,
+                         update_token=update_token if session_class is SharedTokenAsyncOAuth2Client else write_token)
+
+
+def test_token_file_writes_atomically(tmp_path):
+    token_file = TokenFile(str(tmp_path / 'token.json'))
+    token_file.write({'token': 1})
+    token_file.write({'token': 2})
+    assert token_file.read() == {'token': 2}
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['token.json']
+
+
+def test_client_is_pooled(token_path):
+    client = client_from_token_path(token_path, 'key', limits=pool_limits(max_connections=7, max_keepalive_connections=3))
+    assert isinstance(client, Client) and isinstance(client.session, SharedTokenOAuth2Client)
+    assert client.api_key == 'key@AMER.OAUTHAP'
+    pool = client.session._transport._pool
+    assert pool._max_connections == 7 and pool._max_keepalive_connections == 3
+    async_client = client_from_token_path(token_path, 'key', asyncio=True)
+    assert isinstance(async_client, AsyncClient) and isinstance(async_client.session, SharedTokenAsyncOAuth2Client)
+
+
+def test_expired_token_is_refreshed_once_across_workers(token_path, transport, refreshes):
+    first = _session(SharedTokenOAuth2Client, token_path, transport)
+    second = _session(SharedTokenOAuth2Client, token_path, transport)
+
+    assert first.get('https://api.tdameritrade.com/v1/accounts').json() == {'authorization': 'Bearer fresh-1'}
+    stored = TokenFile(token_path).read()
+    assert stored['token']['access_token'] == 'fresh-1' and 'creation_timestamp' in stored
+
+    # the second worker adopts the token the first one wrote instead of refreshing it again
+    assert second.get('https://api.tdameritrade.com/v1/accounts').json() == {'authorization': 'Bearer fresh-1'}
+    assert len(refreshes) == 1
+
+
+def test_async_session_refreshes_and_adopts(token_path, transport, refreshes):
+    async def run():
+        first = _session(SharedTokenAsyncOAuth2Client, token_path, transport)
+        second = _session(SharedTokenAsyncOAuth2Client, token_path, transport)
+        responses = await asyncio.gather(*(session.get('https://api.tdameritrade.com/v1/accounts')
+                                           for session in (first, first, second)))
+        return [response.json()['authorization'] for response in responses]
+
+    assert asyncio.run(run()) == ['Bearer fresh-1'] * 3
+    assert len(refreshes) == 1 and TokenFile(token_path).read()['token']['access_token'] == 'fresh-1'
+
+
+def test_old_refresh_token_is_rotated_once_in_place(tmp_path, transport, refreshes):
+    token_path = str(tmp_path / 'token.json')
+    created = int(time.time()) - REFRESH_TOKEN_UPDATE_INTERVAL - 60
+    TokenFile(token_path).write({'creation_timestamp': created, 'token': _token('current', time.time() + 1800)})
+    clients = [Client('key@AMER.OAUTHAP', session, token_metadata=session.token_metadata)
+               for session in (_session(SharedTokenOAuth2Client, token_path, transport) for _ in range(2))]
+    sessions = [client.session for client in clients]
+
+    for client in clients:
+        assert client.get_accounts().json() == {'authorization': 'Bearer fresh-1'}
+    # the first worker rotated the refresh token on its pooled session, the second adopted it
+    assert len(refreshes) == 1 and b'grant_type=refresh_token' in refreshes[0].content
+    assert [client.session for client in clients] == sessions
+    stored = TokenFile(token_path).read()
+    assert stored['token']['access_token'] == 'fresh-1' and stored['creation_timestamp'] > created
+    assert all(client.token_metadata.creation_timestamp == stored['creation_timestamp'] for client in clients)
+
+
+def test_get_client_is_shared_until_closed(token_path, monkeypatch):
+    monkeypatch.setattr(tda_session, 'TDA_TOKEN_PATH', token_path)
+    monkeypatch.setattr(tda_session, 'TDA_API_KEY', 'key')
+    monkeypatch.setattr(tda_session, '_clients', {})
+    client = tda_session.get_client()
+    assert tda_session.get_client() is client
+    assert tda_session.get_async_client() is not client
+    tda_session.close()
+    assert client.session.is_closed and tda_session.get_client() is not client
+    asyncio.run(tda_session.aclose())
+
+
+def test_account_state_is_shared_with_the_client(token_path, monkeypatch):
+    monkeypatch.setattr(tda_session, 'TDA_TOKEN_PATH', token_path)
+    monkeypatch.setattr(tda_session, 'TDA_API_KEY', 'key')
+    monkeypatch.setattr(tda_session, '_clients', {})
+    monkeypatch.setattr(tda_session, '_account_state', None)
+    state = tda_session.get_account_state()
+    assert state.tda_client is tda_session.get_client()
+    assert tda_session.get_account_state(tda_session.get_client()) is state
+    assert ConservativeMoneyManger(ledger=object()).account_state is state
+    assert tda_session.get_account_state(object()) is not state
+    tda_session.close()
+    assert tda_session.get_account_state() is not state
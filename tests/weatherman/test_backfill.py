@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+from quacktrader.weatherman.backfill import backfill_forecasts, crossovers, hit_rate, score_forecasts
+from quacktrader.weatherman.weatherman import Weatherman
+
+
+def _ohlc(days=700):
+    index = pd.date_range('2020-01-01', periods=days, freq='B')
+    close = 100 + 10 * np.sin(np.arange(days) / 30) + np.random.default_rng(3).normal(0, 1, days)
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close}, index=index)
+
+
+def test_crossovers():
+    crossed = crossovers([1, 1, 3, 1], [2, 2, 2, 2])
+    assert crossed.tolist() == [False, False, True, False]
+
+
+def test_backfill_matches_make_forecast():
+    ohlc = _ohlc()
+    forecasts = backfill_forecasts(ohlc)
+    weatherman = Weatherman()
+    for end in range(200, len(ohlc) + 1):
+        forecast = weatherman.make_forecast(ohlc.iloc[:end])
+        row = forecasts.iloc[end - 1]
+        assert row['direction'] == forecast.direction
+        assert row['timeframe'] == forecast.timeframe
+
+
+def test_score_forecasts():
+    ohlc = _ohlc()
+    scored = score_forecasts(ohlc)
+    assert scored['realized_return'].iloc[-1:].isna().all()
+    calls = scored[scored['hit'].notna()]
+    assert len(calls) > 0
+    expected = np.sign(calls['realized_return']) == calls['direction']
+    assert (calls['hit'].astype(bool) == expected).all()
+    assert hit_rate(scored)['forecasts'] == len(calls)
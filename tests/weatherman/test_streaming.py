@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+from quacktrader.weatherman.streaming import IndicatorEngine, RollingSMA
+from quacktrader.weatherman.weatherman import Weatherman
+
+
+def _ohlc(days=600):
+    index = pd.date_range('2020-01-01', periods=days, freq='D')
+    close = 100 + 10 * np.sin(np.arange(days) / 40) + np.random.default_rng(7).normal(0, 1, days)
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close}, index=index)
+
+
+def test_rolling_sma_matches_pandas():
+    values = np.random.default_rng(1).normal(100, 5, 1000)
+    sma = RollingSMA(20)
+    rolled = [sma.update(value) for value in values]
+    expected = pd.Series(values).rolling(20).mean()
+    np.testing.assert_allclose(rolled, expected, equal_nan=True)
+
+
+def test_rolling_sma_revise_replaces_last_value():
+    sma = RollingSMA(3)
+    for value in [1, 2, 3]:
+        sma.update(value)
+    sma.update(100)
+    assert sma.revise(4) == 3
+    assert sma.previous == 2
+
+
+def test_streaming_forecast_matches_make_forecast():
+    ohlc = _ohlc()
+    weatherman = Weatherman()
+    engine = IndicatorEngine()
+    engine.warm_up('goog', ohlc.iloc[:300])
+    for end in range(301, len(ohlc) + 1):
+        bar = ohlc.iloc[end - 1]
+        state = engine.update('goog', ohlc.index[end - 1], bar['Close'])
+        assert weatherman.make_streaming_forecast(state) == weatherman.make_forecast(ohlc.iloc[:end])